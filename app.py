@@ -41,11 +41,11 @@ app.layout = html.Div([
 @app.callback(Output("page-content", "children"), Input("url", "pathname"))
 def display_page(pathname):
     if pathname == "/dashboard_base":
-        return dashboard_base.layout
+        return dashboard_base.get_layout()
     elif pathname == "/dashboard_opt":
-        return dashboard_opt.layout
+        return dashboard_opt.get_layout()
     elif pathname == "/dashboard_comparison":
-        return dashboard_comparison.layout
+        return dashboard_comparison.get_layout()
     else:
         # Renderizar el contenido de index.html como HTML
         return html.Iframe(
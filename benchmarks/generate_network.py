@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from coordination.families import CURVE_NAMES, DEFAULT_CURVE
+
+# Generador de redes sintéticas (radiales o malladas) en los mismos esquemas JSON que el sistema de 33 barras:
+#   data/config/relay_pairs.json
+#   data/raw/data_short_circuit_scenario_base.json
+#   data/raw/data_relays_scenario_base.json
+#   data/processed/data_relays_scenario_base_optimized.json
+# Cada línea k = (a, b) lleva dos relés: R{k} (directo) y R{k + L} (inverso), como en el sistema original.
+
+SCENARIO_ID = "scenario_1"
+TIE_FRACTION = 0.05  # Fracción de líneas de enlace en redes malladas
+
+
+def _oid(rng: np.random.Generator) -> Dict[str, str]:
+    return {"$oid": "".join(rng.choice(list("0123456789abcdef"), 24))}
+
+
+# Topología: árbol con alimentadores largos y ramas; en modo mallado se agregan líneas de enlace
+def build_topology(n_relays: int, topology: str, rng: np.random.Generator) -> List[Tuple[int, int]]:
+    n_lines = max(2, n_relays // 2)
+    n_ties = max(1, int(n_lines * TIE_FRACTION)) if topology == "meshed" else 0
+    n_buses = n_lines - n_ties + 1
+
+    lines = []
+    for v in range(2, n_buses + 1):
+        parent = v - 1 if rng.random() < 0.8 else int(rng.integers(max(1, v - 50), v))
+        lines.append((parent, v))
+
+    existing = set(lines)
+    while len(lines) < n_lines:
+        a, b = sorted(int(x) for x in rng.integers(1, n_buses + 1, 2))
+        if a != b and (a, b) not in existing:
+            existing.add((a, b))
+            lines.append((a, b))
+    return lines
+
+
+# Profundidad de cada barra en el árbol (las primeras n_buses - 1 líneas; los enlaces van al final)
+def _depths(lines: List[Tuple[int, int]], n_buses: int) -> np.ndarray:
+    depth = np.zeros(n_buses + 1)
+    for a, b in lines[:n_buses - 1]:
+        depth[b] = depth[a] + 1
+    return depth
+
+
+# Generar los cuatro archivos de entrada para una red de ~n_relays relés
+# Con mixed_curves cada relé recibe una familia de curva aleatoria (IEC/IEEE); si no, todos IEC SI
+def generate(n_relays: int, topology: str = "radial", seed: int = 0, mixed_curves: bool = False) -> Dict[str, Dict]:
+    rng = np.random.default_rng(seed)
+    lines = build_topology(n_relays, topology, rng)
+    L = len(lines)
+    n_buses = max(max(a, b) for a, b in lines)
+    names = [f"L{a}-{b}" for a, b in lines]
+
+    incident: Dict[int, List[int]] = {}
+    for k, (a, b) in enumerate(lines):
+        incident.setdefault(a, []).append(k)
+        incident.setdefault(b, []).append(k)
+
+    def forward(k):
+        return f"R{k + 1}"
+
+    def reverse(k):
+        return f"R{k + 1 + L}"
+
+    # Relés de respaldo de una falla cerca de `node`: el relé de cada otra línea incidente que mira hacia `node`
+    def backups_at(k, node):
+        return [(forward(o) if lines[o][1] == node else reverse(o), names[o]) for o in incident[node] if o != k]
+
+    # Nivel de falla por barra: decrece con la distancia a la fuente (I = V/(Zs + d·Zl))
+    fault_level = 10.0 / (0.1 + 0.05 * _depths(lines, n_buses)) * rng.uniform(0.8, 1.2, n_buses + 1)
+    min_current = {}
+
+    relay_pairs, sc_lines = {}, {}
+    for k, (a, b) in enumerate(lines):
+        pair_scenarios, sc_scenarios = {}, {}
+        for scenario, node, main in (("10", a, forward(k)), ("90", b, reverse(k))):
+            backups = backups_at(k, node)
+            if not backups:
+                continue
+            bus1 = round(float(fault_level[node]), 2)
+            bus2 = round(bus1 * float(rng.uniform(0.1, 0.9)), 2)
+            share = max(bus1, bus2) / np.sqrt(len(backups))
+            backup_currents = [round(float(share * rng.uniform(0.3, 0.95)), 2) for _ in backups]
+
+            min_current[main] = min(min_current.get(main, np.inf), max(bus1, bus2))
+            for (relay, _), current in zip(backups, backup_currents):
+                min_current[relay] = min(min_current.get(relay, np.inf), current)
+
+            empty = {"pick_up": None, "Ishc": None, "TDS": None, "Time_out": None}
+            pair_scenarios[scenario] = {
+                "main": {"relay": main, **empty},
+                "backups": [{"relay": relay, "line": line, **empty} for relay, line in backups],
+            }
+            sc_scenarios[scenario] = {
+                "main": {"relay": main, "currents": {"bus1": bus1, "bus2": bus2}},
+                "backups": [
+                    {"line": line, "relay": relay, "currents": {"bus1": current, "bus2": current}}
+                    for (relay, line), current in zip(backups, backup_currents)
+                ],
+            }
+        if pair_scenarios:
+            relay_pairs[names[k]] = {"nodes": [a, b], "relays": [forward(k), reverse(k)], "scenarios": pair_scenarios}
+            sc_lines[names[k]] = {"nodes": [a, b], "relays": [forward(k), reverse(k)], "scenarios": sc_scenarios}
+
+    relays = sorted(min_current, key=lambda r: int(r[1:]))
+    pickups = {r: round(max(0.01, 0.2 * min_current[r] * float(rng.uniform(0.5, 1.5))), 5) for r in relays}
+    curves = {r: (str(rng.choice(CURVE_NAMES)) if mixed_curves else DEFAULT_CURVE) for r in relays}
+    timestamp = datetime.now().isoformat()
+
+    return {
+        "relay_pairs": relay_pairs,
+        "short_circuit": {"_id": _oid(rng), "scenario_id": SCENARIO_ID, "timestamp": {"$date": timestamp}, "lines": sc_lines},
+        "relays": {"_id": _oid(rng), "scenario_id": SCENARIO_ID, "timestamp": timestamp,
+                   "relay_values": {r: {"TDS": 0.05, "pickup": pickups[r], "curve": curves[r]} for r in relays}},
+        "relays_optimized": {"scenario_id": SCENARIO_ID,
+                             "optimized_relay_values": {r: {"TDS": round(float(rng.uniform(0.05, 1.5)), 5), "pickup": pickups[r], "curve": curves[r]}
+                                                        for r in relays}},
+    }
+
+
+# Escribir la red con la misma estructura de carpetas que data/ para que las páginas la lean sin cambios
+def write(network: Dict[str, Dict], out_dir: str) -> Dict[str, str]:
+    paths = {
+        "relay_pairs": os.path.join(out_dir, "data", "config", "relay_pairs.json"),
+        "short_circuit": os.path.join(out_dir, "data", "raw", "data_short_circuit_scenario_base.json"),
+        "relays": os.path.join(out_dir, "data", "raw", "data_relays_scenario_base.json"),
+        "relays_optimized": os.path.join(out_dir, "data", "processed", "data_relays_scenario_base_optimized.json"),
+    }
+    for key, path in paths.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(network[key], file, indent=2)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una red sintética de relés en el formato JSON del proyecto")
+    parser.add_argument("--relays", type=int, default=1000, help="Número aproximado de relés")
+    parser.add_argument("--topology", choices=["radial", "meshed"], default="radial")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mixed-curves", action="store_true", help="Asignar familias de curva IEC/IEEE aleatorias")
+    parser.add_argument("--out", required=True, help="Directorio de salida (se crea data/ dentro)")
+    args = parser.parse_args()
+
+    network = generate(args.relays, args.topology, args.seed, args.mixed_curves)
+    paths = write(network, args.out)
+    n_pairs = sum(len(s["backups"]) for line in network["relay_pairs"].values() for s in line["scenarios"].values())
+    print(f"{len(network['relays']['relay_values'])} relés, {len(network['relay_pairs'])} líneas, {n_pairs} pares -> {os.path.dirname(paths['relay_pairs'])}/..")
+
+
+if __name__ == "__main__":
+    main()
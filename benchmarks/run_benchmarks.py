@@ -0,0 +1,189 @@
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# Suite de escalamiento: genera redes sintéticas de distinto tamaño y mide cada etapa del flujo
+# en un proceso nuevo, para que el tiempo y la memoria pico de una etapa no se mezclen con las demás.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BASE_DIR, "..")
+
+STAGES = ["json_load", "bundle_load", "compile", "analyze_coordination", "optimizer_iteration", "optimizer_full", "dashboard"]
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_TIMEOUT = 1800  # segundos por etapa
+
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BASE_DIR)
+
+
+def _peak_memory_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _data_paths(data_dir: str) -> Dict[str, str]:
+    return {
+        "relay_pairs": os.path.join(data_dir, "data", "config", "relay_pairs.json"),
+        "short_circuit": os.path.join(data_dir, "data", "raw", "data_short_circuit_scenario_base.json"),
+        "relays": os.path.join(data_dir, "data", "raw", "data_relays_scenario_base.json"),
+        "relays_optimized": os.path.join(data_dir, "data", "processed", "data_relays_scenario_base_optimized.json"),
+    }
+
+
+def _load(data_dir: str) -> Dict[str, Dict]:
+    loaded = {}
+    for key, path in _data_paths(data_dir).items():
+        with open(path, 'r') as file:
+            loaded[key] = json.load(file)
+    return loaded
+
+
+# Ejecutar una etapa dentro del proceso actual; la preparación no cuenta en el tiempo medido
+def run_stage(stage: str, data_dir: str) -> Dict:
+    from coordination import engine, short_circuit
+
+    if stage == "json_load":
+        start = time.perf_counter()
+        loaded = _load(data_dir)
+        elapsed = time.perf_counter() - start
+        return {"wall_time": elapsed, "relays": len(loaded["relays"]["relay_values"])}
+
+    if stage == "bundle_load":
+        # El paquete se compila en otro proceso, así la carga JSON no cuenta en la memoria pico de esta etapa
+        from coordination import bundle
+        paths = _data_paths(data_dir)
+        directory = os.path.join(data_dir, "bundle")
+        subprocess.run([sys.executable, "-m", "coordination.bundle", "compile", "--bundle", directory,
+                        "--pairs", paths["relay_pairs"], "--short-circuit", paths["short_circuit"],
+                        "--settings", f"base={paths['relays']}"], cwd=ROOT_DIR, check=True, capture_output=True)
+        start = time.perf_counter()
+        loaded_bundle = bundle.ensure_bundle(directory, paths["relay_pairs"], paths["short_circuit"], {"base": paths["relays"]})
+        compiled = loaded_bundle.compiled()
+        loaded_bundle.settings_arrays("base")
+        elapsed = time.perf_counter() - start
+        return {"wall_time": elapsed, "pairs": compiled.n_pairs}
+
+    loaded = _load(data_dir)
+    if stage == "compile":
+        start = time.perf_counter()
+        index = short_circuit.build_index(loaded["short_circuit"])
+        compiled = engine.compile_pairs(loaded["relay_pairs"], index)
+        elapsed = time.perf_counter() - start
+        return {"wall_time": elapsed, "pairs": compiled.n_pairs}
+
+    index = short_circuit.build_index(loaded["short_circuit"])
+    if stage == "analyze_coordination":
+        compiled = engine.compile_pairs(loaded["relay_pairs"], index)
+        start = time.perf_counter()
+        coordinated, uncoordinated, tmt, total_pairs = engine.analyze_coordination(loaded["relays"]["relay_values"], compiled)
+        elapsed = time.perf_counter() - start
+        return {"wall_time": elapsed, "pairs": total_pairs, "tmt": tmt}
+
+    if stage in ("optimizer_iteration", "optimizer_full"):
+        from coordination import optimizer
+        max_iterations = 1 if stage == "optimizer_iteration" else optimizer.MAX_ITERATIONS
+        start = time.perf_counter()
+        optimizer.optimize_relay_settings(loaded["relays"], loaded["relay_pairs"], index, max_iterations)
+        elapsed = time.perf_counter() - start
+        return {"wall_time": elapsed}
+
+    if stage == "dashboard":
+        # Las páginas leen data/... relativo al directorio de trabajo, igual que cuando se lanza app.py
+        import importlib
+        import dash
+        logging.disable(logging.WARNING)
+        os.chdir(data_dir)
+        dash.Dash(__name__, use_pages=True, pages_folder="")
+
+        start = time.perf_counter()
+        page = importlib.import_module("pages.dashboard_opt")
+        page.get_layout()
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        page.update_dashboard(0, 0)
+        callback_time = time.perf_counter() - start
+        return {"wall_time": callback_time, "page_load": load_time}
+
+    raise ValueError(f"Etapa desconocida: {stage}")
+
+
+# Lanzar la etapa en un subproceso y recoger su resultado JSON
+def measure(stage: str, data_dir: str, timeout: float) -> Dict:
+    command = [sys.executable, os.path.abspath(__file__), "--stage", stage, "--data", data_dir]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout ({timeout:.0f} s)"}
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"código {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def format_table(results: List[Dict]) -> str:
+    header = f"{'Relés':>8} {'Topología':>9} {'Pares':>8}  {'Etapa':<22} {'Tiempo (s)':>11} {'Memoria (MB)':>13}"
+    lines = [header, "-" * len(header)]
+    for row in results:
+        if "error" in row:
+            lines.append(f"{row['relays']:>8} {row['topology']:>9} {row['pairs']:>8}  {row['stage']:<22} {row['error']}")
+        else:
+            lines.append(f"{row['relays']:>8} {row['topology']:>9} {row['pairs']:>8}  {row['stage']:<22} "
+                         f"{row['wall_time']:>11.4f} {row['peak_memory_mb']:>13.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide tiempo y memoria pico de cada etapa sobre redes sintéticas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Número de relés por red")
+    parser.add_argument("--topology", choices=["radial", "meshed"], nargs="+", default=["radial", "meshed"])
+    parser.add_argument("--stages", choices=STAGES, nargs="+", default=STAGES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mixed-curves", action="store_true", help="Redes con familias de curva IEC/IEEE mezcladas")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Tiempo máximo por etapa (s)")
+    parser.add_argument("--output", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Modo interno: una etapa por proceso
+    if args.stage:
+        result = run_stage(args.stage, args.data)
+        result["peak_memory_mb"] = _peak_memory_mb()
+        print(json.dumps(result))
+        return
+
+    import generate_network
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for topology in args.topology:
+            for size in args.sizes:
+                data_dir = os.path.join(tmp, f"{topology}_{size}")
+                network = generate_network.generate(size, topology, args.seed, args.mixed_curves)
+                generate_network.write(network, data_dir)
+                n_pairs = sum(len(s["backups"]) for line in network["relay_pairs"].values() for s in line["scenarios"].values())
+                del network
+
+                for stage in args.stages:
+                    row = {"relays": size, "topology": topology, "pairs": n_pairs, "stage": stage}
+                    row.update(measure(stage, data_dir, args.timeout))
+                    results.append(row)
+                    print(format_table([row]).splitlines()[-1], flush=True)
+
+    print()
+    print(format_table(results))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+from coordination import engine
+from coordination.engine import CompiledPairs
+from coordination.families import CURVE_NAMES, DEFAULT_CURVE, curve_code
+from coordination.short_circuit import build_index
+
+logger = logging.getLogger(__name__)
+
+# Paquete binario de un conjunto de escenario: un directorio con manifest.json y un .npy por arreglo plano (pares
+# compilados, tablas de cadenas y ajustes). Los .npy se abren con mmap, así la carga no depende del tamaño de la red
+# y los workers comparten las mismas páginas a través del page cache. La ruta del paquete es un enlace simbólico a un
+# directorio versionado (<paquete>.v-*); cada compilación escribe una versión nueva y reemplaza el enlace con un
+# rename atómico, de modo que un lector sin candado siempre ve una versión completa.
+BUNDLE_FORMAT = "relay-coordination-bundle"
+BUNDLE_VERSION = 1
+MANIFEST = "manifest.json"
+PAIR_ARRAYS = ("main_idx", "backup_idx", "I_shc_main", "I_shc_backup", "I_bus_main", "I_bus_backup")
+HASH_CHUNK = 1024 ** 2
+READ_ATTEMPTS = 3  # Reintentos de load_bundle si la versión resuelta se borra durante la carga
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source(path: str) -> Dict:
+    status = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime_ns": status.st_mtime_ns, "size": status.st_size, "sha256": _digest(path)}
+
+
+# Cadenas por par guardadas como códigos int32 sobre una tabla de valores únicos; se decodifican al acceder
+class CodedStrings(Sequence):
+    def __init__(self, codes: np.ndarray, table: List[str]):
+        self.codes = codes
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.table[code] for code in self.codes[i]]
+        return self.table[self.codes[i]]
+
+    def __iter__(self):
+        table = self.table
+        return (table[code] for code in self.codes.tolist())
+
+
+def _encode(values: List[str]):
+    table = list(dict.fromkeys(values))
+    index = {value: code for code, value in enumerate(table)}
+    return np.array([index[value] for value in values], dtype=np.int32), table
+
+
+def _strings(values: List[str]) -> np.ndarray:
+    return np.array(values, dtype=str) if values else np.empty(0, dtype="U1")
+
+
+def _write_array(directory: str, name: str, array: np.ndarray) -> None:
+    np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+
+# Escribir el paquete en directory a partir de los documentos ya cargados. sources (tipo -> ruta) se registra en el
+# manifiesto con mtime, tamaño y hash para la verificación de vigencia.
+def write_bundle(directory: str, relay_pairs: Dict, short_circuit_data: Dict, settings: Dict[str, Dict],
+                 sources: Optional[Dict[str, str]] = None) -> None:
+    compiled = engine.compile_pairs(relay_pairs, build_index(short_circuit_data))
+    os.makedirs(os.path.dirname(os.path.abspath(directory)), exist_ok=True)
+    version_dir = f"{directory}.v-{time.time_ns()}-{os.getpid()}"
+    os.makedirs(version_dir)
+
+    for name in PAIR_ARRAYS:
+        _write_array(version_dir, name, getattr(compiled, name))
+    _write_array(version_dir, "relays", _strings(compiled.relays))
+    tables = {}
+    for name in ("lines", "scenarios", "backup_lines"):
+        codes, tables[name] = _encode(getattr(compiled, name))
+        _write_array(version_dir, f"{name}_code", codes)
+
+    settings_info = {}
+    for name, data in settings.items():
+        key = "optimized_relay_values" if "optimized_relay_values" in data else "relay_values"
+        relay_values = data[key]
+        relays = list(relay_values)
+        _write_array(version_dir, f"settings.{name}.relays", _strings(relays))
+        _write_array(version_dir, f"settings.{name}.tds", np.array([relay_values[r]["TDS"] for r in relays], dtype=float))
+        _write_array(version_dir, f"settings.{name}.pickup", np.array([relay_values[r]["pickup"] for r in relays], dtype=float))
+        _write_array(version_dir, f"settings.{name}.curve",
+                     np.array([curve_code(relay_values[r].get("curve", DEFAULT_CURVE)) for r in relays], dtype=np.int8))
+        settings_info[name] = {"key": key, "scenario_id": data.get("scenario_id")}
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "scenario_id": short_circuit_data.get("scenario_id"),
+        "n_pairs": compiled.n_pairs,
+        "n_relays": compiled.n_relays,
+        "tables": tables,
+        "settings": settings_info,
+        "sources": {kind: _source(path) for kind, path in (sources or {}).items()},
+    }
+    with open(os.path.join(version_dir, MANIFEST), 'w') as file:
+        json.dump(manifest, file, indent=2)
+
+    # Reemplazo atómico del enlace; la versión anterior se borra después (los lectores ya cargados la tienen mapeada)
+    old_dir = None
+    if os.path.islink(directory):
+        old_dir = os.path.join(os.path.dirname(directory), os.readlink(directory))
+    elif os.path.exists(directory):
+        # Paquete escrito como directorio real por una versión anterior: se aparta una sola vez
+        old_dir = f"{directory}.old-{os.getpid()}"
+        os.rename(directory, old_dir)
+    link = f"{directory}.link-{os.getpid()}"
+    os.symlink(os.path.basename(version_dir), link)
+    os.replace(link, directory)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    logger.info(f"Paquete compilado en {directory} ({compiled.n_pairs} pares, {compiled.n_relays} relés)")
+
+
+# Archivos fuente de un paquete por tipo, como se registran en el manifiesto
+def source_paths(relay_pairs_path: str, short_circuit_path: str, settings_paths: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    return {"relay_pairs": relay_pairs_path, "short_circuit": short_circuit_path,
+            **{f"settings.{name}": path for name, path in (settings_paths or {}).items()}}
+
+
+def compile_bundle(directory: str, relay_pairs_path: str, short_circuit_path: str,
+                   settings_paths: Optional[Dict[str, str]] = None) -> None:
+    settings_paths = settings_paths or {}
+    documents = {}
+    for kind, path in [("relay_pairs", relay_pairs_path), ("short_circuit", short_circuit_path)] + \
+            [(f"settings.{name}", path) for name, path in settings_paths.items()]:
+        with open(path, 'r') as file:
+            documents[kind] = json.load(file)
+    settings = {name: documents[f"settings.{name}"] for name in settings_paths}
+    write_bundle(directory, documents["relay_pairs"], documents["short_circuit"], settings,
+                 source_paths(relay_pairs_path, short_circuit_path, settings_paths))
+
+
+def _manifest(directory: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(directory, MANIFEST), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+# Motivos por los que el paquete no corresponde a los archivos fuente (lista vacía si está vigente). Un archivo con
+# otro mtime o tamaño solo cuenta como cambiado si también cambió su hash.
+def staleness(directory: str, sources: Optional[Dict[str, str]] = None) -> List[str]:
+    manifest = _manifest(directory)
+    if manifest is None:
+        return ["no existe el paquete"]
+    if manifest.get("format") != BUNDLE_FORMAT or manifest.get("version") != BUNDLE_VERSION:
+        return [f"versión de formato {manifest.get('version')} (se requiere {BUNDLE_VERSION})"]
+    recorded = manifest["sources"]
+    if sources is not None:
+        expected = {kind: os.path.abspath(path) for kind, path in sources.items()}
+        if {kind: entry["path"] for kind, entry in recorded.items()} != expected:
+            return ["las fuentes no coinciden con las del paquete"]
+    reasons = []
+    for kind, entry in recorded.items():
+        if not os.path.exists(entry["path"]):
+            reasons.append(f"{kind}: no existe {entry['path']}")
+            continue
+        status = os.stat(entry["path"])
+        if (status.st_mtime_ns, status.st_size) != (entry["mtime_ns"], entry["size"]) and _digest(entry["path"]) != entry["sha256"]:
+            reasons.append(f"{kind}: {entry['path']} cambió")
+    return reasons
+
+
+@dataclass
+class Bundle:
+    directory: str
+    manifest: Dict
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def array(self, name: str) -> np.ndarray:
+        if name not in self.arrays:
+            self.arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+        return self.arrays[name]
+
+    @property
+    def scenario_id(self) -> Optional[str]:
+        return self.manifest.get("scenario_id")
+
+    # Pares compilados sobre los arreglos mapeados (de solo lectura); solo la tabla de relés se materializa
+    def compiled(self) -> CompiledPairs:
+        relays = self.array("relays").tolist()
+        tables = self.manifest["tables"]
+        return CompiledPairs(
+            relays=relays,
+            relay_index={relay: r for r, relay in enumerate(relays)},
+            lines=CodedStrings(self.array("lines_code"), tables["lines"]),
+            scenarios=CodedStrings(self.array("scenarios_code"), tables["scenarios"]),
+            backup_lines=CodedStrings(self.array("backup_lines_code"), tables["backup_lines"]),
+            **{name: self.array(name) for name in PAIR_ARRAYS},
+        )
+
+    # TDS, pickup y código de curva de un archivo de ajustes, alineados con relays (por defecto, los de los pares)
+    def settings_arrays(self, name: str, relays: Optional[List[str]] = None):
+        names = self.array(f"settings.{name}.relays").tolist()
+        tds, pickup, curve = (self.array(f"settings.{name}.{key}") for key in ("tds", "pickup", "curve"))
+        if relays is None:
+            relays = self.array("relays").tolist()
+        position = {relay: i for i, relay in enumerate(names)}
+        order = np.array([position[relay] for relay in relays], dtype=np.intp)
+        return tds[order], pickup[order], curve[order]
+
+    # Documento de ajustes equivalente al original (TDS, pickup y curve por relé)
+    def relay_values(self, name: str) -> Dict[str, Dict]:
+        names = self.array(f"settings.{name}.relays").tolist()
+        tds, pickup, curve = (self.array(f"settings.{name}.{key}").tolist() for key in ("tds", "pickup", "curve"))
+        return {relay: {"TDS": t, "pickup": p, "curve": CURVE_NAMES[c]} for relay, t, p, c in zip(names, tds, pickup, curve)}
+
+
+# Cargar la versión vigente: se resuelve el enlace una vez y se mapean todos sus arreglos, así el Bundle no mezcla
+# versiones aunque el paquete se recompile después
+def load_bundle(directory: str) -> Bundle:
+    for _ in range(READ_ATTEMPTS):
+        version_dir = os.path.realpath(directory)
+        manifest = _manifest(version_dir)
+        if manifest is None and os.path.realpath(directory) != version_dir:
+            continue  # El enlace cambió mientras se leía
+        if manifest is None or manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"{directory} no es un paquete de escenario")
+        if manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"El paquete {directory} tiene la versión {manifest.get('version')}; se requiere {BUNDLE_VERSION}")
+        bundle = Bundle(directory=version_dir, manifest=manifest)
+        try:
+            for name in os.listdir(version_dir):
+                if name.endswith(".npy"):
+                    bundle.array(name[:-len(".npy")])
+        except FileNotFoundError:
+            continue  # La versión se borró tras una recompilación; se vuelve a resolver el enlace
+        return bundle
+    raise ValueError(f"No se pudo cargar {directory}: el paquete se recompiló durante {READ_ATTEMPTS} intentos")
+
+
+# Cargar el paquete, recompilándolo antes si falta o no corresponde a los archivos fuente. La recompilación se hace
+# bajo un candado de archivo para que varios workers no compilen a la vez.
+def ensure_bundle(directory: str, relay_pairs_path: str, short_circuit_path: str,
+                  settings_paths: Optional[Dict[str, str]] = None) -> Bundle:
+    settings_paths = settings_paths or {}
+    sources = source_paths(relay_pairs_path, short_circuit_path, settings_paths)
+    if staleness(directory, sources):
+        os.makedirs(os.path.dirname(os.path.abspath(directory)), exist_ok=True)
+        with open(f"{directory}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            reasons = staleness(directory, sources)
+            if reasons:
+                logger.info(f"Recompilando {directory}: {'; '.join(reasons)}")
+                compile_bundle(directory, relay_pairs_path, short_circuit_path, settings_paths)
+    return load_bundle(directory)
+
+
+def main():
+    from coordination import optimizer
+
+    parser = argparse.ArgumentParser(description="Compilar un conjunto de escenario a un paquete binario mapeable en memoria")
+    parser.add_argument("command", choices=["compile", "check"], help="compile: compilar si no está vigente; check: informar vigencia")
+    parser.add_argument("--bundle", required=True, help="Directorio del paquete")
+    parser.add_argument("--pairs", default=optimizer.RELAY_PAIRS_PATH, help="Archivo relay_pairs.json")
+    parser.add_argument("--short-circuit", default=optimizer.SHORT_CIRCUIT_PATH, help="Archivo de corrientes de cortocircuito")
+    parser.add_argument("--settings", nargs="*", default=[f"base={optimizer.RELAY_DATA_PATH}"],
+                        help="Archivos de ajustes como nombre=ruta")
+    parser.add_argument("--force", action="store_true", help="Recompilar aunque esté vigente")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    settings_paths = dict(item.split("=", 1) for item in args.settings)
+    if args.command == "check":
+        reasons = staleness(args.bundle, source_paths(args.pairs, args.short_circuit, settings_paths))
+        logger.info("Paquete vigente" if not reasons else f"Paquete desactualizado: {'; '.join(reasons)}")
+        raise SystemExit(1 if reasons else 0)
+    if args.force:
+        compile_bundle(args.bundle, args.pairs, args.short_circuit, settings_paths)
+    bundle = ensure_bundle(args.bundle, args.pairs, args.short_circuit, settings_paths)
+    logger.info(f"Paquete {args.bundle}: {bundle.manifest['n_pairs']} pares, {bundle.manifest['n_relays']} relés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Tuple
+from coordination import engine
+from coordination.families import DEFAULT_CODE
+
+# Puntos por curva y número máximo de curvas conservadas en memoria
+CURVE_POINTS = 100
+CURVE_CACHE_SIZE = 512
+
+
+# Rango de corrientes compartido por ambas curvas de un par (desde el pickup del principal)
+def curve_range(main_pickup: float, I_shc_main: float) -> Tuple[float, float]:
+    return main_pickup, max(I_shc_main, main_pickup * 10)
+
+
+@lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _current_range(i_min: float, i_max: float, points: int) -> np.ndarray:
+    I_shc_range = np.linspace(i_min, i_max, points)
+    I_shc_range.flags.writeable = False
+    return I_shc_range
+
+
+# Curva de tiempo inverso vectorizada, cacheada por (pickup, TDS, rango, familia); el arreglo es de solo lectura
+@lru_cache(maxsize=CURVE_CACHE_SIZE)
+def inverse_time_curve(I_pi: float, TDS: float, i_min: float, i_max: float, points: int = CURVE_POINTS,
+                       family: int = DEFAULT_CODE) -> np.ndarray:
+    curve = engine.operation_time(_current_range(i_min, i_max, points), I_pi, TDS, curve=family)
+    curve.flags.writeable = False
+    return curve
+
+
+# Curvas del par seleccionado, calculadas solo cuando se van a graficar
+def pair_curves(pair: Dict, points: int = CURVE_POINTS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    i_min, i_max = curve_range(pair["main_pickup"], pair["main_I_shc"])
+    I_shc_range = _current_range(i_min, i_max, points)
+    main_curve = inverse_time_curve(pair["main_pickup"], pair["main_tds"], i_min, i_max, points, pair["main_curve"])
+    backup_curve = inverse_time_curve(pair["backup_pickup"], pair["backup_tds"], i_min, i_max, points, pair["backup_curve"])
+    return I_shc_range, main_curve, backup_curve
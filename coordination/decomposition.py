@@ -0,0 +1,238 @@
+import argparse
+import json
+import logging
+import os
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from coordination import engine, lp_solver, optimizer
+from coordination.engine import CompiledPairs
+from coordination.optimizer import OptimizationProblem
+from coordination.short_circuit import ShortCircuitIndex, build_index
+
+logger = logging.getLogger(__name__)
+
+# Descomposición por mallas: cada malla resuelve el LP de TDS (pickups fijos) de los relés que le pertenecen, con los
+# relés de otras mallas fijos en su valor actual (acoplamiento de frontera). Las mallas se resuelven en paralelo (Jacobi)
+# y se repite hasta que el TMT global y los TDS dejan de cambiar.
+MAX_ROUNDS = 50
+CONVERGENCE_TOL = 1e-6
+COUPLING = 1.0  # Peso de la holgura en pares con respaldo de otra malla (W_SLACK en los demás)
+COORDINATION_PATH = os.path.join(optimizer.DATA_DIR, "raw", "data_coordination_scenario_base.json")
+MESH_OUTPUT_PATH = os.path.join(optimizer.DATA_DIR, "processed", "data_relays_scenario_base_mesh_optimized.json")
+
+
+# Subproblema de una malla: pares compactos (solo sus relés), índice global de esos relés y cuáles optimiza
+@dataclass
+class MeshSubproblem:
+    mesh_id: str
+    compiled: CompiledPairs
+    relays: np.ndarray  # Índice global de cada relé local
+    owned: np.ndarray   # Máscara local: relés cuyo TDS decide esta malla
+    curve: Optional[np.ndarray] = None
+
+
+@dataclass
+class DecompositionResult:
+    tds: np.ndarray
+    pickup: np.ndarray
+    rounds: int
+    converged: bool
+    tmt: float
+    history: List[float] = field(default_factory=list)
+
+
+# Líneas de cada malla a partir de los recorridos de barras; cada tramo debe existir en la matriz de adyacencia
+def mesh_lines(meshes: Dict, adjacency: np.ndarray, line_nodes: Dict[frozenset, str]) -> Dict[str, List[str]]:
+    lines = {}
+    for mesh_id, mesh in meshes.items():
+        path = mesh["path"]
+        lines[mesh_id] = []
+        for a, b in zip(path[:-1], path[1:]):
+            if not adjacency[a - 1, b - 1]:
+                raise ValueError(f"La malla {mesh_id} recorre las barras {a}-{b}, que no son adyacentes")
+            line = line_nodes.get(frozenset((a, b)))
+            if line is not None and line not in lines[mesh_id]:
+                lines[mesh_id].append(line)
+    return lines
+
+
+# Asignar las líneas que no pertenecen a ninguna malla (ramales radiales) a la malla más cercana por la adyacencia
+def assign_radial_lines(lines: Dict[str, List[str]], adjacency: np.ndarray, line_nodes: Dict[frozenset, str]) -> Dict[str, List[str]]:
+    bus_mesh = {}
+    for mesh_id, mesh_line_names in lines.items():
+        for line in mesh_line_names:
+            for bus in next(nodes for nodes, name in line_nodes.items() if name == line):
+                bus_mesh.setdefault(bus, mesh_id)
+    assigned = {line for mesh_line_names in lines.values() for line in mesh_line_names}
+    for nodes, line in line_nodes.items():
+        if line in assigned:
+            continue
+        queue, seen = deque(nodes), set(nodes)
+        while queue:
+            bus = queue.popleft()
+            if bus in bus_mesh:
+                lines[bus_mesh[bus]].append(line)
+                break
+            for neighbor in np.flatnonzero(adjacency[bus - 1]) + 1:
+                if neighbor not in seen:
+                    seen.add(int(neighbor))
+                    queue.append(int(neighbor))
+        else:
+            raise ValueError(f"La línea {line} no está conectada a ninguna malla")
+    return lines
+
+
+# Pares compactos: solo los pares indicados y los relés que aparecen en ellos
+def _subset(compiled: CompiledPairs, pairs: np.ndarray) -> Tuple[CompiledPairs, np.ndarray]:
+    relays, local = np.unique(np.r_[compiled.main_idx[pairs], compiled.backup_idx[pairs]], return_inverse=True)
+    names = [compiled.relays[r] for r in relays]
+    sub = CompiledPairs(
+        relays=names,
+        relay_index={relay: r for r, relay in enumerate(names)},
+        lines=[compiled.lines[p] for p in pairs],
+        scenarios=[compiled.scenarios[p] for p in pairs],
+        backup_lines=[compiled.backup_lines[p] for p in pairs],
+        main_idx=local[:len(pairs)],
+        backup_idx=local[len(pairs):],
+        I_shc_main=compiled.I_shc_main[pairs],
+        I_shc_backup=compiled.I_shc_backup[pairs],
+        I_bus_main=compiled.I_bus_main[pairs],
+        I_bus_backup=compiled.I_bus_backup[pairs],
+    )
+    return sub, relays
+
+
+# Cada relé pertenece a una sola malla: la más pequeña (en pares) entre las que lo contienen; el subproblema de una malla
+# son todos los pares que tocan alguno de sus relés
+def build_subproblems(problem: OptimizationProblem, lines: Dict[str, List[str]]) -> List[MeshSubproblem]:
+    compiled = problem.compiled
+    mesh_ids = list(lines)
+    in_mesh = np.array([[line in set(lines[mesh_id]) for line in compiled.lines] for mesh_id in mesh_ids])
+    counts = in_mesh.sum(axis=1)
+    owner = np.full(compiled.n_relays, -1)
+    for m in np.argsort(counts, kind="stable")[::-1]:
+        pairs = np.flatnonzero(in_mesh[m])
+        owner[np.r_[compiled.main_idx[pairs], compiled.backup_idx[pairs]]] = m
+
+    subproblems = []
+    for m, mesh_id in enumerate(mesh_ids):
+        pairs = np.flatnonzero((owner[compiled.main_idx] == m) | (owner[compiled.backup_idx] == m))
+        if len(pairs) == 0:
+            continue
+        sub, relays = _subset(compiled, pairs)
+        curve = None if problem.curve is None else problem.curve[relays]
+        subproblems.append(MeshSubproblem(mesh_id=mesh_id, compiled=sub, relays=relays, owned=owner[relays] == m, curve=curve))
+    return subproblems
+
+
+# Estado de cada proceso del pool: subproblemas y pickups se envían una sola vez
+_worker = {}
+
+
+def _init_worker(subproblems: List[MeshSubproblem], pickup: np.ndarray, coupling: float) -> None:
+    _worker.update(subproblems=subproblems, pickup=pickup, coupling=coupling)
+
+
+# LP de una malla con los relés ajenos fijos en su valor actual; devuelve los TDS de los relés propios.
+# Un par cuyo respaldo es ajeno se descoordina con holgura barata (coupling): la malla dueña del respaldo
+# lo corrige en la ronda siguiente, así las subidas de TDS se propagan de una malla a otra.
+def _solve_mesh(s: int, tds_local: np.ndarray) -> np.ndarray:
+    sub = _worker["subproblems"][s]
+    pickup = _worker["pickup"][sub.relays]
+    compiled = sub.compiled
+    R = compiled.n_relays
+    c, A_ub, b_ub, bounds = lp_solver.build_lp(compiled, pickup, sub.curve)
+    c[R:][~sub.owned[compiled.backup_idx]] = _worker["coupling"]
+    lp_solver.fix_tds(bounds, np.flatnonzero(~sub.owned), tds_local)
+    result = lp_solver.solve_lp(compiled, pickup, sub.curve, c, A_ub, b_ub, bounds)
+    return result.tds[sub.owned]
+
+
+def optimize(problem: OptimizationProblem, subproblems: List[MeshSubproblem], tds: np.ndarray, pickup: np.ndarray,
+             workers: int = 1, max_rounds: int = MAX_ROUNDS, coupling: float = COUPLING,
+             tol: float = CONVERGENCE_TOL) -> DecompositionResult:
+    tds = np.clip(np.asarray(tds, dtype=float), engine.MIN_TDS, engine.MAX_TDS)
+    pickup = np.asarray(pickup, dtype=float)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(subproblems, pickup, coupling)) if workers > 1 else None
+    if pool is None:
+        _init_worker(subproblems, pickup, coupling)
+
+    history, converged, rounds = [], False, 0
+    tmt = engine.evaluate(problem.compiled, tds, pickup, problem.curve).tmt
+    try:
+        for rounds in range(1, max_rounds + 1):
+            if pool is None:
+                solutions = [_solve_mesh(s, tds[sub.relays]) for s, sub in enumerate(subproblems)]
+            else:
+                futures = [pool.submit(_solve_mesh, s, tds[sub.relays]) for s, sub in enumerate(subproblems)]
+                solutions = [future.result() for future in futures]
+            new_tds = tds.copy()
+            for sub, solution in zip(subproblems, solutions):
+                new_tds[sub.relays[sub.owned]] = solution
+            new_tmt = engine.evaluate(problem.compiled, new_tds, pickup, problem.curve).tmt
+            change = float(np.abs(new_tds - tds).max())
+            history.append(new_tmt)
+            logger.info(f"Ronda {rounds}: TMT={new_tmt:.4f}, ΔTDS máx={change:.6f}")
+            converged = abs(new_tmt - tmt) < tol and change < tol
+            tds, tmt = new_tds, new_tmt
+            if converged:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return DecompositionResult(tds=tds, pickup=pickup, rounds=rounds, converged=converged, tmt=tmt, history=history)
+
+
+def optimize_relay_settings(relay_data: Dict, relay_pairs: Dict, short_circuit_data: Dict, coordination_data: Dict,
+                            workers: int = 1, max_rounds: int = MAX_ROUNDS) -> Dict[str, Dict[str, float]]:
+    index = short_circuit_data if isinstance(short_circuit_data, ShortCircuitIndex) else build_index(short_circuit_data)
+    relay_values = relay_data["relay_values"]
+    problem = optimizer.build_problem(relay_pairs, index)
+    problem.curve = engine.curve_codes(problem.compiled, relay_values)
+
+    adjacency = np.asarray(coordination_data["adjacency_matrix"])
+    line_nodes = {frozenset(pair_data["nodes"]): line for line, pair_data in relay_pairs.items()}
+    lines = assign_radial_lines(mesh_lines(coordination_data["meshes"], adjacency, line_nodes), adjacency, line_nodes)
+    subproblems = build_subproblems(problem, lines)
+    for sub in subproblems:
+        logger.info(f"{sub.mesh_id}: {int(sub.owned.sum())} relés propios, {sub.compiled.n_relays} relés, "
+                    f"{sub.compiled.n_pairs} pares")
+
+    tds, pickup = engine.settings_arrays(problem.compiled, relay_values)
+    result = optimize(problem, subproblems, tds, pickup, workers, max_rounds)
+    if not result.converged:
+        logger.warning(f"La descomposición no convergió en {result.rounds} rondas (TMT={result.tmt:.4f})")
+    return optimizer.settings_dict(relay_values, optimizer._all_relays(relay_pairs), problem, result.tds, result.pickup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimiza los TDS por mallas en paralelo y reconcilia los relés de frontera")
+    parser.add_argument("--relays", default=optimizer.RELAY_DATA_PATH, help="Archivo de ajustes iniciales (relay_values)")
+    parser.add_argument("--pairs", default=optimizer.RELAY_PAIRS_PATH, help="Archivo relay_pairs.json")
+    parser.add_argument("--short-circuit", default=optimizer.SHORT_CIRCUIT_PATH, help="Archivo de corrientes de cortocircuito")
+    parser.add_argument("--coordination", default=COORDINATION_PATH, help="Archivo con meshes y adjacency_matrix")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para resolver las mallas en paralelo")
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS, help="Rondas máximas de reconciliación")
+    parser.add_argument("--output", default=MESH_OUTPUT_PATH, help="Archivo de salida")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    relay_data = optimizer.load_json_file(args.relays)
+    optimized_relay_values = optimize_relay_settings(
+        relay_data, optimizer.load_json_file(args.pairs), optimizer.load_json_file(args.short_circuit),
+        optimizer.load_json_file(args.coordination), args.workers, args.max_rounds)
+    optimized_data = {
+        "scenario_id": relay_data.get("scenario_id", "scenario_1"),
+        "optimized_relay_values": optimized_relay_values
+    }
+    with open(args.output, 'w') as file:
+        json.dump(optimized_data, file, indent=4)
+    logger.info(f"Archivo optimizado guardado en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+from coordination.families import CURVE_PARAMS, DEFAULT_CURVE, DEFAULT_CODE, curve_code
+from coordination.pair_table import PairTable
+from coordination.short_circuit import ShortCircuitIndex, build_index
+
+# Constantes según la norma IEC 60255-151 para curva SI (las demás familias están en coordination.families)
+K = 0.14
+N = 0.02
+CTI = 0.2  # Intervalo de tiempo de coordinación típico (en segundos)
+MAX_TIME = 10.0  # Tiempo máximo razonable para evitar infinitos
+MIN_TDS = 0.05
+MAX_TDS = 10.0
+MIN_PICKUP = 0.01
+
+# Pesos de la función objetivo OF = T_total + w_k·ΣMT² + w_pickup·Σ|ΔI_pi|
+W_K = 1.0
+W_PICKUP = 0.5
+
+
+# Pares principal/respaldo compilados en arreglos planos (un elemento por par)
+@dataclass
+class CompiledPairs:
+    relays: List[str]
+    relay_index: Dict[str, int]
+    lines: List[str]
+    scenarios: List[str]
+    backup_lines: List[str]
+    main_idx: np.ndarray
+    backup_idx: np.ndarray
+    I_shc_main: np.ndarray
+    I_shc_backup: np.ndarray
+    I_bus_main: np.ndarray    # P×2 (bus1, bus2)
+    I_bus_backup: np.ndarray  # P×2 (bus1, bus2)
+
+    @property
+    def n_pairs(self) -> int:
+        return len(self.main_idx)
+
+    @property
+    def n_relays(self) -> int:
+        return len(self.relays)
+
+    def main_relay(self, p: int) -> str:
+        return self.relays[self.main_idx[p]]
+
+    def backup_relay(self, p: int) -> str:
+        return self.relays[self.backup_idx[p]]
+
+
+# Resultado de evaluar todos los pares con un vector de ajustes
+@dataclass
+class CoordinationResult:
+    t_m: np.ndarray
+    t_b: np.ndarray
+    delta_t: np.ndarray
+    MT: np.ndarray
+    coordinated: np.ndarray
+    tmt: float
+
+    @property
+    def total_pairs(self) -> int:
+        return len(self.MT)
+
+
+# Resultado de evaluar K vectores candidatos de ajustes a la vez
+@dataclass
+class BatchResult:
+    tmt: np.ndarray
+    of: np.ndarray
+    total_time: np.ndarray
+    pickup_diff: np.ndarray
+    MT: Optional[np.ndarray] = None
+
+
+# Valor y gradiente exacto de OF respecto a TDS y pickup de cada relé
+@dataclass
+class GradientResult:
+    of: float
+    grad_tds: np.ndarray
+    grad_pickup: np.ndarray
+    active: np.ndarray
+    jacobian: Optional[object] = None
+
+
+# Compilar relay_pairs + índice de cortocircuito una sola vez en arreglos
+def compile_pairs(relay_pairs: Dict, short_circuit: Union[ShortCircuitIndex, Dict]) -> CompiledPairs:
+    index = short_circuit if isinstance(short_circuit, ShortCircuitIndex) else build_index(short_circuit)
+    index.require(relay_pairs)
+
+    relays, relay_index = [], {}
+    lines, scenarios, backup_lines = [], [], []
+    main_idx, backup_idx, I_shc_main, I_shc_backup = [], [], [], []
+    I_bus_main, I_bus_backup = [], []
+
+    def index_of(relay):
+        if relay not in relay_index:
+            relay_index[relay] = len(relays)
+            relays.append(relay)
+        return relay_index[relay]
+
+    for line, pair_data in relay_pairs.items():
+        for scenario, config in pair_data["scenarios"].items():
+            main_relay = config["main"]["relay"]
+            i_main = index.current(line, scenario, main_relay)
+            bus_main = index.bus_current(line, scenario, main_relay)
+            for backup in config["backups"]:
+                lines.append(line)
+                scenarios.append(scenario)
+                backup_lines.append(backup["line"])
+                main_idx.append(index_of(main_relay))
+                backup_idx.append(index_of(backup["relay"]))
+                I_shc_main.append(i_main)
+                I_shc_backup.append(index.current(line, scenario, backup["relay"]))
+                I_bus_main.append(bus_main)
+                I_bus_backup.append(index.bus_current(line, scenario, backup["relay"]))
+
+    return CompiledPairs(
+        relays=relays,
+        relay_index=relay_index,
+        lines=lines,
+        scenarios=scenarios,
+        backup_lines=backup_lines,
+        main_idx=np.array(main_idx, dtype=np.intp),
+        backup_idx=np.array(backup_idx, dtype=np.intp),
+        I_shc_main=np.array(I_shc_main, dtype=float),
+        I_shc_backup=np.array(I_shc_backup, dtype=float),
+        I_bus_main=np.array(I_bus_main, dtype=float).reshape(-1, 2),
+        I_bus_backup=np.array(I_bus_backup, dtype=float).reshape(-1, 2),
+    )
+
+
+# Vectores TDS/pickup por índice de relé a partir de "relay_values" u "optimized_relay_values"
+def settings_arrays(compiled: CompiledPairs, relay_values: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    tds = np.array([relay_values[relay]["TDS"] for relay in compiled.relays], dtype=float)
+    pickup = np.array([relay_values[relay]["pickup"] for relay in compiled.relays], dtype=float)
+    return tds, pickup
+
+
+# Códigos de familia de curva por índice de relé ("curve" en relay_values; IEC SI si no se declara)
+def curve_codes(compiled: CompiledPairs, relay_values: Dict) -> np.ndarray:
+    return np.array([curve_code(relay_values[relay].get("curve", DEFAULT_CURVE)) for relay in compiled.relays], dtype=np.int8)
+
+
+def _broadcast(I_shc, I_pi, TDS, curve):
+    arrays = [np.asarray(I_shc, dtype=float), np.asarray(I_pi, dtype=float), np.asarray(TDS, dtype=float)]
+    if curve is not None:
+        arrays.append(np.asarray(curve))
+    return np.broadcast_arrays(*arrays)
+
+
+# Núcleo de una familia: t = TDS·(A/(M^p - 1) + B); MAX_TIME si I_pi/I_shc <= 0 o M <= 1
+def _family_time(I_shc, I_pi, TDS, A, p, B, max_time):
+    valid = (I_pi > 0) & (I_shc > 0)
+    M = np.divide(I_shc, I_pi, out=np.zeros(I_shc.shape), where=valid)
+    valid &= M > 1
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        time = (A / (np.power(M, p, out=np.full(M.shape, 2.0), where=valid) - 1) + B) * TDS
+    return np.where(valid, np.minimum(time, max_time), max_time)
+
+
+# Tiempo y derivadas ∂t/∂TDS, ∂t/∂I_pi de una familia; las derivadas son 0 donde el tiempo está recortado
+def _family_derivatives(I_shc, I_pi, TDS, A, p, B, max_time):
+    valid = (I_pi > 0) & (I_shc > 0)
+    M = np.divide(I_shc, I_pi, out=np.zeros(I_shc.shape), where=valid)
+    valid &= M > 1
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        MN = np.power(M, p, out=np.full(M.shape, 2.0), where=valid)
+        unit_time = A / (MN - 1) + B
+        time = np.where(valid, np.minimum(unit_time * TDS, max_time), max_time)
+        active = valid & (unit_time * TDS < max_time)
+        d_tds = np.where(active, unit_time, 0.0)
+        # dM/dI_pi = -M/I_pi  =>  ∂t/∂I_pi = TDS·A·p·M^p / (I_pi·(M^p - 1)²)
+        d_pickup = np.where(active, TDS * A * p * MN / (I_pi * np.square(MN - 1)), 0.0)
+    return time, d_tds, d_pickup, active
+
+
+# Despacho agrupado: un núcleo vectorizado por familia presente, sin ramas por par
+def _dispatch(kernel, n_out, I_shc, I_pi, TDS, curve, max_time):
+    if curve is None:
+        return kernel(I_shc, I_pi, TDS, *CURVE_PARAMS[DEFAULT_CODE], max_time)
+    outputs = [np.empty(I_shc.shape, dtype=bool if k == 3 else float) for k in range(n_out)]
+    for code in np.unique(curve):
+        sel = curve == code
+        results = kernel(I_shc[sel], I_pi[sel], TDS[sel], *CURVE_PARAMS[code], max_time)
+        for out, result in zip(outputs, results if n_out > 1 else (results,)):
+            out[sel] = result
+    return outputs[0] if n_out == 1 else tuple(outputs)
+
+
+# Tiempo de operación vectorizado; curve (códigos de familia, difundible con I_shc) por defecto IEC SI
+def operation_time(I_shc, I_pi, TDS, max_time: float = MAX_TIME, curve=None) -> np.ndarray:
+    I_shc, I_pi, TDS, *rest = _broadcast(I_shc, I_pi, TDS, curve)
+    return _dispatch(_family_time, 1, I_shc, I_pi, TDS, rest[0] if rest else None, max_time)
+
+
+# Tiempo y derivadas ∂t/∂TDS, ∂t/∂I_pi; las derivadas son 0 donde el tiempo está recortado (MAX_TIME, M <= 1)
+def operation_time_derivatives(I_shc, I_pi, TDS, max_time: float = MAX_TIME, curve=None):
+    I_shc, I_pi, TDS, *rest = _broadcast(I_shc, I_pi, TDS, curve)
+    return _dispatch(_family_derivatives, 4, I_shc, I_pi, TDS, rest[0] if rest else None, max_time)
+
+
+# Códigos de familia de los relés seleccionados (None se mantiene: todo IEC SI)
+def _select(curve: Optional[np.ndarray], idx) -> Optional[np.ndarray]:
+    return None if curve is None else curve[idx]
+
+
+# Evaluar t_m, t_b, Δt, MT y TMT de todos los pares en una sola pasada
+def evaluate(compiled: CompiledPairs, tds: np.ndarray, pickup: np.ndarray,
+             curve: Optional[np.ndarray] = None) -> CoordinationResult:
+    t_m = operation_time(compiled.I_shc_main, pickup[compiled.main_idx], tds[compiled.main_idx], curve=_select(curve, compiled.main_idx))
+    t_b = operation_time(compiled.I_shc_backup, pickup[compiled.backup_idx], tds[compiled.backup_idx], curve=_select(curve, compiled.backup_idx))
+    delta_t = t_b - t_m - CTI
+    finite = np.isfinite(delta_t)
+    MT = np.where(finite, np.minimum(delta_t, 0.0), 0.0)
+    coordinated = finite & (delta_t >= 0)
+    return CoordinationResult(t_m=t_m, t_b=t_b, delta_t=delta_t, MT=MT, coordinated=coordinated, tmt=float(MT.sum()))
+
+
+# Evaluar K candidatos (matrices K×R de TDS y pickup) con broadcasting sobre los P pares; las curvas son fijas por relé
+def evaluate_batch(compiled: CompiledPairs, tds: np.ndarray, pickup: np.ndarray,
+                   w_k: float = W_K, w_pickup: float = W_PICKUP, return_mt: bool = False,
+                   curve: Optional[np.ndarray] = None) -> BatchResult:
+    tds = np.atleast_2d(np.asarray(tds, dtype=float))
+    pickup = np.atleast_2d(np.asarray(pickup, dtype=float))
+    if tds.shape != pickup.shape or tds.shape[1] != compiled.n_relays:
+        raise ValueError(f"Se esperaban matrices K×{compiled.n_relays} de TDS y pickup; recibido {tds.shape} y {pickup.shape}")
+
+    pickup_main = pickup[:, compiled.main_idx]
+    pickup_backup = pickup[:, compiled.backup_idx]
+    t_m = operation_time(compiled.I_shc_main, pickup_main, tds[:, compiled.main_idx], curve=_select(curve, compiled.main_idx))
+    t_b = operation_time(compiled.I_shc_backup, pickup_backup, tds[:, compiled.backup_idx], curve=_select(curve, compiled.backup_idx))
+    delta_t = t_b - t_m - CTI
+    MT = np.where(np.isfinite(delta_t), np.minimum(delta_t, 0.0), 0.0)
+
+    total_time = t_m.sum(axis=1)
+    pickup_diff = np.abs(pickup_main - pickup_backup).sum(axis=1)
+    of = total_time + w_k * np.square(MT).sum(axis=1) + w_pickup * pickup_diff
+    return BatchResult(tmt=MT.sum(axis=1), of=of, total_time=total_time, pickup_diff=pickup_diff, MT=MT if return_mt else None)
+
+
+# Gradiente vectorizado de OF = T_total + w_k·ΣMT² + w_pickup·Σ|ΔI_pi| y, opcionalmente, jacobiano disperso P×2R de MT
+# (columnas 0..R-1: TDS; R..2R-1: pickup). Los pares con tiempos recortados no aportan gradiente por ese relé.
+def objective_gradient(compiled: CompiledPairs, tds: np.ndarray, pickup: np.ndarray,
+                       w_k: float = W_K, w_pickup: float = W_PICKUP, jacobian: bool = False,
+                       curve: Optional[np.ndarray] = None) -> GradientResult:
+    R = compiled.n_relays
+    main, backup = compiled.main_idx, compiled.backup_idx
+    t_m, dm_tds, dm_pickup, active_m = operation_time_derivatives(compiled.I_shc_main, pickup[main], tds[main], curve=_select(curve, main))
+    t_b, db_tds, db_pickup, active_b = operation_time_derivatives(compiled.I_shc_backup, pickup[backup], tds[backup], curve=_select(curve, backup))
+    delta_t = t_b - t_m - CTI
+    negative = np.isfinite(delta_t) & (delta_t < 0)
+    MT = np.where(negative, delta_t, 0.0)
+    pickup_sign = np.sign(pickup[main] - pickup[backup])
+    of = float(t_m.sum() + w_k * np.square(MT).sum() + w_pickup * np.abs(pickup[main] - pickup[backup]).sum())
+
+    # ∂MT/∂x = ∂t_b/∂x - ∂t_m/∂x solo en pares con MT < 0
+    coef = 2 * w_k * MT
+    grad_tds = np.bincount(main, weights=dm_tds * (1 - coef), minlength=R) \
+        + np.bincount(backup, weights=db_tds * coef, minlength=R)
+    grad_pickup = np.bincount(main, weights=dm_pickup * (1 - coef) + w_pickup * pickup_sign, minlength=R) \
+        + np.bincount(backup, weights=db_pickup * coef - w_pickup * pickup_sign, minlength=R)
+
+    jac = None
+    if jacobian:
+        from scipy import sparse
+        P = compiled.n_pairs
+        rows = np.tile(np.arange(P), 4)
+        cols = np.concatenate([main, R + main, backup, R + backup])
+        vals = np.concatenate([-dm_tds, -dm_pickup, db_tds, db_pickup]) * np.tile(negative, 4)
+        jac = sparse.csr_matrix((vals, (rows, cols)), shape=(P, 2 * R))
+        jac.eliminate_zeros()
+    return GradientResult(of=of, grad_tds=grad_tds, grad_pickup=grad_pickup, active=active_m & active_b, jacobian=jac)
+
+
+# Análisis completo como tabla columnar con vistas de pares coordinados/descoordinados
+def analyze_coordination(relay_values: Dict, compiled: CompiledPairs):
+    tds, pickup = settings_arrays(compiled, relay_values)
+    curve = curve_codes(compiled, relay_values)
+    result = evaluate(compiled, tds, pickup, curve)
+    table = PairTable.from_result(compiled, tds, pickup, result, curve)
+    return table.coordinated(), table.uncoordinated(), result.tmt, result.total_pairs
+
+
+# MT por par (relé principal, relé de respaldo)
+def mt_by_relay_pair(compiled: CompiledPairs, result: CoordinationResult) -> Dict[Tuple[str, str], float]:
+    return {(compiled.main_relay(p), compiled.backup_relay(p)): float(result.MT[p]) for p in range(compiled.n_pairs)}
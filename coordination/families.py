@@ -0,0 +1,31 @@
+import numpy as np
+from typing import Dict, List
+
+# Familias de curvas de tiempo inverso con la forma común t = TDS·(A/(M^p - 1) + B):
+# IEC 60255-151 (B = 0) e IEEE C37.112
+CURVE_FAMILIES = {
+    "IEC_SI": (0.14, 0.02, 0.0),       # Standard Inverse
+    "IEC_VI": (13.5, 1.0, 0.0),        # Very Inverse
+    "IEC_EI": (80.0, 2.0, 0.0),        # Extremely Inverse
+    "IEC_LTI": (120.0, 1.0, 0.0),      # Long Time Inverse
+    "IEEE_MI": (0.0515, 0.02, 0.114),  # Moderately Inverse
+    "IEEE_VI": (19.61, 2.0, 0.491),    # Very Inverse
+    "IEEE_EI": (28.2, 2.0, 0.1217),    # Extremely Inverse
+}
+DEFAULT_CURVE = "IEC_SI"  # Curva asumida cuando el relé no declara "curve"
+
+# Código entero por familia (posición en CURVE_FAMILIES) y parámetros (A, p, B) por código
+CURVE_NAMES: List[str] = list(CURVE_FAMILIES)
+CURVE_CODES: Dict[str, int] = {name: code for code, name in enumerate(CURVE_NAMES)}
+CURVE_PARAMS = np.array(list(CURVE_FAMILIES.values()), dtype=float)
+DEFAULT_CODE = CURVE_CODES[DEFAULT_CURVE]
+
+
+def curve_code(name: str) -> int:
+    if name not in CURVE_CODES:
+        raise ValueError(f"Curva desconocida: {name}. Disponibles: {', '.join(CURVE_NAMES)}")
+    return CURVE_CODES[name]
+
+
+def curve_name(code: int) -> str:
+    return CURVE_NAMES[code]
@@ -0,0 +1,73 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from coordination import engine
+from coordination.engine import CompiledPairs
+
+# Posiciones interpoladas por defecto entre bus1 (x = 0) y bus2 (x = 1)
+DEFAULT_INTERPOLATED = 8
+
+
+# MT de cada par en cada posición de falla (matriz pares×posiciones) y su peor caso
+@dataclass
+class SweepResult:
+    positions: np.ndarray
+    MT: np.ndarray
+    worst_MT: np.ndarray
+    worst_index: np.ndarray
+
+    @property
+    def worst_position(self) -> np.ndarray:
+        return self.positions[self.worst_index]
+
+    @property
+    def tmt(self) -> float:
+        return float(self.worst_MT.sum())
+
+
+# Posiciones almacenadas (bus1, bus2) más n_interpolated puntos interiores, como fracción de la línea
+def fault_positions(n_interpolated: int = DEFAULT_INTERPOLATED) -> np.ndarray:
+    return np.linspace(0.0, 1.0, n_interpolated + 2)
+
+
+# Corriente en cada posición: I = V/(Zs + x·Zl), por lo que 1/I es lineal en x; si algún extremo es <= 0 se interpola I directamente
+def interpolate_currents(I_bus: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    I1, I2 = I_bus[:, :1], I_bus[:, 1:]
+    x = positions[None, :]
+    linear = I1 + x * (I2 - I1)
+    positive = (I1 > 0) & (I2 > 0)
+    with np.errstate(divide="ignore"):
+        harmonic = 1.0 / ((1 - x) / I1 + x / I2)
+    return np.where(positive, harmonic, linear)
+
+
+# Evaluar la coordinación de todos los pares en todas las posiciones en una sola pasada vectorizada
+def sweep(compiled: CompiledPairs, tds: np.ndarray, pickup: np.ndarray,
+          n_interpolated: int = DEFAULT_INTERPOLATED, curve: Optional[np.ndarray] = None) -> SweepResult:
+    positions = fault_positions(n_interpolated)
+    main, backup = compiled.main_idx, compiled.backup_idx
+    curve_m = None if curve is None else curve[main, None]
+    curve_b = None if curve is None else curve[backup, None]
+    t_m = engine.operation_time(interpolate_currents(compiled.I_bus_main, positions), pickup[main, None], tds[main, None], curve=curve_m)
+    t_b = engine.operation_time(interpolate_currents(compiled.I_bus_backup, positions), pickup[backup, None], tds[backup, None], curve=curve_b)
+    delta_t = t_b - t_m - engine.CTI
+    MT = np.where(np.isfinite(delta_t), np.minimum(delta_t, 0.0), 0.0)
+    worst_index = np.argmin(MT, axis=1)
+    worst_MT = MT[np.arange(len(MT)), worst_index]
+    return SweepResult(positions=positions, MT=MT, worst_MT=worst_MT, worst_index=worst_index)
+
+
+# Reporte por par del peor MT y la posición donde ocurre, ordenado del más descoordinado al menos
+def worst_case_records(compiled: CompiledPairs, result: SweepResult) -> List[Dict]:
+    order = np.argsort(result.worst_MT, kind="stable")
+    return [
+        {
+            "line": compiled.lines[p],
+            "scenario": compiled.scenarios[p],
+            "main_relay": compiled.main_relay(p),
+            "backup_relay": compiled.backup_relay(p),
+            "worst_MT": float(result.worst_MT[p]),
+            "position": float(result.positions[result.worst_index[p]]),
+        }
+        for p in order
+    ]
@@ -0,0 +1,267 @@
+import argparse
+import json
+import logging
+import re
+import sys
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Lectura incremental de data_coordination_scenario_*.json: results_by_line -> escenarios -> main/backups ->
+# coordination_history. El archivo se recorre por bloques y solo se decodifica un registro de historial a la vez;
+# el resto de las secciones (base_data, adjacency_matrix, ...) se saltan sin construirlas.
+CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_DELIMITERS = " \t\n\r,]}"
+_decoder = json.JSONDecoder()
+
+
+class HistoryRecord(NamedTuple):
+    line: str
+    scenario: str
+    relay: str
+    mesh_id: Optional[str]
+    iteration: Optional[int]
+    TDS: Optional[float]
+    Time_out: Optional[float]
+    pick_up: Optional[float]
+    timestamp: Optional[str]
+    role: str  # "main" o "backup"
+
+
+# Lector de tokens JSON sobre un archivo de texto con un búfer acotado (bloque actual más el valor en curso)
+class _Reader:
+    def __init__(self, file, chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _more(self) -> None:
+        if not self._fill():
+            raise ValueError("Fin inesperado del archivo JSON")
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            self._more()
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: se esperaba '{char}' y se encontró '{self.buffer[self.pos]}'")
+        self.pos += 1
+
+    def string(self) -> str:
+        self.peek()
+        while True:
+            match = _STRING.match(self.buffer, self.pos)
+            if match is not None:
+                self.pos = match.end()
+                return json.loads(match.group())
+            self._more()
+
+    # Valor completo (escalar o registro pequeño); se completa el búfer hasta poder decodificarlo
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # Un número al final del búfer puede estar cortado: se acepta solo si le sigue un delimitador
+                if (end < len(self.buffer) and self.buffer[end] in _DELIMITERS) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._more()
+
+    # Saltar un valor: cada elemento que cabe completo en el búfer se decodifica (escáner en C) y se descarta; en los
+    # que no caben se desciende un nivel y se siguen sus delimitadores
+    def skip(self) -> None:
+        depth = 0
+        while True:
+            char = self.peek()
+            if char in "]}":
+                self.pos += 1
+                depth -= 1
+            elif char in ",:":
+                self.pos += 1
+                continue
+            else:
+                try:
+                    _, end = _decoder.raw_decode(self.buffer, self.pos)
+                except ValueError:
+                    end = None
+                # Como en value(), un número cortado ("1." de "1.5") se decodifica en parte: se exige un delimitador
+                if end is not None and end < len(self.buffer) and self.buffer[end] in _DELIMITERS + ":":
+                    self.pos = end
+                elif char in "[{":
+                    self.pos += 1
+                    depth += 1
+                    continue
+                elif self._fill():
+                    # Escalar que llega al final del búfer (puede estar cortado)
+                    continue
+                elif end is not None:
+                    self.pos = end
+                else:
+                    raise ValueError("Fin inesperado del archivo JSON")
+            if depth == 0:
+                return
+
+    # Claves de un objeto; quien itera debe consumir (value/skip/...) el valor de cada clave
+    def members(self) -> Iterator[str]:
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.string()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"JSON inválido: se esperaba ',' o '}}' y se encontró '{char}'")
+
+    # Elementos de un arreglo; quien itera debe consumir cada elemento
+    def items(self) -> Iterator[None]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"JSON inválido: se esperaba ',' o ']' y se encontró '{char}'")
+
+
+def _record(line: str, scenario: str, relay: str, role: str, record: Dict) -> HistoryRecord:
+    return HistoryRecord(line=line, scenario=scenario, relay=relay, mesh_id=record.get("mesh_id"),
+                         iteration=record.get("iteration"), TDS=record.get("TDS"), Time_out=record.get("Time_out"),
+                         pick_up=record.get("pick_up"), timestamp=record.get("timestamp"), role=role)
+
+
+# Registros de una entrada main/backup. Si "relay" aparece después del historial, los registros de esa entrada se
+# retienen hasta conocerlo; con el orden de los archivos exportados se filtran al vuelo.
+def _entry(reader: _Reader, line: str, scenario: str, role: str, relays: Optional[Set[str]],
+           meshes: Optional[Set[str]]) -> Iterator[HistoryRecord]:
+    relay, pending = None, []
+    for key in reader.members():
+        if key == "relay":
+            relay = reader.value()
+        elif key == "coordination_history":
+            if relay is not None and relays is not None and relay not in relays:
+                reader.skip()
+                continue
+            for _ in reader.items():
+                record = reader.value()
+                if meshes is not None and record.get("mesh_id") not in meshes:
+                    continue
+                if relay is None:
+                    pending.append(record)
+                else:
+                    yield _record(line, scenario, relay, role, record)
+        else:
+            reader.skip()
+    if pending and (relays is None or relay in relays):
+        for record in pending:
+            yield _record(line, scenario, relay, role, record)
+
+
+# Recorrer el historial de coordinación de un archivo con memoria acotada, filtrando por relé, malla o línea
+# durante la lectura. Si se pasa metadata, se completa con los escalares del primer nivel (scenario_id, timestamp);
+# pueden estar después de results_by_line, así que solo están completos al agotar el iterador.
+def iter_history(path: str, relays: Optional[Iterable[str]] = None, meshes: Optional[Iterable[str]] = None,
+                 lines: Optional[Iterable[str]] = None, chunk_size: int = CHUNK_SIZE,
+                 metadata: Optional[Dict] = None) -> Iterator[HistoryRecord]:
+    relays = set(relays) if relays is not None else None
+    meshes = set(meshes) if meshes is not None else None
+    lines = set(lines) if lines is not None else None
+    found = False
+    with open(path, 'r', encoding="utf-8") as file:
+        reader = _Reader(file, chunk_size)
+        for key in reader.members():
+            if key != "results_by_line":
+                if metadata is not None and reader.peek() not in "[{":
+                    metadata[key] = reader.value()
+                else:
+                    reader.skip()
+                continue
+            found = True
+            for line in reader.members():
+                if lines is not None and line not in lines:
+                    reader.skip()
+                    continue
+                for line_key in reader.members():
+                    if line_key != "scenarios":
+                        reader.skip()
+                        continue
+                    for scenario in reader.members():
+                        for role in reader.members():
+                            if role == "main":
+                                yield from _entry(reader, line, scenario, "main", relays, meshes)
+                            elif role == "backups":
+                                for _ in reader.items():
+                                    yield from _entry(reader, line, scenario, "backup", relays, meshes)
+                            else:
+                                reader.skip()
+    if not found:
+        raise ValueError(f"{path} no contiene results_by_line")
+
+
+# Mismos registros a partir de un documento ya cargado en memoria
+def history_records(coordination_data: Dict) -> Iterator[HistoryRecord]:
+    for line, line_data in coordination_data["results_by_line"].items():
+        for scenario, config in line_data["scenarios"].items():
+            entries = [("main", config["main"])] + [("backup", backup) for backup in config.get("backups", [])]
+            for role, entry in entries:
+                for record in entry.get("coordination_history", []):
+                    yield _record(line, scenario, entry["relay"], role, record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leer el historial de coordinación por bloques, con filtros por relé o malla")
+    parser.add_argument("--file", default="data/raw/data_coordination_scenario_base.json", help="Archivo de coordinación")
+    parser.add_argument("--relay", nargs="+", help="Solo estos relés")
+    parser.add_argument("--mesh", nargs="+", help="Solo estas mallas (mesh_id)")
+    parser.add_argument("--line", nargs="+", help="Solo estas líneas")
+    parser.add_argument("--output", help="Archivo JSONL de salida (por defecto, la salida estándar)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    count = 0
+    try:
+        for record in iter_history(args.file, args.relay, args.mesh, args.line):
+            output.write(json.dumps(record._asdict()) + "\n")
+            count += 1
+    finally:
+        if args.output:
+            output.close()
+    logger.info(f"{count} registros de historial")
+
+
+if __name__ == "__main__":
+    main()
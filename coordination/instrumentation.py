@@ -0,0 +1,186 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import numpy as np
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Fases del optimizador iterativo: tiempos de operación y MT (evaluate), TMT/OF (objective), pasos x·factor + offset
+# (update) y recorte a MIN_TDS/MAX_TDS/0.9·I_shc (clamp)
+PHASES = ("evaluate", "objective", "update", "clamp")
+TOP_RELAYS = 20  # Relés listados en el resumen (más oscilantes, más veces en un límite)
+PROFILE_LINES = 40
+
+
+# Métricas de una iteración; los relés en límites son índices de relé
+@dataclass
+class IterationStats:
+    iteration: int
+    timings: Dict[str, float]
+    evaluations: int
+    tmt: float
+    of: float
+    uncoordinated: int
+    sign_changes: int  # Pares que pasaron de coordinados a descoordinados o al revés respecto a la iteración anterior
+    at_min_tds: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.intp))
+    at_max_tds: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.intp))
+    at_pickup_max: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.intp))
+    wall_time: float = 0.0
+
+    def record(self) -> Dict:
+        return {
+            "iteration": self.iteration,
+            "timings": self.timings,
+            "evaluations": self.evaluations,
+            "tmt": self.tmt,
+            "of": self.of,
+            "uncoordinated": self.uncoordinated,
+            "sign_changes": self.sign_changes,
+            "at_min_tds": int(len(self.at_min_tds)),
+            "at_max_tds": int(len(self.at_max_tds)),
+            "at_pickup_max": int(len(self.at_pickup_max)),
+            "wall_time": self.wall_time,
+        }
+
+
+# Instrumentación opcional del optimizador: tiempos por fase, conteo de evaluaciones, cambios de signo de MT,
+# relés en los límites y relés que oscilan (su TDS cambia de dirección entre iteraciones). callbacks(stats) se
+# llaman al final de cada iteración.
+class Instrumentation:
+    def __init__(self, callbacks: Sequence[Callable[[IterationStats], None]] = (), relays: Optional[List[str]] = None):
+        self.callbacks = list(callbacks)
+        self.relays = relays
+        self.history: List[IterationStats] = []
+        self.totals = {phase: 0.0 for phase in PHASES}
+        self.evaluations = 0
+        self._evaluations = 0
+        self._timings: Dict[str, float] = {}
+        self._bounds: Dict[str, List[np.ndarray]] = {}
+        self._iteration = 0
+        self._started = 0.0
+        self._previous_negative = None
+        self._previous_tds = None
+        self._previous_direction = None
+        self.flips = None
+        self.bound_hits = None
+
+    def begin(self, iteration: int) -> None:
+        self._iteration = iteration
+        self._timings = {}
+        self._bounds = {"min_tds": [], "max_tds": [], "pickup_max": []}
+        self._evaluations = 0
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._timings[name] = self._timings.get(name, 0.0) + elapsed
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+
+    def evaluated(self, count: int = 1) -> None:
+        self._evaluations += count
+        self.evaluations += count
+
+    # Relés r de una ronda de pasos cuyo valor sin recortar quedó en un límite o fuera de él
+    def clamped(self, relays: np.ndarray, at_min_tds: np.ndarray, at_max_tds: np.ndarray, at_pickup_max: np.ndarray) -> None:
+        self._bounds["min_tds"].append(relays[at_min_tds])
+        self._bounds["max_tds"].append(relays[at_max_tds])
+        self._bounds["pickup_max"].append(relays[at_pickup_max])
+
+    def end(self, tmt: float, of: float, mt: Optional[np.ndarray] = None, tds: Optional[np.ndarray] = None) -> IterationStats:
+        sign_changes = uncoordinated = 0
+        if mt is not None:
+            negative = mt < 0
+            uncoordinated = int(negative.sum())
+            if self._previous_negative is not None:
+                sign_changes = int((negative != self._previous_negative).sum())
+            self._previous_negative = negative
+        if tds is not None:
+            if self.flips is None:
+                self.flips = np.zeros(len(tds), dtype=np.int64)
+                self.bound_hits = np.zeros(len(tds), dtype=np.int64)
+            if self._previous_tds is not None:
+                # Dirección del último cambio de cada relé; un relé que no cambia conserva la anterior
+                direction = np.sign(tds - self._previous_tds)
+                if self._previous_direction is not None:
+                    self.flips += (direction * self._previous_direction) < 0
+                    direction = np.where(direction != 0, direction, self._previous_direction)
+                self._previous_direction = direction
+            self._previous_tds = tds.copy()
+
+        bounds = {name: np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+                  for name, parts in self._bounds.items()}
+        if self.bound_hits is not None:
+            for hits in bounds.values():
+                self.bound_hits[hits] += 1
+        stats = IterationStats(
+            iteration=self._iteration, timings=dict(self._timings), evaluations=self._evaluations, tmt=float(tmt),
+            of=float(of), uncoordinated=uncoordinated, sign_changes=sign_changes, at_min_tds=bounds["min_tds"],
+            at_max_tds=bounds["max_tds"], at_pickup_max=bounds["pickup_max"], wall_time=time.perf_counter() - self._started,
+        )
+        self.history.append(stats)
+        for callback in self.callbacks:
+            callback(stats)
+        return stats
+
+    def _top(self, counts: Optional[np.ndarray], top: int) -> List[Dict]:
+        if counts is None:
+            return []
+        order = np.argsort(-counts, kind="stable")[:top]
+        name = (lambda r: self.relays[r]) if self.relays is not None else int
+        return [{"relay": name(r), "count": int(counts[r])} for r in order if counts[r] > 0]
+
+    def summary(self, top: int = TOP_RELAYS) -> Dict:
+        wall = sum(stats.wall_time for stats in self.history)
+        return {
+            "iterations": len(self.history),
+            "evaluations": self.evaluations,
+            "wall_time": wall,
+            "phase_time": self.totals,
+            # Tiempo fuera de las fases medidas (registro, verificación de convergencia, etc.)
+            "bookkeeping_time": max(wall - sum(self.totals.values()), 0.0),
+            "last_tmt": self.history[-1].tmt if self.history else None,
+            "oscillating_relays": self._top(self.flips, top),
+            "relays_at_bounds": self._top(self.bound_hits, top),
+        }
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump({"summary": self.summary(), "iterations": [stats.record() for stats in self.history]}, file, indent=4)
+        logger.info(f"Reporte de instrumentación guardado en: {path}")
+
+
+# Fase sin medición cuando no hay instrumentación
+def phase(instrumentation: Optional[Instrumentation], name: str):
+    return nullcontext() if instrumentation is None else instrumentation.phase(name)
+
+
+# Ruta de un reporte junto al JSON de salida: <salida sin extensión><suffix>
+def report_path(output_path: str, suffix: str) -> str:
+    return os.path.splitext(output_path)[0] + suffix
+
+
+# Ejecutar fn bajo cProfile y escribir el reporte (texto ordenado por tiempo acumulado) y el perfil binario (.prof).
+# El directorio de salida se crea antes de la corrida para no perderla al escribir el perfil.
+def profile_call(fn: Callable, output_path: str, lines: int = PROFILE_LINES):
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn)
+    profiler.dump_stats(report_path(output_path, ".prof"))
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(lines)
+    with open(report_path(output_path, ".profile.txt"), "w") as file:
+        file.write(buffer.getvalue())
+    logger.info(f"Perfil guardado en: {report_path(output_path, '.profile.txt')}")
+    return result
@@ -0,0 +1,142 @@
+import logging
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+from scipy import sparse
+from scipy.optimize import linprog
+from coordination import engine
+from coordination.engine import CompiledPairs, CoordinationResult
+from coordination.optimizer import OptimizationProblem
+
+logger = logging.getLogger(__name__)
+
+# Con pickups fijos t = TDS·u(I_shc, I_pi), lineal en TDS. Se resuelve
+#   min Σ t_m + W_SLACK·Σ s_p   s.a.   t_b - t_m + s_p >= CTI + CTI_MARGIN,  s_p >= 0,  MIN_TDS <= TDS <= TDS_max
+# La holgura s_p mantiene el problema factible aunque algún par no pueda coordinarse (s_p > 0 ≈ -MT).
+W_SLACK = 1000.0
+CTI_MARGIN = 1e-3  # Margen sobre CTI para que el redondeo a 5 decimales y la tolerancia del solver no dejen MT < 0
+PICKUP_STEP = (1.02, 0.98)  # Factores del lazo externo de pickup (respaldo, principal) en pares descoordinados
+
+
+# Resultado del LP: TDS óptimos, holgura por par y evaluación con el motor
+@dataclass
+class LPResult:
+    tds: np.ndarray
+    pickup: np.ndarray
+    slack: np.ndarray
+    objective: float
+    status: int
+    message: str
+    evaluation: CoordinationResult
+    pickup_iterations: int = 0
+
+    @property
+    def total_slack(self) -> float:
+        return float(self.slack.sum())
+
+
+# Tiempo por unidad de TDS de cada par (curvas por relé); inf donde el relé no opera (M <= 1, pickup inválido)
+def unit_times(compiled: CompiledPairs, pickup: np.ndarray, curve: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    main, backup = compiled.main_idx, compiled.backup_idx
+    u_m = engine.operation_time(compiled.I_shc_main, pickup[main], 1.0, max_time=np.inf,
+                                curve=None if curve is None else curve[main])
+    u_b = engine.operation_time(compiled.I_shc_backup, pickup[backup], 1.0, max_time=np.inf,
+                                curve=None if curve is None else curve[backup])
+    return u_m, u_b
+
+
+# Construir el LP disperso (variables: R TDS seguidos de P holguras) a partir de los pares compilados;
+# pair_weights pondera el tiempo del principal de cada par en el objetivo (p. ej. peso del escenario)
+def build_lp(compiled: CompiledPairs, pickup: np.ndarray, curve: Optional[np.ndarray] = None,
+             slack_weight: float = W_SLACK, pair_weights: Optional[np.ndarray] = None):
+    R, P = compiled.n_relays, compiled.n_pairs
+    main, backup = compiled.main_idx, compiled.backup_idx
+    u_m, u_b = unit_times(compiled, pickup, curve)
+    valid_m, valid_b = np.isfinite(u_m), np.isfinite(u_b)
+    a_m = np.where(valid_m, u_m, 0.0)
+    a_b = np.where(valid_b, u_b, 0.0)
+    # Un relé que no opera aporta un tiempo constante MAX_TIME
+    const_m = np.where(valid_m, 0.0, engine.MAX_TIME)
+    const_b = np.where(valid_b, 0.0, engine.MAX_TIME)
+
+    # a_m·TDS_m - a_b·TDS_b - s_p <= -(CTI + margen) - const_m + const_b
+    pairs = np.arange(P)
+    rows = np.concatenate([pairs, pairs, pairs])
+    cols = np.concatenate([main, backup, R + pairs])
+    vals = np.concatenate([a_m, -a_b, -np.ones(P)])
+    A_ub = sparse.csr_matrix((vals, (rows, cols)), shape=(P, R + P))
+    b_ub = -(engine.CTI + CTI_MARGIN) - const_m + const_b
+
+    time_weights = a_m if pair_weights is None else a_m * pair_weights
+    c = np.concatenate([np.bincount(main, weights=time_weights, minlength=R), np.full(P, slack_weight)])
+
+    # Como respaldo, t_b = TDS·u_b solo es lineal hasta MAX_TIME: se limita TDS para no sobreestimar el margen
+    u_backup_max = np.zeros(R)
+    np.maximum.at(u_backup_max, backup, a_b)
+    with np.errstate(divide="ignore"):
+        tds_max = np.minimum(engine.MAX_TDS, np.where(u_backup_max > 0, engine.MAX_TIME / u_backup_max, np.inf))
+    tds_max = np.maximum(tds_max, engine.MIN_TDS)
+    bounds = np.column_stack([np.r_[np.full(R, engine.MIN_TDS), np.zeros(P)], np.r_[tds_max, np.full(P, np.inf)]])
+    return c, A_ub, b_ub, bounds
+
+
+# Fijar el TDS de los relés indicados (límites inferior = superior = valor actual)
+def fix_tds(bounds: np.ndarray, relays: np.ndarray, tds: np.ndarray) -> None:
+    bounds[relays, 0] = bounds[relays, 1] = tds[relays]
+
+
+# Resolver un LP ya construido; las variables empiezan por R TDS y P holguras (puede haber variables extra al final)
+def solve_lp(compiled: CompiledPairs, pickup: np.ndarray, curve: Optional[np.ndarray], c, A_ub, b_ub, bounds) -> LPResult:
+    R, P = compiled.n_relays, compiled.n_pairs
+    solution = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method="highs")
+    if solution.x is None:
+        raise RuntimeError(f"El LP de TDS no tiene solución: {solution.message}")
+    tds = np.clip(solution.x[:R], engine.MIN_TDS, engine.MAX_TDS)
+    slack = np.maximum(solution.x[R:R + P], 0.0)
+    evaluation = engine.evaluate(compiled, tds, pickup, curve)
+    return LPResult(tds=tds, pickup=pickup, slack=slack, objective=float(solution.fun), status=solution.status,
+                    message=solution.message, evaluation=evaluation)
+
+
+# Resolver los TDS óptimos para pickups fijos; con free (máscara por relé) los demás relés quedan fijos en tds
+def solve_tds(compiled: CompiledPairs, pickup: np.ndarray, curve: Optional[np.ndarray] = None,
+              slack_weight: float = W_SLACK, pair_weights: Optional[np.ndarray] = None,
+              tds: Optional[np.ndarray] = None, free: Optional[np.ndarray] = None) -> LPResult:
+    pickup = np.asarray(pickup, dtype=float)
+    c, A_ub, b_ub, bounds = build_lp(compiled, pickup, curve, slack_weight, pair_weights)
+    if free is not None:
+        fix_tds(bounds, np.flatnonzero(~free), np.asarray(tds, dtype=float))
+    return solve_lp(compiled, pickup, curve, c, A_ub, b_ub, bounds)
+
+
+# Lazo externo opcional: subir el pickup de respaldo y bajar el del principal en pares que el LP no logra coordinar,
+# re-resolver y conservar el cambio mientras la holgura total disminuya. solver(pickup) permite otra formulación del LP.
+# Con free solo se optimizan esos relés; los demás conservan tds y pickup.
+def optimize(problem: OptimizationProblem, pickup: np.ndarray, pickup_iterations: int = 0,
+             slack_weight: float = W_SLACK, solver: Optional[Callable[[np.ndarray], LPResult]] = None,
+             tds: Optional[np.ndarray] = None, free: Optional[np.ndarray] = None) -> LPResult:
+    compiled = problem.compiled
+    if solver is None:
+        def solver(candidate):
+            return solve_tds(compiled, candidate, problem.curve, slack_weight, tds=tds, free=free)
+    best = solver(np.asarray(pickup, dtype=float))
+    logger.info(f"LP: T_total={best.evaluation.t_m.sum():.3f}, holgura={best.total_slack:.4f}, TMT={best.evaluation.tmt:.4f}")
+
+    pickup_min = engine.MIN_PICKUP
+    for iteration in range(pickup_iterations):
+        stuck = best.slack > 0
+        if not stuck.any():
+            break
+        factor = np.ones(compiled.n_relays)
+        factor[np.unique(compiled.backup_idx[stuck])] *= PICKUP_STEP[0]
+        factor[np.unique(compiled.main_idx[stuck])] *= PICKUP_STEP[1]
+        if free is not None:
+            factor[~free] = 1.0
+        candidate = np.minimum(problem.pickup_max, np.maximum(pickup_min, best.pickup * factor))
+        result = solver(candidate)
+        logger.info(f"LP (pickup {iteration + 1}): T_total={result.evaluation.t_m.sum():.3f}, holgura={result.total_slack:.4f}")
+        if result.total_slack >= best.total_slack:
+            break
+        result.pickup_iterations = iteration + 1
+        best = result
+    return best
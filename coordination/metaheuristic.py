@@ -0,0 +1,180 @@
+import logging
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from coordination import engine
+from coordination.engine import CompiledPairs
+from coordination.optimizer import OptimizationProblem
+from coordination.instrumentation import Instrumentation, phase
+from coordination.progress import Checkpoint, ProgressLog, restore_rng
+
+logger = logging.getLogger(__name__)
+
+# Evolución diferencial (DE/rand/1/bin) sobre TDS y pickup de todos los relés a la vez, en el espacio normalizado [0, 1]
+POPULATION = 40
+GENERATIONS = 200
+MUTATION = 0.7  # F
+CROSSOVER = 0.9  # CR
+BATCH_SIZE = 8  # Candidatos por tarea enviada al pool
+
+# Estado de cada proceso del pool: los pares compilados se envían una sola vez (initializer), no en cada tarea
+_worker = {}
+
+
+def _init_worker(compiled: CompiledPairs, curve: Optional[np.ndarray], w_k: float, w_pickup: float) -> None:
+    _worker.update(compiled=compiled, curve=curve, w_k=w_k, w_pickup=w_pickup)
+
+
+def _score_batch(tds: np.ndarray, pickup: np.ndarray) -> np.ndarray:
+    return engine.evaluate_batch(_worker["compiled"], tds, pickup, _worker["w_k"], _worker["w_pickup"], curve=_worker["curve"]).of
+
+
+# Evaluación de OF por lotes: en el propio proceso con workers <= 1, o repartida en un pool de procesos.
+# El resultado no depende del número de workers (cada lote es independiente y se reensamblan en orden).
+class BatchScorer:
+    def __init__(self, compiled: CompiledPairs, curve: Optional[np.ndarray] = None, workers: int = 1,
+                 batch_size: int = BATCH_SIZE, w_k: float = engine.W_K, w_pickup: float = engine.W_PICKUP):
+        self.batch_size = batch_size
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(compiled, curve, w_k, w_pickup))
+        else:
+            _init_worker(compiled, curve, w_k, w_pickup)
+
+    def __call__(self, tds: np.ndarray, pickup: np.ndarray) -> np.ndarray:
+        starts = range(0, len(tds), self.batch_size)
+        if self.pool is None:
+            return np.concatenate([_score_batch(tds[s:s + self.batch_size], pickup[s:s + self.batch_size]) for s in starts])
+        futures = [self.pool.submit(_score_batch, tds[s:s + self.batch_size], pickup[s:s + self.batch_size]) for s in starts]
+        return np.concatenate([future.result() for future in futures])
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def __enter__(self) -> "BatchScorer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class DEResult:
+    tds: np.ndarray
+    pickup: np.ndarray
+    of: float
+    generations: int
+    history: List[float] = field(default_factory=list)
+
+
+# Límites del README: 0.05 <= TDS <= 10, 0.01 <= I_pi <= 0.9·I_shc (I_shc máxima del relé).
+# Los relés fuera de free quedan fijos en tds/pickup (límite inferior = superior).
+def bounds(problem: OptimizationProblem, tds: Optional[np.ndarray] = None, pickup: Optional[np.ndarray] = None,
+           free: Optional[np.ndarray] = None):
+    R = problem.compiled.n_relays
+    lower = np.r_[np.full(R, engine.MIN_TDS), np.full(R, engine.MIN_PICKUP)]
+    upper = np.r_[np.full(R, engine.MAX_TDS), np.maximum(problem.pickup_max, engine.MIN_PICKUP)]
+    if free is not None:
+        fixed = np.r_[~free, ~free]
+        lower[fixed] = upper[fixed] = np.r_[tds, pickup][fixed]
+    return lower, upper
+
+
+# Índices r1, r2, r3 distintos entre sí y de i para cada individuo
+def _donors(rng: np.random.Generator, size: int) -> np.ndarray:
+    donors = np.empty((size, 3), dtype=np.intp)
+    for i in range(size):
+        choice = rng.choice(size - 1, 3, replace=False)
+        donors[i] = choice + (choice >= i)
+    return donors
+
+
+# Evolución diferencial; la población inicial incluye los ajustes actuales (tds, pickup) recortados a los límites.
+# scorer(tds K×R, pickup K×R) -> K permite otra función de aptitud (p. ej. varios escenarios); por defecto, OF con BatchScorer.
+# progress registra el mejor individuo de cada generación; checkpoint guarda población, aptitudes y estado del
+# generador aleatorio, y resume (load_checkpoint) continúa con exactamente la misma secuencia. instrumentation mide
+# la evaluación de la población (evaluate), la mutación/cruce/selección (update) y los MT del mejor individuo (objective).
+def optimize(problem: OptimizationProblem, tds: np.ndarray, pickup: np.ndarray,
+             population: int = POPULATION, generations: int = GENERATIONS, workers: int = 1, seed: int = 0,
+             mutation: float = MUTATION, crossover: float = CROSSOVER,
+             w_k: float = engine.W_K, w_pickup: float = engine.W_PICKUP,
+             scorer: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None,
+             free: Optional[np.ndarray] = None, progress: Optional[ProgressLog] = None,
+             checkpoint: Optional[Checkpoint] = None, resume: Optional[Dict] = None,
+             instrumentation: Optional[Instrumentation] = None) -> DEResult:
+    if population < 4:
+        raise ValueError("La evolución diferencial requiere una población de al menos 4 individuos")
+    rng = np.random.default_rng(seed)
+    R = problem.compiled.n_relays
+    lower, upper = bounds(problem, tds, pickup, free)
+    span = upper - lower
+
+    def decode(x):
+        values = lower + x * span
+        return values[:, :R], values[:, R:]
+
+    start = 0
+    if resume is not None:
+        x, fitness, history, start = resume["x"], resume["fitness"], list(resume["history"]), resume["iteration"]
+        if x.shape != (population, 2 * R):
+            raise ValueError(f"La población del checkpoint tiene forma {x.shape}; se esperaba {(population, 2 * R)}")
+        restore_rng(rng, resume)
+    else:
+        x = rng.random((population, 2 * R))
+        x[0] = np.clip((np.r_[tds, pickup] - lower) / np.where(span > 0, span, 1.0), 0.0, 1.0)
+        history = []
+
+    with (BatchScorer(problem.compiled, problem.curve, workers, w_k=w_k, w_pickup=w_pickup) if scorer is None
+          else nullcontext(scorer)) as score:
+        if resume is None:
+            fitness = score(*decode(x))
+        if instrumentation is not None and instrumentation.relays is None:
+            instrumentation.relays = problem.compiled.relays
+        for generation in range(start, generations):
+            started = time.perf_counter()
+            if instrumentation is not None:
+                instrumentation.begin(generation)
+            with phase(instrumentation, "update"):
+                donors = _donors(rng, population)
+                mutant = np.clip(x[donors[:, 0]] + mutation * (x[donors[:, 1]] - x[donors[:, 2]]), 0.0, 1.0)
+                cross = rng.random((population, 2 * R)) < crossover
+                cross[np.arange(population), rng.integers(0, 2 * R, population)] = True
+                trial = np.where(cross, mutant, x)
+
+            with phase(instrumentation, "evaluate"):
+                trial_fitness = score(*decode(trial))
+            with phase(instrumentation, "update"):
+                better = trial_fitness <= fitness
+                x[better], fitness[better] = trial[better], trial_fitness[better]
+            history.append(float(fitness.min()))
+            if instrumentation is not None:
+                instrumentation.evaluated(population)
+                with phase(instrumentation, "objective"):
+                    best_tds, best_pickup = decode(x[np.argmin(fitness)][None])
+                    result = engine.evaluate(problem.compiled, best_tds[0], best_pickup[0], problem.curve)
+                instrumentation.end(result.tmt, history[-1], result.MT, best_tds[0])
+            logger.debug(f"Generación {generation}: mejor OF={history[-1]:.4f}")
+            if progress is not None:
+                _record(progress, problem, generation, history[-1], *decode(x[np.argmin(fitness)][None]),
+                        time.perf_counter() - started)
+            if checkpoint is not None and checkpoint.due(generation + 1):
+                checkpoint.save("de", generation + 1, R, rng, x=x, fitness=fitness, history=np.array(history))
+
+    best = int(np.argmin(fitness))
+    best_tds, best_pickup = decode(x[best:best + 1])
+    logger.info(f"Evolución diferencial: OF={fitness[best]:.4f} tras {generations} generaciones")
+    return DEResult(tds=best_tds[0], pickup=best_pickup[0], of=float(fitness[best]), generations=generations, history=history)
+
+
+# Registro de avance del mejor individuo (métricas del motor; of es la aptitud usada por la evolución)
+def _record(progress: ProgressLog, problem: OptimizationProblem, generation: int, of: float,
+            tds: np.ndarray, pickup: np.ndarray, wall_time: float) -> None:
+    c = problem.compiled
+    result = engine.evaluate(c, tds[0], pickup[0], problem.curve)
+    pickup_diff = np.abs(pickup[0][c.main_idx] - pickup[0][c.backup_idx]).sum()
+    progress.record(generation, of, result.tmt, result.t_m.sum(), pickup_diff, int((result.MT < 0).sum()), wall_time)
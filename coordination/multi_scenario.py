@@ -0,0 +1,229 @@
+import argparse
+import json
+import logging
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence
+from scipy import sparse
+from coordination import engine, lp_solver, metaheuristic, optimizer
+from coordination.engine import CompiledPairs
+from coordination.optimizer import OptimizationProblem
+from coordination.short_circuit import build_index
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = ("weighted", "worst")
+DATA_DIR = optimizer.DATA_DIR
+SHORT_CIRCUIT_PATHS = [
+    os.path.join(DATA_DIR, "raw", "data_short_circuit_scenario_base.json"),
+    os.path.join(DATA_DIR, "raw", "data_short_circuit_scenario_20.json"),
+]
+MULTI_SCENARIO_OUTPUT_PATH = os.path.join(DATA_DIR, "processed", "data_relays_multi_scenario_optimized.json")
+
+
+# N escenarios compilados contra un mismo índice de relés, de modo que un único vector TDS/pickup sirve para todos
+@dataclass
+class MultiScenarioProblem:
+    scenario_ids: List[str]
+    scenarios: List[CompiledPairs]
+    weights: np.ndarray
+    problem: OptimizationProblem  # Pares de todos los escenarios concatenados; pickup_max = mínimo entre escenarios
+    pair_scenario: np.ndarray     # Escenario de cada par de problem.compiled
+
+    @property
+    def n_scenarios(self) -> int:
+        return len(self.scenarios)
+
+
+# Reindexar los pares de un escenario al índice de relés compartido
+def _reindex(compiled: CompiledPairs, relays: List[str], relay_index: Dict[str, int]) -> CompiledPairs:
+    mapping = np.array([relay_index[relay] for relay in compiled.relays], dtype=np.intp)
+    return replace(compiled, relays=relays, relay_index=relay_index,
+                   main_idx=mapping[compiled.main_idx], backup_idx=mapping[compiled.backup_idx])
+
+
+# Concatenar los pares de varios escenarios (ya reindexados) en un solo CompiledPairs
+def _concatenate(scenarios: List[CompiledPairs]) -> CompiledPairs:
+    first = scenarios[0]
+    return CompiledPairs(
+        relays=first.relays,
+        relay_index=first.relay_index,
+        lines=[line for c in scenarios for line in c.lines],
+        scenarios=[scenario for c in scenarios for scenario in c.scenarios],
+        backup_lines=[line for c in scenarios for line in c.backup_lines],
+        main_idx=np.concatenate([c.main_idx for c in scenarios]),
+        backup_idx=np.concatenate([c.backup_idx for c in scenarios]),
+        I_shc_main=np.concatenate([c.I_shc_main for c in scenarios]),
+        I_shc_backup=np.concatenate([c.I_shc_backup for c in scenarios]),
+        I_bus_main=np.concatenate([c.I_bus_main for c in scenarios]),
+        I_bus_backup=np.concatenate([c.I_bus_backup for c in scenarios]),
+    )
+
+
+# relay_pairs puede ser uno solo (misma topología en todos los escenarios) o uno por escenario
+def compile_scenarios(relay_pairs: Sequence[Dict], short_circuit_data: Sequence[Dict],
+                      weights: Optional[Sequence[float]] = None) -> MultiScenarioProblem:
+    if len(relay_pairs) == 1:
+        relay_pairs = list(relay_pairs) * len(short_circuit_data)
+    if len(relay_pairs) != len(short_circuit_data):
+        raise ValueError(f"Se esperaban 1 o {len(short_circuit_data)} archivos de pares; recibidos {len(relay_pairs)}")
+    weights = np.ones(len(short_circuit_data)) if weights is None else np.asarray(weights, dtype=float)
+    if len(weights) != len(short_circuit_data):
+        raise ValueError(f"Se esperaban {len(short_circuit_data)} pesos; recibidos {len(weights)}")
+
+    indexes = [build_index(data) for data in short_circuit_data]
+    compiled = [engine.compile_pairs(pairs, index) for pairs, index in zip(relay_pairs, indexes)]
+    relay_index = {}
+    for c in compiled:
+        for relay in c.relays:
+            relay_index.setdefault(relay, len(relay_index))
+    relays = list(relay_index)
+    scenarios = [_reindex(c, relays, relay_index) for c in compiled]
+
+    # El pickup debe quedar bajo 0.9·I_shc en todos los escenarios: se usa la menor corriente máxima del relé
+    I_relay = np.full(len(relays), np.inf)
+    for pairs, index in zip(relay_pairs, indexes):
+        for relay, current in optimizer.relay_max_currents(pairs, index).items():
+            I_relay[relay_index[relay]] = min(I_relay[relay_index[relay]], current)
+
+    merged = _concatenate(scenarios)
+    pair_scenario = np.repeat(np.arange(len(scenarios)), [c.n_pairs for c in scenarios])
+    return MultiScenarioProblem(
+        scenario_ids=[index.scenario_id for index in indexes],
+        scenarios=scenarios,
+        weights=weights,
+        problem=OptimizationProblem(compiled=merged, I_relay=I_relay),
+        pair_scenario=pair_scenario,
+    )
+
+
+# OF de K candidatos en cada escenario (matriz K×S). Los escenarios se evalúan en paralelo con hilos que comparten
+# los mismos arreglos de ajustes (numpy libera el GIL en las operaciones vectorizadas)
+def scenario_objectives(multi: MultiScenarioProblem, tds: np.ndarray, pickup: np.ndarray, workers: int = 1,
+                        w_k: float = engine.W_K, w_pickup: float = engine.W_PICKUP) -> np.ndarray:
+    curve = multi.problem.curve
+
+    def score(compiled):
+        return engine.evaluate_batch(compiled, tds, pickup, w_k, w_pickup, curve=curve).of
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return np.column_stack(list(pool.map(score, multi.scenarios)))
+    return np.column_stack([score(compiled) for compiled in multi.scenarios])
+
+
+def aggregate_objective(multi: MultiScenarioProblem, objectives: np.ndarray, aggregate: str = "weighted") -> np.ndarray:
+    if aggregate == "weighted":
+        return objectives @ multi.weights
+    if aggregate == "worst":
+        return objectives.max(axis=1)
+    raise ValueError(f"Agregación desconocida: {aggregate}. Disponibles: {', '.join(AGGREGATES)}")
+
+
+# LP conjunto: restricciones CTI de todos los escenarios sobre los mismos TDS. "weighted" minimiza Σ_s w_s·T_total,s;
+# "worst" agrega una variable z >= w_s·T_total,s para cada escenario y minimiza z
+def solve_tds(multi: MultiScenarioProblem, pickup: np.ndarray, aggregate: str = "weighted",
+              slack_weight: float = lp_solver.W_SLACK) -> lp_solver.LPResult:
+    compiled, curve = multi.problem.compiled, multi.problem.curve
+    pair_weights = multi.weights[multi.pair_scenario]
+    if aggregate == "weighted":
+        return lp_solver.solve_tds(compiled, pickup, curve, slack_weight, pair_weights)
+    if aggregate != "worst":
+        raise ValueError(f"Agregación desconocida: {aggregate}. Disponibles: {', '.join(AGGREGATES)}")
+
+    R, P, S = compiled.n_relays, compiled.n_pairs, multi.n_scenarios
+    c, A_ub, b_ub, bounds = lp_solver.build_lp(compiled, pickup, curve, slack_weight)
+    u_m, _ = lp_solver.unit_times(compiled, pickup, curve)
+    valid = np.isfinite(u_m)
+    # Σ_{p∈s} w_s·a_m(p)·TDS_main(p) - z <= -w_s·Σ_{p∈s} const_m(p)
+    rows = np.r_[multi.pair_scenario, np.arange(S)]
+    cols = np.r_[compiled.main_idx, np.full(S, R + P)]
+    vals = np.r_[np.where(valid, u_m, 0.0) * pair_weights, -np.ones(S)]
+    epigraph = sparse.csr_matrix((vals, (rows, cols)), shape=(S, R + P + 1))
+    const = np.bincount(multi.pair_scenario, weights=np.where(valid, 0.0, engine.MAX_TIME) * pair_weights, minlength=S)
+
+    c = np.r_[np.zeros(R), c[R:], 1.0]
+    A_ub = sparse.vstack([sparse.hstack([A_ub, sparse.csr_matrix((P, 1))]), epigraph], format="csr")
+    b_ub = np.r_[b_ub, -const]
+    bounds = np.vstack([bounds, [-np.inf, np.inf]])
+    return lp_solver.solve_lp(compiled, pickup, curve, c, A_ub, b_ub, bounds)
+
+
+# Un único vector de ajustes para todos los escenarios. method: "lp" (TDS óptimos con pickups fijos) o "de"
+def optimize(multi: MultiScenarioProblem, tds: np.ndarray, pickup: np.ndarray, method: str = "lp",
+             aggregate: str = "weighted", workers: int = 1, pickup_iterations: int = 0,
+             de_options: Optional[Dict] = None):
+    if method == "lp":
+        return lp_solver.optimize(multi.problem, pickup, pickup_iterations,
+                                  solver=lambda candidate: solve_tds(multi, candidate, aggregate))
+    if method == "de":
+        options = dict(de_options or {})
+        w_k, w_pickup = options.pop("w_k", engine.W_K), options.pop("w_pickup", engine.W_PICKUP)
+        options.pop("workers", None)
+
+        def scorer(tds_batch, pickup_batch):
+            objectives = scenario_objectives(multi, tds_batch, pickup_batch, workers, w_k, w_pickup)
+            return aggregate_objective(multi, objectives, aggregate)
+        return metaheuristic.optimize(multi.problem, tds, pickup, scorer=scorer, **options)
+    raise ValueError(f"Método de optimización desconocido para varios escenarios: {method}")
+
+
+def optimize_relay_settings(relay_data: Dict, relay_pairs: Sequence[Dict], short_circuit_data: Sequence[Dict],
+                            weights: Optional[Sequence[float]] = None, **options) -> Dict[str, Dict[str, float]]:
+    multi = compile_scenarios(relay_pairs, short_circuit_data, weights)
+    relay_values = relay_data["relay_values"]
+    multi.problem.curve = engine.curve_codes(multi.problem.compiled, relay_values)
+    logger.info(f"Escenarios: {', '.join(multi.scenario_ids)}; {multi.problem.compiled.n_relays} relés, "
+                f"{multi.problem.compiled.n_pairs} pares")
+
+    tds, pickup = engine.settings_arrays(multi.problem.compiled, relay_values)
+    result = optimize(multi, tds, pickup, **options)
+    objectives = scenario_objectives(multi, result.tds, result.pickup)[0]
+    for scenario_id, of, compiled in zip(multi.scenario_ids, objectives, multi.scenarios):
+        tmt = engine.evaluate(compiled, result.tds, result.pickup, multi.problem.curve).tmt
+        logger.info(f"{scenario_id}: OF={of:.3f}, TMT={tmt:.4f}")
+
+    relays = list(dict.fromkeys(relay for pairs in relay_pairs for relay in optimizer._all_relays(pairs)))
+    return optimizer.settings_dict(relay_values, relays, multi.problem, result.tds, result.pickup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimiza un único vector de ajustes para varios escenarios de cortocircuito")
+    parser.add_argument("--relays", default=optimizer.RELAY_DATA_PATH, help="Archivo de ajustes iniciales (relay_values)")
+    parser.add_argument("--pairs", nargs="+", default=[optimizer.RELAY_PAIRS_PATH], help="relay_pairs.json (uno o uno por escenario)")
+    parser.add_argument("--short-circuit", nargs="+", default=SHORT_CIRCUIT_PATHS, help="Archivos de cortocircuito, uno por escenario")
+    parser.add_argument("--weights", type=float, nargs="+", help="Peso de cada escenario (por defecto 1)")
+    parser.add_argument("--aggregate", choices=AGGREGATES, default="weighted", help="weighted: suma ponderada; worst: peor escenario")
+    parser.add_argument("--method", choices=["lp", "de"], default="lp")
+    parser.add_argument("--workers", type=int, default=1, help="Hilos para evaluar los escenarios en paralelo")
+    parser.add_argument("--pickup-iterations", type=int, default=0, help="Pasadas del lazo externo de pickup (solo --method lp)")
+    parser.add_argument("--population", type=int, default=metaheuristic.POPULATION, help="Solo --method de")
+    parser.add_argument("--generations", type=int, default=metaheuristic.GENERATIONS, help="Solo --method de")
+    parser.add_argument("--seed", type=int, default=0, help="Solo --method de")
+    parser.add_argument("--output", default=MULTI_SCENARIO_OUTPUT_PATH, help="Archivo de salida")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    relay_data = optimizer.load_json_file(args.relays)
+    short_circuit_data = [optimizer.load_json_file(path) for path in args.short_circuit]
+    optimized_relay_values = optimize_relay_settings(
+        relay_data, [optimizer.load_json_file(path) for path in args.pairs], short_circuit_data, args.weights,
+        method=args.method, aggregate=args.aggregate, workers=args.workers, pickup_iterations=args.pickup_iterations,
+        de_options={"population": args.population, "generations": args.generations, "seed": args.seed},
+    )
+    scenario_ids = [data.get("scenario_id") for data in short_circuit_data]
+    optimized_data = {
+        "scenario_id": "+".join(scenario_ids),
+        "scenario_ids": scenario_ids,
+        "aggregate": args.aggregate,
+        "optimized_relay_values": optimized_relay_values
+    }
+    with open(args.output, 'w') as file:
+        json.dump(optimized_data, file, indent=4)
+    logger.info(f"Archivo optimizado guardado en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
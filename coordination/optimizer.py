@@ -0,0 +1,409 @@
+import argparse
+import json
+import logging
+import os
+import time
+import numpy as np
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from coordination import engine, warm_start
+from coordination.engine import CompiledPairs
+from coordination.families import DEFAULT_CURVE, curve_name
+from coordination.instrumentation import Instrumentation, phase, profile_call, report_path
+from coordination.progress import CHECKPOINT_EVERY, Checkpoint, ProgressLog, load_checkpoint
+from coordination.short_circuit import ShortCircuitIndex, build_index
+from coordination.store import Store
+
+logger = logging.getLogger(__name__)
+
+# Parámetros del optimizador iterativo (antes en 01_optimized_scenario_base.ipynb)
+MAX_ITERATIONS = 100
+TARGET_TMT = -0.005  # Objetivo para TMT (mínimo negativo aceptable)
+TMT_TOLERANCE = 0.01
+MIN_MT = -0.01  # MT mínimo aceptado por par al declarar convergencia
+MIN_MULTIPLE = 1.001  # Margen para evitar valores de M cercanos a 1
+PICKUP_LIMIT = 0.9  # Pickup máximo como fracción de la corriente de cortocircuito del relé
+DECIMALS = 5
+
+# Pasos por par descoordinado: x -> x·factor + offset, en el orden (TDS respaldo, pickup respaldo, TDS principal, pickup principal).
+# "severe" se aplica si MT < -CTI (ajustes agresivos), "mild" en otro caso.
+SEVERE_STEP = ((1.1, 0.0), (1.05, 0.0), (0.9, 0.0), (0.95, 0.0))
+MILD_STEP = ((1.0, 0.05), (1.02, 0.0), (1.0, -0.02), (0.98, 0.0))
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+RELAY_DATA_PATH = os.path.join(DATA_DIR, "raw", "data_relays_scenario_base.json")
+RELAY_PAIRS_PATH = os.path.join(DATA_DIR, "config", "relay_pairs.json")
+SHORT_CIRCUIT_PATH = os.path.join(DATA_DIR, "raw", "data_short_circuit_scenario_base.json")
+OPTIMIZED_RELAY_DATA_PATH = os.path.join(DATA_DIR, "processed", "data_relays_scenario_base_optimized.json")
+
+
+# Problema de optimización compilado: pares, corriente máxima por relé (para tiempos y límites de pickup) y curvas
+@dataclass
+class OptimizationProblem:
+    compiled: CompiledPairs
+    I_relay: np.ndarray
+    curve: Optional[np.ndarray] = None
+
+    @property
+    def pickup_max(self) -> np.ndarray:
+        return self.I_relay * PICKUP_LIMIT
+
+
+# Resultado de una corrida: ajustes finales (sin redondear) y métricas de la última iteración evaluada
+@dataclass
+class OptimizationResult:
+    tds: np.ndarray
+    pickup: np.ndarray
+    iterations: int
+    converged: bool
+    tmt: float
+    of: float
+
+
+# Corriente de cortocircuito máxima de cada relé entre todas sus apariciones (principal o respaldo)
+def relay_max_currents(relay_pairs: Dict, index: ShortCircuitIndex) -> Dict[str, float]:
+    currents = {}
+    for line, pair_data in relay_pairs.items():
+        for scenario, config in pair_data["scenarios"].items():
+            for relay in [config["main"]["relay"]] + [b["relay"] for b in config["backups"]]:
+                current = index.current(line, scenario, relay)
+                currents[relay] = max(currents.get(relay, current), current)
+    return currents
+
+
+def build_problem(relay_pairs: Dict, index: ShortCircuitIndex, curve: Optional[np.ndarray] = None) -> OptimizationProblem:
+    compiled = engine.compile_pairs(relay_pairs, index)
+    currents = relay_max_currents(relay_pairs, index)
+    I_relay = np.array([currents[relay] for relay in compiled.relays], dtype=float)
+    return OptimizationProblem(compiled=compiled, I_relay=I_relay, curve=curve)
+
+
+# Tiempo de operación con las reglas del optimizador: MAX_TIME también si M <= 1.001 o TDS fuera de [MIN_TDS, MAX_TDS]
+def operation_time(I_shc: np.ndarray, I_pi: np.ndarray, TDS: np.ndarray, curve: Optional[np.ndarray] = None) -> np.ndarray:
+    time = engine.operation_time(I_shc, I_pi, TDS, curve=curve)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        invalid = (I_pi <= 0) | (I_shc / I_pi <= MIN_MULTIPLE) | (TDS < engine.MIN_TDS) | (TDS > engine.MAX_TDS)
+    return np.where(invalid | ~(time > 0), engine.MAX_TIME, time)
+
+
+# Tiempos principales y MT de todos los pares
+def pair_times(problem: OptimizationProblem, tds: np.ndarray, pickup: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    c = problem.compiled
+    relays = np.concatenate([c.main_idx, c.backup_idx])
+    curve = None if problem.curve is None else problem.curve[relays]
+    times = operation_time(problem.I_relay[relays], pickup[relays], tds[relays], curve)
+    t_m, t_b = times[:c.n_pairs], times[c.n_pairs:]
+    return t_m, t_b - t_m - engine.CTI
+
+
+# TMT y OF a partir de los tiempos principales y los MT
+def objective(problem: OptimizationProblem, t_m: np.ndarray, mt: np.ndarray, pickup: np.ndarray,
+              w_k: float = engine.W_K, w_pickup: float = engine.W_PICKUP) -> Tuple[float, float]:
+    c = problem.compiled
+    negative = np.where(mt < 0, mt, 0.0)
+    tmt = float(negative.sum())
+    of = float(t_m.sum() + w_k * np.square(negative).sum() + w_pickup * np.abs(pickup[c.main_idx] - pickup[c.backup_idx]).sum())
+    return tmt, of
+
+
+# Evaluar todos los pares: tiempos principales, MT por par, TMT y OF
+def evaluate(problem: OptimizationProblem, tds: np.ndarray, pickup: np.ndarray,
+             w_k: float = engine.W_K, w_pickup: float = engine.W_PICKUP) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    t_m, mt = pair_times(problem, tds, pickup)
+    tmt, of = objective(problem, t_m, mt, pickup, w_k, w_pickup)
+    return t_m, mt, tmt, of
+
+
+# Orden de aplicación de los pasos: cada relé recibe sus pasos en el orden de los pares (como en el recorrido secuencial).
+# Se agrupan en rondas: la ronda k aplica el k-ésimo paso de cada relé, por lo que dentro de una ronda no hay relés repetidos.
+def _step_rounds(relays: np.ndarray, pairs: np.ndarray) -> List[np.ndarray]:
+    order = np.lexsort((pairs, relays))
+    sorted_relays = relays[order]
+    starts = np.flatnonzero(np.r_[True, sorted_relays[1:] != sorted_relays[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    by_rank = order[np.argsort(rank, kind="stable")]
+    counts = np.bincount(rank)
+    return np.split(by_rank, np.cumsum(counts)[:-1])
+
+
+# Un paso de ajuste para todos los pares descoordinados a la vez. Cada paso x·factor + offset depende solo del valor
+# actual del mismo relé, así que aplicar las rondas en orden reproduce exactamente el recorrido secuencial por pares.
+# free (máscara por relé) limita los ajustes a esos relés; los demás conservan sus valores.
+def step(problem: OptimizationProblem, tds: np.ndarray, pickup: np.ndarray, mt: np.ndarray,
+         free: Optional[np.ndarray] = None, instrumentation: Optional[Instrumentation] = None) -> None:
+    c = problem.compiled
+    pairs = np.flatnonzero(mt < 0)
+    if len(pairs) == 0:
+        return
+    with phase(instrumentation, "update"):
+        severe = mt[pairs] < -engine.CTI
+        main, backup = c.main_idx[pairs], c.backup_idx[pairs]
+        # Si principal y respaldo son el mismo relé, la escritura del respaldo sobrescribe la del principal
+        distinct = main != backup
+
+        params = np.where(severe[:, None, None], np.array(SEVERE_STEP), np.array(MILD_STEP))  # pares×4×(factor, offset)
+        relays = np.concatenate([backup, main[distinct]])
+        order_key = np.concatenate([pairs, pairs[distinct]])
+        tds_params = np.concatenate([params[:, 0], params[distinct, 2]])
+        pickup_params = np.concatenate([params[:, 1], params[distinct, 3]])
+        if free is not None:
+            keep = free[relays]
+            relays, order_key, tds_params, pickup_params = relays[keep], order_key[keep], tds_params[keep], pickup_params[keep]
+        rounds = _step_rounds(relays, order_key)
+    pickup_max = problem.pickup_max
+
+    for ops in rounds:
+        r = relays[ops]
+        with phase(instrumentation, "update"):
+            new_tds = tds[r] * tds_params[ops, 0] + tds_params[ops, 1]
+            new_pickup = pickup[r] * pickup_params[ops, 0] + pickup_params[ops, 1]
+        with phase(instrumentation, "clamp"):
+            tds[r] = np.minimum(engine.MAX_TDS, np.maximum(engine.MIN_TDS, new_tds))
+            pickup[r] = np.minimum(pickup_max[r], np.maximum(engine.MIN_PICKUP, new_pickup))
+        if instrumentation is not None:
+            instrumentation.clamped(r, new_tds <= engine.MIN_TDS, new_tds >= engine.MAX_TDS, new_pickup >= pickup_max[r])
+
+
+# Optimización iterativa de TDS y pickup sobre arreglos; modifica copias de tds/pickup.
+# progress registra cada iteración; checkpoint guarda el estado periódicamente y resume (load_checkpoint) lo retoma.
+def optimize(problem: OptimizationProblem, tds: np.ndarray, pickup: np.ndarray,
+             max_iterations: int = MAX_ITERATIONS, target_tmt: float = TARGET_TMT,
+             w_k: float = engine.W_K, w_pickup: float = engine.W_PICKUP,
+             free: Optional[np.ndarray] = None, progress: Optional[ProgressLog] = None,
+             checkpoint: Optional[Checkpoint] = None, resume: Optional[Dict] = None,
+             instrumentation: Optional[Instrumentation] = None) -> OptimizationResult:
+    start = 0
+    if resume is not None:
+        tds, pickup, start = resume["tds"], resume["pickup"], resume["iteration"]
+    tds = np.array(tds, dtype=float)
+    pickup = np.array(pickup, dtype=float)
+    c = problem.compiled
+    tmt = of = float("nan")
+    converged = False
+    iteration = start - 1
+    if instrumentation is not None and instrumentation.relays is None:
+        instrumentation.relays = c.relays
+    for iteration in range(start, max_iterations):
+        started = time.perf_counter()
+        if instrumentation is not None:
+            instrumentation.begin(iteration)
+        with phase(instrumentation, "evaluate"):
+            t_m, mt = pair_times(problem, tds, pickup)
+        with phase(instrumentation, "objective"):
+            tmt, of = objective(problem, t_m, mt, pickup, w_k, w_pickup)
+        if instrumentation is not None:
+            instrumentation.evaluated()
+        logger.debug(f"Iteración {iteration}: OF={of:.3f}, TMT={tmt:.3f}, Total Time={t_m.sum():.3f}")
+
+        converged = bool(abs(tmt - target_tmt) < TMT_TOLERANCE and np.all(mt >= MIN_MT))
+        if progress is not None:
+            pickup_diff = np.abs(pickup[c.main_idx] - pickup[c.backup_idx]).sum()
+        if not converged:
+            step(problem, tds, pickup, mt, free, instrumentation)
+        if instrumentation is not None:
+            instrumentation.end(tmt, of, mt, tds)
+        if progress is not None:
+            progress.record(iteration, of, tmt, t_m.sum(), pickup_diff, int((mt < 0).sum()), time.perf_counter() - started)
+        if converged:
+            logger.info(f"Convergencia alcanzada en iteración {iteration}")
+            break
+        if checkpoint is not None and checkpoint.due(iteration + 1):
+            checkpoint.save("heuristic", iteration + 1, c.n_relays, tds=tds, pickup=pickup)
+    return OptimizationResult(tds=tds, pickup=pickup, iterations=iteration + 1, converged=converged, tmt=tmt, of=of)
+
+
+# Relés de relay_pairs en orden de aparición, incluidos los principales sin respaldos (no forman pares)
+def _all_relays(relay_pairs: Dict) -> List[str]:
+    relays = {}
+    for pair_data in relay_pairs.values():
+        for config in pair_data["scenarios"].values():
+            relays.setdefault(config["main"]["relay"], None)
+            for backup in config["backups"]:
+                relays.setdefault(backup["relay"], None)
+    return list(relays)
+
+
+# {relé: {"TDS", "pickup", "curve"}} redondeado a 5 decimales; los relés sin pares conservan sus valores iniciales
+def settings_dict(relay_values: Dict, relays: List[str], problem: OptimizationProblem,
+                  tds: np.ndarray, pickup: np.ndarray) -> Dict[str, Dict[str, float]]:
+    settings = {relay: {"TDS": relay_values[relay]["TDS"], "pickup": relay_values[relay]["pickup"],
+                        "curve": relay_values[relay].get("curve", DEFAULT_CURVE)} for relay in relays}
+    for r, relay in enumerate(problem.compiled.relays):
+        settings[relay]["TDS"] = float(tds[r])
+        settings[relay]["pickup"] = float(pickup[r])
+        if problem.curve is not None:
+            settings[relay]["curve"] = curve_name(problem.curve[r])
+    for values in settings.values():
+        values["TDS"] = float(f"{values['TDS']:.{DECIMALS}f}")
+        values["pickup"] = float(f"{values['pickup']:.{DECIMALS}f}")
+    return settings
+
+
+# Misma interfaz que la función del notebook. method="lp" resuelve los TDS óptimos con pickups fijos
+# (coordination.lp_solver), con pickup_iterations pasadas opcionales del lazo externo de pickup;
+# method="de" usa evolución diferencial (coordination.metaheuristic) con las opciones de de_options;
+# method="discrete" busca en la grilla de pasos de TDS y taps de pickup de cada relé (coordination.setting_grid).
+# previous_data (archivo optimizado o de coordinación) arranca desde ajustes previos. Con changed_lines solo se
+# reoptimizan los relés de esas líneas (previous_pairs: versión anterior de relay_pairs, si la hay), y el conjunto
+# se amplía con los relés vecinos mientras queden pares descoordinados en su frontera.
+# progress y checkpoint (métodos heuristic y de) registran el avance y guardan el estado; con resume se continúa
+# desde el checkpoint existente. instrumentation (métodos heuristic y de) recibe los tiempos por fase y las métricas
+# de convergencia de cada iteración.
+def optimize_relay_settings(relay_data: Dict, relay_pairs: Dict, short_circuit_data: Dict,
+                            max_iterations: int = MAX_ITERATIONS, method: str = "heuristic",
+                            pickup_iterations: int = 0, de_options: Optional[Dict] = None,
+                            previous_data: Optional[Dict] = None, changed_lines: Optional[Iterable[str]] = None,
+                            previous_pairs: Optional[Dict] = None, progress: Optional[ProgressLog] = None,
+                            checkpoint: Optional[Checkpoint] = None, resume: bool = False,
+                            instrumentation: Optional[Instrumentation] = None) -> Dict[str, Dict[str, float]]:
+    index = short_circuit_data if isinstance(short_circuit_data, ShortCircuitIndex) else build_index(short_circuit_data)
+    relay_values = relay_data["relay_values"]
+    if previous_data is not None:
+        relay_values = warm_start.apply_seed(relay_values, warm_start.load_seed(previous_data))
+    relays = _all_relays(relay_pairs)
+    logger.info(f"Total de relés únicos encontrados: {len(relays)}")
+
+    problem = build_problem(relay_pairs, index)
+    problem.curve = engine.curve_codes(problem.compiled, relay_values)
+    tds, pickup = engine.settings_arrays(problem.compiled, relay_values)
+
+    state = None
+    if resume:
+        if checkpoint is None:
+            raise ValueError("Para reanudar se requiere la ruta del checkpoint")
+        state = load_checkpoint(checkpoint.path, method, problem.compiled.n_relays)
+
+    def run(free, state=None):
+        if method == "lp":
+            from coordination import lp_solver
+            return lp_solver.optimize(problem, pickup, pickup_iterations, tds=tds, free=free)
+        if method == "de":
+            from coordination import metaheuristic
+            return metaheuristic.optimize(problem, tds, pickup, free=free, progress=progress, checkpoint=checkpoint,
+                                          resume=state, instrumentation=instrumentation, **(de_options or {}))
+        if method == "discrete":
+            from coordination import setting_grid
+            grid = setting_grid.from_relay_values(problem.compiled, relay_values)
+            return setting_grid.optimize(problem, grid, pickup, pickup_iterations, tds=tds, free=free)
+        if method == "heuristic":
+            return optimize(problem, tds, pickup, max_iterations, free=free, progress=progress, checkpoint=checkpoint,
+                            resume=state, instrumentation=instrumentation)
+        raise ValueError(f"Método de optimización desconocido: {method}")
+
+    if changed_lines is None:
+        result = run(None, state)
+    else:
+        free = warm_start.reachable_relays(problem.compiled, changed_lines, relay_pairs,
+                                           *([previous_pairs] if previous_pairs is not None else []))
+
+        def margins(tds_values, pickup_values):
+            if method == "heuristic":
+                return evaluate(problem, tds_values, pickup_values)[1]
+            return engine.evaluate(problem.compiled, tds_values, pickup_values, problem.curve).MT
+
+        baseline_mt = margins(tds, pickup)
+        while free is not None:
+            logger.info(f"Reoptimización parcial: {int(free.sum())} de {problem.compiled.n_relays} relés libres")
+            # El checkpoint de --resume continúa la primera ronda; las rondas de ampliación empiezan sin estado
+            result = run(free, state)
+            state = None
+            free = warm_start.expand_free(problem.compiled, free, margins(result.tds, result.pickup), baseline_mt, -MIN_MT)
+    return settings_dict(relay_values, relays, problem, result.tds, result.pickup)
+
+
+def load_json_file(file_path: str) -> Dict:
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimiza TDS y pickup de los relés y guarda el archivo optimizado")
+    parser.add_argument("--relays", default=RELAY_DATA_PATH, help="Archivo de ajustes iniciales (relay_values)")
+    parser.add_argument("--pairs", default=RELAY_PAIRS_PATH, help="Archivo relay_pairs.json")
+    parser.add_argument("--short-circuit", default=SHORT_CIRCUIT_PATH, help="Archivo de corrientes de cortocircuito")
+    parser.add_argument("--output", default=OPTIMIZED_RELAY_DATA_PATH, help="Archivo de salida")
+    parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS)
+    parser.add_argument("--method", choices=["heuristic", "lp", "de", "discrete"], default="heuristic",
+                        help="heuristic: ajuste iterativo de TDS y pickup; lp: TDS óptimos por programación lineal con pickups fijos; "
+                             "de: evolución diferencial sobre TDS y pickup; discrete: TDS y pickup en la grilla de pasos/taps de cada relé")
+    parser.add_argument("--pickup-iterations", type=int, default=0, help="Pasadas del lazo externo de pickup (--method lp o discrete)")
+    parser.add_argument("--population", type=int, default=40, help="Tamaño de la población (solo --method de)")
+    parser.add_argument("--generations", type=int, default=200, help="Generaciones (solo --method de)")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para evaluar la población (solo --method de)")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla para reproducibilidad (solo --method de)")
+    parser.add_argument("--w-k", type=float, default=engine.W_K, help="Peso de ΣMT² en la función objetivo (solo --method de)")
+    parser.add_argument("--w-pickup", type=float, default=engine.W_PICKUP, help="Peso de Σ|ΔI_pi| (solo --method de)")
+    parser.add_argument("--warm-start", help="Arrancar desde un archivo optimizado previo o desde la última entrada de "
+                                             "coordination_history de un archivo de coordinación")
+    parser.add_argument("--changed-lines", nargs="+", help="Reoptimizar solo los relés alcanzables desde estas líneas")
+    parser.add_argument("--previous-pairs", help="relay_pairs.json anterior: las líneas cambiadas se detectan comparándolo")
+    parser.add_argument("--previous-short-circuit", help="Cortocircuito anterior (con --previous-pairs, compara también corrientes)")
+    parser.add_argument("--progress", help="Archivo JSONL donde se agrega un registro por iteración (heuristic y de)")
+    parser.add_argument("--checkpoint", help="Archivo .npz de checkpoint (heuristic y de)")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY, help="Iteraciones entre checkpoints")
+    parser.add_argument("--resume", action="store_true", help="Continuar desde el checkpoint de --checkpoint")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Guardar tiempos por fase y métricas de convergencia junto a la salida (heuristic y de)")
+    parser.add_argument("--profile", action="store_true", help="Ejecutar bajo cProfile y guardar el perfil junto a la salida")
+    parser.add_argument("--store", help="Leer pares, cortocircuito y ajustes iniciales del almacén SQLite en lugar de los JSON")
+    parser.add_argument("--scenario", default="scenario_1", help="Escenario del almacén (solo --store)")
+    parser.add_argument("--settings-version", default="base", help="Versión de ajustes iniciales del almacén (solo --store)")
+    parser.add_argument("--save-version", help="Guardar también el resultado como esta versión de ajustes en el almacén (solo --store)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requiere --checkpoint")
+
+    if args.store:
+        with Store(args.store) as scenario_store:
+            relay_data = scenario_store.relay_data(args.scenario, args.settings_version)
+            relay_pairs = scenario_store.relay_pairs()
+            index = scenario_store.short_circuit_index(args.scenario)
+    else:
+        relay_data = load_json_file(args.relays)
+        relay_pairs = load_json_file(args.pairs)
+        index = build_index(load_json_file(args.short_circuit))
+    previous_pairs = load_json_file(args.previous_pairs) if args.previous_pairs else None
+    changed_lines = args.changed_lines
+    if changed_lines is None and previous_pairs is not None:
+        previous_index = build_index(load_json_file(args.previous_short_circuit)) if args.previous_short_circuit else None
+        changed_lines = warm_start.changed_lines(previous_pairs, relay_pairs, previous_index,
+                                                 index if previous_index is not None else None)
+        logger.info(f"Líneas cambiadas: {', '.join(changed_lines) or 'ninguna'}")
+    instrumentation = Instrumentation() if args.instrument else None
+    # El historial de un archivo de coordinación se lee por bloques; la semilla se pasa como archivo optimizado
+    previous_data = {"optimized_relay_values": warm_start.load_seed_file(args.warm_start)} if args.warm_start else None
+
+    # El registro de avance se cierra aunque el optimizador falle
+    with ProgressLog(args.progress, args.method) if args.progress else nullcontext() as progress:
+        def run():
+            return optimize_relay_settings(relay_data, relay_pairs, index,
+                                           args.max_iterations, args.method, args.pickup_iterations,
+                                           {"population": args.population, "generations": args.generations,
+                                            "workers": args.workers, "seed": args.seed,
+                                            "w_k": args.w_k, "w_pickup": args.w_pickup},
+                                           previous_data,
+                                           changed_lines, previous_pairs,
+                                           progress,
+                                           Checkpoint(args.checkpoint, args.checkpoint_every) if args.checkpoint else None,
+                                           args.resume, instrumentation)
+
+        optimized_relay_values = profile_call(run, args.output) if args.profile else run()
+    if instrumentation is not None:
+        instrumentation.write_report(report_path(args.output, ".instrumentation.json"))
+    optimized_data = {
+        "scenario_id": relay_data.get("scenario_id", "scenario_1"),
+        "optimized_relay_values": optimized_relay_values
+    }
+    with open(args.output, 'w') as file:
+        json.dump(optimized_data, file, indent=4)
+    logger.info(f"Archivo optimizado guardado en: {args.output}")
+    if args.store and args.save_version:
+        with Store(args.store) as scenario_store:
+            scenario_store.import_settings(optimized_data, args.save_version, source=args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import csv
+import json
+import logging
+import os
+from operator import itemgetter
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple
+import numpy as np
+from coordination.engine import CompiledPairs
+from coordination.short_circuit import ShortCircuitIndex, load_index
+
+logger = logging.getLogger(__name__)
+
+# Lista plana de pares exportada por las herramientas de planificación (RelaysByLine.csv): separador ';', UTF-8 con
+# o sin BOM y una fila por par principal/respaldo
+CSV_COLUMNS = ("Group", "Relay_M", "Line_RM", "Relay_B", "Line_RB")
+DELIMITER = ";"
+MAX_LISTED = 20  # Diferencias listadas por categoría en el registro
+
+
+class CsvPair(NamedTuple):
+    row: int  # Número de línea en el archivo (la cabecera es la 1)
+    group: str
+    main: str
+    line: str
+    backup: str
+    backup_line: str
+
+
+# Leer las filas por streaming; las columnas se ubican por nombre en la cabecera
+def read_pairs(path: str) -> Iterator[CsvPair]:
+    with open(path, 'r', encoding="utf-8-sig", newline="") as file:
+        reader = csv.reader(file, delimiter=DELIMITER)
+        header = [name.strip() for name in next(reader, [])]
+        missing = [name for name in CSV_COLUMNS if name not in header]
+        if missing:
+            raise ValueError(f"{path}: faltan columnas {', '.join(missing)} en la cabecera")
+        columns = [header.index(name) for name in CSV_COLUMNS]
+        width = max(columns) + 1
+        select = itemgetter(*columns)
+        for row, values in enumerate(reader, start=2):
+            if len(values) < width:
+                if not values or (len(values) == 1 and not values[0].strip()):
+                    continue
+                raise ValueError(f"{path}:{row}: se esperaban {len(header)} columnas y hay {len(values)}")
+            yield CsvPair(row, *map(str.strip, select(values)))
+
+
+# Pares del CSV compilados contra el índice de cortocircuito. El escenario de falla de cada par es el de su línea cuyo
+# relé principal coincide con Relay_M; las filas sin escenario o sin corrientes quedan fuera y se informan.
+@dataclass
+class CsvCompilation:
+    compiled: CompiledPairs
+    groups: List[str]
+    rows: np.ndarray  # Número de línea del CSV de cada par compilado
+    keys: Dict[Tuple[str, str, str], str] = field(default_factory=dict)  # (línea, principal, respaldo) -> línea del respaldo
+    unresolved: List[CsvPair] = field(default_factory=list)
+    missing_currents: List[CsvPair] = field(default_factory=list)
+    duplicates: List[CsvPair] = field(default_factory=list)
+
+
+# Construir la tabla compilada directamente desde el CSV, en una pasada y sin armar relay_pairs
+def compile_csv(path: str, index: ShortCircuitIndex) -> CsvCompilation:
+    faults = {(line, relay): scenario for (line, scenario), relay in index.main_relays.items()}
+    relays, relay_index = [], {}
+    lines, scenarios, backup_lines, groups, rows = [], [], [], [], []
+    main_idx, backup_idx, I_shc_main, I_shc_backup = [], [], [], []
+    I_bus_main, I_bus_backup = [], []
+    keys, unresolved, missing_currents, duplicates = {}, [], [], []
+
+    def index_of(relay):
+        if relay not in relay_index:
+            relay_index[relay] = len(relays)
+            relays.append(relay)
+        return relay_index[relay]
+
+    for pair in read_pairs(path):
+        key = (pair.line, pair.main, pair.backup)
+        if key in keys:
+            duplicates.append(pair)
+            continue
+        keys[key] = pair.backup_line
+        scenario = faults.get((pair.line, pair.main))
+        if scenario is None:
+            unresolved.append(pair)
+            continue
+        main_key, backup_key = (pair.line, scenario, pair.main), (pair.line, scenario, pair.backup)
+        if backup_key not in index.currents:
+            missing_currents.append(pair)
+            continue
+        lines.append(pair.line)
+        scenarios.append(scenario)
+        backup_lines.append(pair.backup_line)
+        groups.append(pair.group)
+        rows.append(pair.row)
+        main_idx.append(index_of(pair.main))
+        backup_idx.append(index_of(pair.backup))
+        I_shc_main.append(index.currents[main_key])
+        I_shc_backup.append(index.currents[backup_key])
+        I_bus_main.append(index.bus_currents[main_key])
+        I_bus_backup.append(index.bus_currents[backup_key])
+
+    compiled = CompiledPairs(
+        relays=relays,
+        relay_index=relay_index,
+        lines=lines,
+        scenarios=scenarios,
+        backup_lines=backup_lines,
+        main_idx=np.array(main_idx, dtype=np.intp),
+        backup_idx=np.array(backup_idx, dtype=np.intp),
+        I_shc_main=np.array(I_shc_main, dtype=float),
+        I_shc_backup=np.array(I_shc_backup, dtype=float),
+        I_bus_main=np.array(I_bus_main, dtype=float).reshape(-1, 2),
+        I_bus_backup=np.array(I_bus_backup, dtype=float).reshape(-1, 2),
+    )
+    return CsvCompilation(compiled=compiled, groups=groups, rows=np.array(rows, dtype=np.int64), keys=keys,
+                          unresolved=unresolved, missing_currents=missing_currents, duplicates=duplicates)
+
+
+# Pares (línea, principal, respaldo) de relay_pairs.json con la línea del respaldo
+def _relay_pair_keys(relay_pairs: Dict) -> Dict[Tuple[str, str, str], str]:
+    keys = {}
+    for line, pair_data in relay_pairs.items():
+        for config in pair_data["scenarios"].values():
+            for backup in config["backups"]:
+                keys[(line, config["main"]["relay"], backup["relay"])] = backup.get("line")
+    return keys
+
+
+# Pares implícitos en el archivo de cortocircuito: cada respaldo con corriente en un escenario de falla
+def _short_circuit_keys(index: ShortCircuitIndex) -> Set[Tuple[str, str, str]]:
+    return {(line, index.main_relays[(line, scenario)], relay) for line, scenario, relay in index.currents
+            if relay != index.main_relays[(line, scenario)]}
+
+
+# Diferencias entre el CSV y las otras dos fuentes. Frente a relay_pairs: missing_in_csv / extra_in_csv. Frente al
+# cortocircuito: short_circuit_only (respaldos con corriente que el CSV no tiene) y, del lado del CSV, unresolved
+# (Relay_M no es el principal de ningún escenario de falla de la línea) y missing_currents (respaldo sin corriente).
+@dataclass
+class Reconciliation:
+    missing_in_csv: List[Tuple[str, str, str]]
+    extra_in_csv: List[Tuple[str, str, str]]
+    short_circuit_only: List[Tuple[str, str, str]]
+    backup_line_mismatch: List[Tuple[str, str, str, str, str]]  # (línea, principal, respaldo, JSON, CSV)
+    unresolved: List[CsvPair]
+    missing_currents: List[CsvPair]
+    duplicates: List[CsvPair]
+
+    @property
+    def consistent(self) -> bool:
+        return not any(self.counts().values())
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(values) for name, values in self.__dict__.items()}
+
+    def report(self) -> Dict:
+        return {"consistent": self.consistent, "counts": self.counts(),
+                **{name: [list(value) for value in values] for name, values in self.__dict__.items()}}
+
+
+def reconcile(compilation: CsvCompilation, relay_pairs: Dict, index: ShortCircuitIndex) -> Reconciliation:
+    csv_keys = compilation.keys
+    json_keys = _relay_pair_keys(relay_pairs)
+    short_circuit_keys = _short_circuit_keys(index)
+    return Reconciliation(
+        missing_in_csv=[key for key in json_keys if key not in csv_keys],
+        extra_in_csv=[key for key in csv_keys if key not in json_keys],
+        short_circuit_only=sorted(key for key in short_circuit_keys if key not in csv_keys),
+        backup_line_mismatch=[(*key, json_keys[key], backup_line) for key, backup_line in csv_keys.items()
+                              if key in json_keys and json_keys[key] != backup_line],
+        unresolved=compilation.unresolved,
+        missing_currents=compilation.missing_currents,
+        duplicates=compilation.duplicates,
+    )
+
+
+def _describe(name: str, values: List) -> None:
+    listing = ", ".join(f"fila {value.row}: {value.line}/{value.main}/{value.backup}" if isinstance(value, CsvPair)
+                        else "/".join(str(item) for item in value) for value in values[:MAX_LISTED])
+    more = f" (y {len(values) - MAX_LISTED} más)" if len(values) > MAX_LISTED else ""
+    logger.warning(f"{name}: {len(values)} — {listing}{more}")
+
+
+def main():
+    from coordination import optimizer
+
+    parser = argparse.ArgumentParser(description="Importar RelaysByLine.csv y compararlo con relay_pairs.json y el cortocircuito")
+    parser.add_argument("--csv", default=os.path.join(optimizer.DATA_DIR, "config", "RelaysByLine.csv"), help="CSV de pares (Group;Relay_M;Line_RM;Relay_B;Line_RB)")
+    parser.add_argument("--pairs", default=optimizer.RELAY_PAIRS_PATH, help="Archivo relay_pairs.json")
+    parser.add_argument("--short-circuit", default=optimizer.SHORT_CIRCUIT_PATH, help="Archivo de corrientes de cortocircuito")
+    parser.add_argument("--report", help="Archivo JSON con todas las diferencias")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    index = load_index(args.short_circuit)
+    compilation = compile_csv(args.csv, index)
+    logger.info(f"{compilation.compiled.n_pairs} pares compilados desde {args.csv} ({compilation.compiled.n_relays} relés)")
+    with open(args.pairs, 'r') as file:
+        reconciliation = reconcile(compilation, json.load(file), index)
+    for name, values in reconciliation.__dict__.items():
+        if values:
+            _describe(name, values)
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(reconciliation.report(), file, indent=4)
+        logger.info(f"Reporte guardado en: {args.report}")
+    if reconciliation.consistent:
+        logger.info("El CSV, relay_pairs.json y el archivo de cortocircuito describen los mismos pares")
+    raise SystemExit(0 if reconciliation.consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
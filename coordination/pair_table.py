@@ -0,0 +1,169 @@
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+from coordination.families import DEFAULT_CODE, curve_name
+
+# Columnas numéricas por par; las de texto se resuelven contra las listas compartidas de CompiledPairs
+PAIR_DTYPE = np.dtype([
+    ("main", np.intp),
+    ("backup", np.intp),
+    ("main_pickup", np.float64),
+    ("main_tds", np.float64),
+    ("main_I_shc", np.float64),
+    ("main_curve", np.int8),
+    ("backup_pickup", np.float64),
+    ("backup_tds", np.float64),
+    ("backup_I_shc", np.float64),
+    ("backup_curve", np.int8),
+    ("t_m_ref", np.float64),
+    ("t_b_ref", np.float64),
+    ("delta_t", np.float64),
+    ("MT", np.float64),
+    ("coordinated", np.bool_),
+])
+TEXT_COLUMNS = ("line", "scenario", "backup_line", "main_relay", "backup_relay")
+
+
+# Vista de un par (fila) de la tabla; no copia datos, admite acceso pair["campo"]
+class PairRecord:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: "PairTable", row: int):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, key: str):
+        compiled = self.table.compiled
+        if key == "line":
+            return compiled.lines[self.row]
+        if key == "scenario":
+            return compiled.scenarios[self.row]
+        if key == "backup_line":
+            return compiled.backup_lines[self.row]
+        if key == "main_relay":
+            return compiled.relays[self.table.data["main"][self.row]]
+        if key == "backup_relay":
+            return compiled.relays[self.table.data["backup"][self.row]]
+        return self.table.data[key][self.row].item()
+
+    def keys(self) -> List[str]:
+        return list(TEXT_COLUMNS) + [name for name in PAIR_DTYPE.names if name not in ("main", "backup")]
+
+
+# Tabla columnar de pares: un arreglo estructurado compartido y un índice de filas por vista
+class PairTable:
+    __slots__ = ("compiled", "data", "rows")
+
+    def __init__(self, compiled, data: np.ndarray, rows: Optional[np.ndarray] = None):
+        self.compiled = compiled
+        self.data = data
+        self.rows = np.arange(len(data)) if rows is None else rows
+
+    @classmethod
+    def from_result(cls, compiled, tds: np.ndarray, pickup: np.ndarray, result,
+                    curve: Optional[np.ndarray] = None) -> "PairTable":
+        data = np.empty(compiled.n_pairs, dtype=PAIR_DTYPE)
+        data["main"] = compiled.main_idx
+        data["backup"] = compiled.backup_idx
+        data["main_pickup"] = pickup[compiled.main_idx]
+        data["main_tds"] = tds[compiled.main_idx]
+        data["main_I_shc"] = compiled.I_shc_main
+        data["main_curve"] = DEFAULT_CODE if curve is None else curve[compiled.main_idx]
+        data["backup_pickup"] = pickup[compiled.backup_idx]
+        data["backup_tds"] = tds[compiled.backup_idx]
+        data["backup_I_shc"] = compiled.I_shc_backup
+        data["backup_curve"] = DEFAULT_CODE if curve is None else curve[compiled.backup_idx]
+        data["t_m_ref"] = result.t_m
+        data["t_b_ref"] = result.t_b
+        data["delta_t"] = result.delta_t
+        data["MT"] = result.MT
+        data["coordinated"] = result.coordinated
+        return cls(compiled, data)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __bool__(self) -> bool:
+        return len(self.rows) > 0
+
+    def __getitem__(self, idx: int) -> PairRecord:
+        return PairRecord(self, int(self.rows[idx]))
+
+    def __iter__(self) -> Iterator[PairRecord]:
+        return (PairRecord(self, int(row)) for row in self.rows)
+
+    # Concatenar vistas de la misma tabla (p. ej. coordinados + descoordinados)
+    def __add__(self, other: "PairTable") -> "PairTable":
+        return PairTable(self.compiled, self.data, np.concatenate([self.rows, other.rows]))
+
+    def where(self, mask: np.ndarray) -> "PairTable":
+        return PairTable(self.compiled, self.data, self.rows[mask[self.rows]])
+
+    def coordinated(self) -> "PairTable":
+        return self.where(self.data["coordinated"])
+
+    def uncoordinated(self) -> "PairTable":
+        return self.where(~self.data["coordinated"])
+
+    def column(self, name: str):
+        if name in TEXT_COLUMNS:
+            return [record[name] for record in self]
+        return self.data[name][self.rows]
+
+    @property
+    def tmt(self) -> float:
+        MT = self.column("MT")
+        return float(MT[np.isfinite(MT)].sum())
+
+
+# Formato para mostrar, aplicado solo al construir tablas y etiquetas del dashboard
+def _fmt(value: float, spec: str, unit: str = "", nonfinite: str = "inf") -> str:
+    return f"{value:{spec}}{unit}" if np.isfinite(value) else nonfinite
+
+
+def pair_label(pair: PairRecord) -> str:
+    return f"{pair['line']}_{pair['scenario']}_{pair['backup_relay']}"
+
+
+def dropdown_options(table: PairTable) -> List[Dict]:
+    return [{"label": pair_label(pair), "value": idx} for idx, pair in enumerate(table)]
+
+
+def summary_rows(table: PairTable) -> List[Dict[str, str]]:
+    return [
+        {
+            "Línea": f"{pair['line']}_{pair['scenario']}",
+            "Main Relay": pair["main_relay"],
+            "TDS (Main)": f"{pair['main_tds']:.5f}",
+            "Pickup (Main)": f"{pair['main_pickup']:.5f}",
+            "I_shc (Main)": f"{pair['main_I_shc']:.3f}",
+            "t_m": _fmt(pair["t_m_ref"], ".3f"),
+            "Backup Relay": pair["backup_relay"],
+            "TDS (Backup)": f"{pair['backup_tds']:.5f}",
+            "Pickup (Backup)": f"{pair['backup_pickup']:.5f}",
+            "I_shc (Backup)": f"{pair['backup_I_shc']:.3f}",
+            "t_b": _fmt(pair["t_b_ref"], ".3f"),
+            "Δt": _fmt(pair["delta_t"], ".3f", nonfinite="NaN"),
+            "MT": _fmt(pair["MT"], ".3f", nonfinite="NaN")
+        }
+        for pair in table
+    ]
+
+
+def detail_rows(pair: PairRecord) -> List[Dict[str, str]]:
+    return [
+        {"parameter": "Línea", "value": f"{pair['line']}_{pair['scenario']}"},
+        {"parameter": "Relé Principal", "value": pair["main_relay"]},
+        {"parameter": "Curva (Main)", "value": curve_name(pair["main_curve"])},
+        {"parameter": "TDS (Main)", "value": f"{pair['main_tds']:.5f}"},
+        {"parameter": "Pickup (Main)", "value": f"{pair['main_pickup']:.5f} A"},
+        {"parameter": "I_shc (Main)", "value": f"{pair['main_I_shc']:.3f} A"},
+        {"parameter": "t_m", "value": _fmt(pair["t_m_ref"], ".3f", " s")},
+        {"parameter": "Relé Backup", "value": f"{pair['backup_relay']} ({pair['backup_line']})"},
+        {"parameter": "Curva (Backup)", "value": curve_name(pair["backup_curve"])},
+        {"parameter": "TDS (Backup)", "value": f"{pair['backup_tds']:.5f}"},
+        {"parameter": "Pickup (Backup)", "value": f"{pair['backup_pickup']:.5f} A"},
+        {"parameter": "I_shc (Backup)", "value": f"{pair['backup_I_shc']:.3f} A"},
+        {"parameter": "t_b", "value": _fmt(pair["t_b_ref"], ".3f", " s")},
+        {"parameter": "Δt", "value": _fmt(pair["delta_t"], ".3f", " s", "NaN")},
+        {"parameter": "MT", "value": _fmt(pair["MT"], ".3f", " s", "NaN")}
+    ]
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import numpy as np
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_EVERY = 10  # Iteraciones (o generaciones) entre checkpoints
+
+
+# Registro de avance en JSONL: una línea por iteración, escrita y vaciada al disco de inmediato para que otro
+# proceso pueda seguirla (tail -f)
+class ProgressLog:
+    def __init__(self, path: str, method: str):
+        self.method = method
+        self.file = open(path, "a", buffering=1)
+
+    def record(self, iteration: int, of: float, tmt: float, total_time: float, pickup_diff: float,
+               uncoordinated: int, wall_time: float) -> None:
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "method": self.method,
+            "iteration": iteration,
+            "of": float(of),
+            "tmt": float(tmt),
+            "total_time": float(total_time),
+            "pickup_diff": float(pickup_diff),
+            "uncoordinated": int(uncoordinated),
+            "wall_time": float(wall_time),
+        }
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "ProgressLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Checkpoints periódicos en .npz: arreglos de ajustes, iteración y estado del generador aleatorio (si lo hay).
+# Se escribe en un archivo temporal y se reemplaza, así un proceso interrumpido nunca deja un checkpoint a medias.
+class Checkpoint:
+    def __init__(self, path: str, every: int = CHECKPOINT_EVERY):
+        if every < 1:
+            raise ValueError("La frecuencia de checkpoint debe ser de al menos 1 iteración")
+        self.path = path
+        self.every = every
+
+    def due(self, iteration: int) -> bool:
+        return iteration % self.every == 0
+
+    def save(self, method: str, iteration: int, n_relays: int, rng: Optional[np.random.Generator] = None,
+             **arrays: np.ndarray) -> None:
+        state = {"method": np.array(method), "iteration": np.array(iteration), "n_relays": np.array(n_relays)}
+        if rng is not None:
+            state["rng_state"] = np.array(json.dumps(rng.bit_generator.state))
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(tmp_path, **state, **arrays)
+        os.replace(tmp_path, self.path)
+        logger.debug(f"Checkpoint guardado en {self.path} (iteración {iteration})")
+
+
+# Cargar un checkpoint y comprobar que corresponde al método y al tamaño del problema que se va a reanudar
+def load_checkpoint(path: str, method: str, n_relays: int) -> Dict:
+    with np.load(path, allow_pickle=False) as data:
+        state = {key: data[key] for key in data.files}
+    if str(state["method"]) != method:
+        raise ValueError(f"El checkpoint {path} es del método {state['method']}, no de {method}")
+    if int(state["n_relays"]) != n_relays:
+        raise ValueError(f"El checkpoint {path} tiene {int(state['n_relays'])} relés; el problema tiene {n_relays}")
+    state["iteration"] = int(state["iteration"])
+    logger.info(f"Reanudando desde {path} (iteración {state['iteration']})")
+    return state
+
+
+# Restaurar en rng el estado guardado en el checkpoint
+def restore_rng(rng: np.random.Generator, state: Dict) -> None:
+    rng.bit_generator.state = json.loads(str(state["rng_state"]))
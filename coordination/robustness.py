@@ -0,0 +1,173 @@
+import argparse
+import json
+import logging
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from coordination import engine
+from coordination.engine import CompiledPairs
+
+logger = logging.getLogger(__name__)
+
+# Incertidumbre de la corriente de cortocircuito: cada muestra multiplica todas las corrientes de una falla en una
+# línea (principal y respaldos) por el mismo factor, tomado de la distribución configurada para esa línea
+DISTRIBUTIONS = ("normal", "lognormal", "uniform")
+DEFAULT_DISTRIBUTION = {"distribution": "normal", "sigma": 0.1}
+DEFAULT_SAMPLES = 1000
+MEMORY_BUDGET = 64 * 1024 ** 2  # Bytes por bloque de muestras (arreglos muestras×pares de float64)
+TEMPORARIES = 8  # Arreglos muestras×pares vivos a la vez durante la evaluación de un bloque
+PERCENTILES = (5, 50, 95)
+MIN_FACTOR = 1e-3  # Las corrientes perturbadas se mantienen positivas
+
+
+@dataclass
+class RobustnessResult:
+    samples: int
+    miscoordination: np.ndarray  # Probabilidad de MT < 0 por par
+    tmt: np.ndarray              # TMT de cada muestra
+    nominal_tmt: float
+
+    def tmt_percentiles(self, percentiles=PERCENTILES) -> Dict[str, float]:
+        return {f"p{p}": float(np.percentile(self.tmt, p)) for p in percentiles}
+
+
+# Distribución de cada línea de compiled.lines: la general de config["default"] y las de config["lines"][línea] encima
+def line_distributions(compiled: CompiledPairs, config: Optional[Dict] = None):
+    config = config or {}
+    default = {**DEFAULT_DISTRIBUTION, **config.get("default", {})}
+    lines = list(dict.fromkeys(compiled.lines))
+    specs = [{**default, **config.get("lines", {}).get(line, {})} for line in lines]
+    for line, spec in zip(lines, specs):
+        if spec["distribution"] not in DISTRIBUTIONS:
+            raise ValueError(f"Distribución desconocida para {line}: {spec['distribution']}. "
+                             f"Disponibles: {', '.join(DISTRIBUTIONS)}")
+    line_index = {line: i for i, line in enumerate(lines)}
+    return specs, np.array([line_index[line] for line in compiled.lines], dtype=np.intp)
+
+
+# Líneas agrupadas por distribución, cada grupo con su propio generador (SeedSequence.spawn): cada grupo consume su
+# flujo fila por fila, así las muestras no dependen del tamaño de bloque
+def sampling_groups(specs: List[Dict], seed: int = 0) -> List[Tuple[Dict, np.ndarray, np.random.Generator]]:
+    groups = {}
+    for i, spec in enumerate(specs):
+        groups.setdefault(tuple(sorted(spec.items())), []).append(i)
+    children = np.random.SeedSequence(seed).spawn(len(groups))
+    return [(dict(key), np.array(columns), np.random.default_rng(child))
+            for (key, columns), child in zip(groups.items(), children)]
+
+
+# Factores S×L (muestras×líneas) del siguiente bloque de n_samples muestras
+def sample_factors(groups: List[Tuple[Dict, np.ndarray, np.random.Generator]], n_lines: int, n_samples: int) -> np.ndarray:
+    factors = np.empty((n_samples, n_lines))
+    for spec, columns, rng in groups:
+        shape = (n_samples, len(columns))
+        if spec["distribution"] == "normal":
+            values = 1.0 + spec.get("sigma", 0.1) * rng.standard_normal(shape)
+        elif spec["distribution"] == "lognormal":
+            values = np.exp(spec.get("sigma", 0.1) * rng.standard_normal(shape))
+        else:
+            values = rng.uniform(1.0 + spec.get("low", -0.1), 1.0 + spec.get("high", 0.1), shape)
+        factors[:, columns] = values
+    return np.maximum(factors, MIN_FACTOR)
+
+
+# Muestras por bloque para que los arreglos muestras×pares quepan en memory_budget
+def chunk_size(n_pairs: int, memory_budget: int = MEMORY_BUDGET) -> int:
+    return max(1, memory_budget // (TEMPORARIES * 8 * max(n_pairs, 1)))
+
+
+# Evaluar n_samples conjuntos de corrientes perturbadas en bloques de muestras×pares; la memoria queda acotada por
+# el tamaño del bloque, no por el número de muestras
+def analyze(compiled: CompiledPairs, tds: np.ndarray, pickup: np.ndarray, curve: Optional[np.ndarray] = None,
+            n_samples: int = DEFAULT_SAMPLES, config: Optional[Dict] = None, seed: int = 0,
+            chunk: Optional[int] = None) -> RobustnessResult:
+    specs, pair_line = line_distributions(compiled, config)
+    groups = sampling_groups(specs, seed)
+    chunk = chunk or chunk_size(compiled.n_pairs)
+    main, backup = compiled.main_idx, compiled.backup_idx
+    curve_m = None if curve is None else curve[main]
+    curve_b = None if curve is None else curve[backup]
+
+    miscoordinated = np.zeros(compiled.n_pairs, dtype=np.int64)
+    tmt = np.empty(n_samples)
+    for start in range(0, n_samples, chunk):
+        size = min(chunk, n_samples - start)
+        factors = sample_factors(groups, len(specs), size)[:, pair_line]
+        t_m = engine.operation_time(compiled.I_shc_main * factors, pickup[main], tds[main], curve=curve_m)
+        t_b = engine.operation_time(compiled.I_shc_backup * factors, pickup[backup], tds[backup], curve=curve_b)
+        delta_t = t_b - t_m - engine.CTI
+        finite = np.isfinite(delta_t)
+        miscoordinated += (finite & (delta_t < 0)).sum(axis=0)
+        tmt[start:start + size] = np.where(finite, np.minimum(delta_t, 0.0), 0.0).sum(axis=1)
+        logger.debug(f"Muestras {start}-{start + size} evaluadas")
+
+    nominal = engine.evaluate(compiled, tds, pickup, curve)
+    return RobustnessResult(samples=n_samples, miscoordination=miscoordinated / max(n_samples, 1), tmt=tmt,
+                            nominal_tmt=nominal.tmt)
+
+
+# Reporte por par de la probabilidad de descoordinación, de mayor a menor
+def pair_records(compiled: CompiledPairs, result: RobustnessResult) -> List[Dict]:
+    order = np.argsort(-result.miscoordination, kind="stable")
+    return [
+        {
+            "line": compiled.lines[p],
+            "scenario": compiled.scenarios[p],
+            "main_relay": compiled.main_relay(p),
+            "backup_relay": compiled.backup_relay(p),
+            "miscoordination_probability": float(result.miscoordination[p]),
+        }
+        for p in order
+    ]
+
+
+def main():
+    from coordination import optimizer
+    from coordination.short_circuit import build_index
+
+    parser = argparse.ArgumentParser(description="Robustez de un archivo de ajustes ante incertidumbre en las corrientes de cortocircuito")
+    parser.add_argument("--settings", default=optimizer.OPTIMIZED_RELAY_DATA_PATH,
+                        help="Archivo de ajustes (optimized_relay_values o relay_values)")
+    parser.add_argument("--pairs", default=optimizer.RELAY_PAIRS_PATH, help="Archivo relay_pairs.json")
+    parser.add_argument("--short-circuit", default=optimizer.SHORT_CIRCUIT_PATH, help="Archivo de corrientes de cortocircuito")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default=DEFAULT_DISTRIBUTION["distribution"],
+                        help="Distribución por defecto del factor de corriente")
+    parser.add_argument("--sigma", type=float, default=DEFAULT_DISTRIBUTION["sigma"], help="Desviación relativa (normal, lognormal)")
+    parser.add_argument("--low", type=float, default=-0.1, help="Variación relativa mínima (uniform)")
+    parser.add_argument("--high", type=float, default=0.1, help="Variación relativa máxima (uniform)")
+    parser.add_argument("--config", help='JSON {"default": {...}, "lines": {"L1-2": {"distribution": ..., ...}}}')
+    parser.add_argument("--chunk-size", type=int, help="Muestras por bloque (por defecto según MEMORY_BUDGET)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=20, help="Pares a mostrar en el log")
+    parser.add_argument("--output", help="Archivo JSON del reporte")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    settings = optimizer.load_json_file(args.settings)
+    relay_values = settings.get("optimized_relay_values") or settings["relay_values"]
+    compiled = engine.compile_pairs(optimizer.load_json_file(args.pairs), build_index(optimizer.load_json_file(args.short_circuit)))
+    tds, pickup = engine.settings_arrays(compiled, relay_values)
+    config = optimizer.load_json_file(args.config) if args.config else {}
+    config["default"] = {"distribution": args.distribution, "sigma": args.sigma, "low": args.low, "high": args.high,
+                         **config.get("default", {})}
+
+    result = analyze(compiled, tds, pickup, engine.curve_codes(compiled, relay_values), args.samples, config,
+                     args.seed, args.chunk_size)
+    records = pair_records(compiled, result)
+    percentiles = result.tmt_percentiles()
+    logger.info(f"TMT nominal={result.nominal_tmt:.4f}; percentiles en {result.samples} muestras: "
+                + ", ".join(f"{k}={v:.4f}" for k, v in percentiles.items()))
+    for record in records[:args.top]:
+        logger.info(f"{record['line']} {record['main_relay']}->{record['backup_relay']}: "
+                    f"P(MT < 0)={record['miscoordination_probability']:.3f}")
+    if args.output:
+        report = {"samples": result.samples, "nominal_tmt": result.nominal_tmt, "tmt_percentiles": percentiles,
+                  "pairs": records}
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.info(f"Reporte guardado en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from coordination import bundle, engine
+from coordination.engine import CompiledPairs
+from coordination.short_circuit import ShortCircuitIndex, build_index
+
+logger = logging.getLogger(__name__)
+
+# Tipos de archivo de escenario; cada uno se valida con su esquema al cargarlo
+KINDS = ("pairs", "short_circuit", "settings")
+MAX_ERRORS = 10  # Errores de esquema listados en el mensaje
+MAX_COMPILED = 4  # Compilaciones conservadas (combinaciones de relay_pairs y cortocircuito)
+
+
+# Caché de un archivo: (mtime_ns, tamaño) para la verificación rápida y el hash del contenido para no volver a
+# parsear un archivo que solo se tocó (p. ej. una copia con el mismo contenido)
+@dataclass
+class _Entry:
+    stat: Tuple[int, int]
+    digest: str
+    value: Any
+
+
+# Datos compartidos por las páginas: documentos de solo lectura y pares compilados con arreglos no escribibles.
+# El mismo objeto se devuelve mientras ninguno de los archivos cambie. Desde el paquete binario, relay_pairs e index no
+# se materializan (None) y short_circuit conserva solo scenario_id.
+@dataclass(frozen=True)
+class ScenarioData:
+    relay_pairs: Optional[Mapping]
+    short_circuit: Mapping
+    index: Optional[ShortCircuitIndex]
+    compiled: CompiledPairs
+    settings: Mapping[str, Mapping]  # Nombre -> documento de ajustes (relay_values u optimized_relay_values)
+    digests: Tuple[str, ...]
+
+
+_files: Dict[Tuple[str, str], _Entry] = {}
+_compiled: Dict[Tuple[str, str], Tuple[ShortCircuitIndex, CompiledPairs]] = {}
+_scenarios: Dict[Tuple, ScenarioData] = {}
+_lock = threading.Lock()
+
+
+# Copia de solo lectura de un documento JSON: dict -> MappingProxyType, list -> tuple
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_relay(errors: List[str], where: str, entry: Any, currents: bool) -> None:
+    if not isinstance(entry, dict) or not isinstance(entry.get("relay"), str):
+        errors.append(f"{where}: falta 'relay'")
+    elif currents:
+        values = entry.get("currents")
+        if not isinstance(values, dict) or not all(_number(values.get(bus)) for bus in ("bus1", "bus2")):
+            errors.append(f"{where}/{entry['relay']}: 'currents' requiere bus1 y bus2 numéricos")
+
+
+# lines -> escenarios -> main/backups, común a relay_pairs (sin "lines") y al archivo de cortocircuito
+def _check_lines(errors: List[str], lines: Any, currents: bool) -> None:
+    if not isinstance(lines, dict):
+        errors.append("se esperaba un objeto de líneas")
+        return
+    for line, line_data in lines.items():
+        scenarios = line_data.get("scenarios") if isinstance(line_data, dict) else None
+        if not isinstance(scenarios, dict):
+            errors.append(f"{line}: falta 'scenarios'")
+            continue
+        for scenario, config in scenarios.items():
+            where = f"{line}/{scenario}"
+            if not isinstance(config, dict):
+                errors.append(f"{where}: se esperaba un objeto")
+                continue
+            _check_relay(errors, f"{where}/main", config.get("main"), currents)
+            backups = config.get("backups")
+            if not isinstance(backups, list):
+                errors.append(f"{where}: 'backups' debe ser una lista")
+                continue
+            for backup in backups:
+                _check_relay(errors, f"{where}/backups", backup, currents)
+
+
+def _check_settings(errors: List[str], data: Dict) -> None:
+    key = "optimized_relay_values" if "optimized_relay_values" in data else "relay_values"
+    values = data.get(key)
+    if not isinstance(values, dict):
+        errors.append("falta 'relay_values' u 'optimized_relay_values'")
+        return
+    for relay, settings in values.items():
+        if not isinstance(settings, dict) or not all(_number(settings.get(name)) for name in ("TDS", "pickup")):
+            errors.append(f"{relay}: 'TDS' y 'pickup' deben ser numéricos")
+
+
+# Validar el esquema de un documento; ValueError con los primeros MAX_ERRORS problemas
+def validate(data: Any, kind: str, path: str = "") -> None:
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        errors.append("se esperaba un objeto JSON")
+    elif kind == "pairs":
+        _check_lines(errors, data, currents=False)
+    elif kind == "short_circuit":
+        _check_lines(errors, data.get("lines"), currents=True)
+    elif kind == "settings":
+        _check_settings(errors, data)
+    else:
+        raise ValueError(f"Tipo de archivo desconocido: {kind}. Disponibles: {', '.join(KINDS)}")
+    if errors:
+        raise ValueError(f"{path}: {len(errors)} errores de esquema ({kind}): " + "; ".join(errors[:MAX_ERRORS]))
+
+
+def _stat(path: str) -> Tuple[int, int]:
+    status = os.stat(path)
+    return status.st_mtime_ns, status.st_size
+
+
+def _load(path: str, kind: str) -> _Entry:
+    key = (os.path.abspath(path), kind)
+    stat = _stat(path)
+    entry = _files.get(key)
+    if entry is not None and entry.stat == stat:
+        return entry
+    with open(path, 'rb') as file:
+        content = file.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if entry is not None and entry.digest == digest:
+        entry.stat = stat
+        return entry
+    data = json.loads(content)
+    validate(data, kind, path)
+    entry = _Entry(stat=stat, digest=digest, value=freeze(data))
+    _files[key] = entry
+    logger.info(f"Cargado {path} ({kind})")
+    return entry
+
+
+# Documento validado y de solo lectura desde la caché del proceso; se vuelve a leer si cambió el archivo
+def load_file(path: str, kind: str) -> Mapping:
+    with _lock:
+        return _load(path, kind).value
+
+
+# Marcar como no escribibles los arreglos de pares compartidos entre páginas
+def freeze_compiled(compiled: CompiledPairs) -> CompiledPairs:
+    for array in (compiled.main_idx, compiled.backup_idx, compiled.I_shc_main, compiled.I_shc_backup,
+                  compiled.I_bus_main, compiled.I_bus_backup):
+        array.setflags(write=False)
+    return compiled
+
+
+def _compile(pairs: _Entry, short_circuit: _Entry) -> Tuple[ShortCircuitIndex, CompiledPairs]:
+    key = (pairs.digest, short_circuit.digest)
+    if key not in _compiled:
+        index = build_index(short_circuit.value)
+        compiled = freeze_compiled(engine.compile_pairs(pairs.value, index))
+        if len(_compiled) >= MAX_COMPILED:
+            del _compiled[next(iter(_compiled))]
+        _compiled[key] = (index, compiled)
+    return _compiled[key]
+
+
+# Cargar un conjunto de escenario: relay_pairs, cortocircuito y los archivos de ajustes con nombre. Solo se vuelven a
+# leer los archivos que cambiaron (el parseo es Python puro y se hace en serie); los pares se compilan una vez por
+# combinación de contenidos.
+def load_scenario(relay_pairs_path: str, short_circuit_path: str,
+                  settings_paths: Optional[Dict[str, str]] = None) -> ScenarioData:
+    settings_paths = settings_paths or {}
+    requests = [(relay_pairs_path, "pairs"), (short_circuit_path, "short_circuit")]
+    requests += [(path, "settings") for path in settings_paths.values()]
+    with _lock:
+        entries = [_load(path, kind) for path, kind in requests]
+        digests = tuple(entry.digest for entry in entries)
+        key = (os.path.abspath(relay_pairs_path), os.path.abspath(short_circuit_path),
+               tuple((name, os.path.abspath(path)) for name, path in settings_paths.items()))
+        cached = _scenarios.get(key)
+        if cached is not None and cached.digests == digests:
+            return cached
+        index, compiled = _compile(entries[0], entries[1])
+        data = ScenarioData(
+            relay_pairs=entries[0].value,
+            short_circuit=entries[1].value,
+            index=index,
+            compiled=compiled,
+            settings=MappingProxyType({name: entry.value for name, entry in zip(settings_paths, entries[2:])}),
+            digests=digests,
+        )
+        _scenarios[key] = data
+        return data
+
+
+# Conjunto de escenario desde el paquete binario de directory, con la misma forma que load_scenario y sin parsear los
+# JSON: los pares compilados son los arreglos mapeados (los workers comparten las páginas) y los ajustes se
+# reconstruyen desde sus .npy. El paquete se recompila si algún archivo fuente cambió; el mismo objeto se devuelve
+# mientras el enlace apunte a la misma versión.
+def load_bundle_scenario(directory: str, relay_pairs_path: str, short_circuit_path: str,
+                         settings_paths: Optional[Dict[str, str]] = None) -> ScenarioData:
+    settings_paths = settings_paths or {}
+    key = (os.path.abspath(directory), tuple((name, os.path.abspath(path)) for name, path in settings_paths.items()))
+    with _lock:
+        cached = _scenarios.get(key)
+        if cached is not None and cached.digests == (os.path.realpath(directory),) and \
+                not bundle.staleness(directory, bundle.source_paths(relay_pairs_path, short_circuit_path, settings_paths)):
+            return cached
+        loaded = bundle.ensure_bundle(directory, relay_pairs_path, short_circuit_path, settings_paths)
+        settings = {}
+        for name in settings_paths:
+            info = loaded.manifest["settings"][name]
+            settings[name] = freeze({"scenario_id": info["scenario_id"], info["key"]: loaded.relay_values(name)})
+        data = ScenarioData(
+            relay_pairs=None,
+            short_circuit=MappingProxyType({"scenario_id": loaded.scenario_id}),
+            index=None,
+            compiled=loaded.compiled(),
+            settings=MappingProxyType(settings),
+            digests=(loaded.directory,),
+        )
+        _scenarios[key] = data
+        logger.info(f"Cargado {directory} ({loaded.manifest['n_pairs']} pares)")
+        return data
+
+
+# Vaciar la caché del proceso (p. ej. tras reemplazar archivos sin cambiar su mtime)
+def clear_cache() -> None:
+    with _lock:
+        _files.clear()
+        _compiled.clear()
+        _scenarios.clear()
@@ -0,0 +1,161 @@
+import logging
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from coordination import engine, lp_solver
+from coordination.engine import CompiledPairs, CoordinationResult
+from coordination.optimizer import DECIMALS, OptimizationProblem
+
+logger = logging.getLogger(__name__)
+
+# Ajustes discretos por relé: "TDS_step" (paso del dial) y "pickup_taps" (tabla de taps) o "pickup_step" en relay_values.
+# Sin declaración se usan los pasos por defecto.
+DEFAULT_TDS_STEP = 0.01
+DEFAULT_PICKUP_STEP = 0.001
+MAX_SWEEPS = 10000  # Límite de pasadas de propagación (cada pasada sube al menos un relé un paso)
+
+
+# Grilla de ajustes: TDS = MIN_TDS + k·tds_step; pickup en su tabla de taps o en múltiplos de pickup_step
+@dataclass
+class SettingGrid:
+    tds_step: np.ndarray
+    pickup_step: np.ndarray
+    pickup_taps: Dict[int, np.ndarray] = field(default_factory=dict)  # Índice de relé -> taps ordenados (a DECIMALS)
+    relays: List[str] = field(default_factory=list)  # Nombres de los relés, para los mensajes de error
+
+    # Valores de la grilla redondeados a DECIMALS: lo que se escribe en el JSON es exactamente lo que se evalúa
+    def tds_value(self, k: np.ndarray, relays: Optional[np.ndarray] = None) -> np.ndarray:
+        step = self.tds_step if relays is None else self.tds_step[relays]
+        return np.round(engine.MIN_TDS + k * step, DECIMALS)
+
+    def tds_index(self, tds: np.ndarray, relays: Optional[np.ndarray] = None, up: bool = False) -> np.ndarray:
+        step = self.tds_step if relays is None else self.tds_step[relays]
+        steps = (np.asarray(tds) - engine.MIN_TDS) / step
+        # Tolerancia para que un valor ya en la grilla no salte al paso siguiente por error de punto flotante
+        k = np.ceil(steps - 1e-9) if up else np.floor(steps + 1e-9)
+        return np.clip(k, 0, self.tds_max_index(relays)).astype(np.int64)
+
+    def tds_max_index(self, relays: Optional[np.ndarray] = None) -> np.ndarray:
+        step = self.tds_step if relays is None else self.tds_step[relays]
+        return np.floor((engine.MAX_TDS - engine.MIN_TDS) / step + 1e-9).astype(np.int64)
+
+    # Tap más cercano dentro de [MIN_PICKUP, pickup_max] para los relés de snap (todos por defecto); los demás conservan
+    # su pickup. ValueError si algún relé a ajustar no tiene ningún tap en el rango.
+    def snap_pickup(self, pickup: np.ndarray, pickup_max: np.ndarray, snap: Optional[np.ndarray] = None) -> np.ndarray:
+        low = np.ceil(engine.MIN_PICKUP / self.pickup_step - 1e-9)
+        high = np.maximum(np.floor(pickup_max / self.pickup_step + 1e-9), low)
+        snapped = np.round(np.clip(np.round(pickup / self.pickup_step), low, high) * self.pickup_step, DECIMALS)
+        out_of_range = []
+        for r, taps in self.pickup_taps.items():
+            allowed = taps[(taps >= engine.MIN_PICKUP) & (taps <= pickup_max[r])]
+            if len(allowed):
+                snapped[r] = allowed[np.argmin(np.abs(allowed - pickup[r]))]
+            elif snap is None or snap[r]:
+                out_of_range.append(self.relays[r] if self.relays else str(r))
+        if out_of_range:
+            raise ValueError(f"Ningún tap de pickup cabe en [{engine.MIN_PICKUP}, pickup_max] para los relés: "
+                             f"{', '.join(out_of_range[:10])}")
+        return snapped if snap is None else np.where(snap, snapped, pickup)
+
+
+def from_relay_values(compiled: CompiledPairs, relay_values: Dict) -> SettingGrid:
+    values = [relay_values[relay] for relay in compiled.relays]
+    taps = {}
+    for r, relay_settings in enumerate(values):
+        if relay_settings.get("pickup_taps"):
+            # Redondeados como los pasos de la grilla, así el tap elegido es exactamente el que se escribe
+            taps[r] = np.unique(np.round(np.asarray(relay_settings["pickup_taps"], dtype=float), DECIMALS))
+    for name in ("TDS_step", "pickup_step"):
+        invalid = [relay for relay, v in zip(compiled.relays, values) if v.get(name) is not None and v[name] <= 0]
+        if invalid:
+            raise ValueError(f"{name} debe ser positivo; relés inválidos: {', '.join(invalid[:10])}")
+    return SettingGrid(
+        tds_step=np.array([v.get("TDS_step") or DEFAULT_TDS_STEP for v in values], dtype=float),
+        pickup_step=np.array([v.get("pickup_step") or DEFAULT_PICKUP_STEP for v in values], dtype=float),
+        pickup_taps=taps,
+        relays=list(compiled.relays),
+    )
+
+
+@dataclass
+class DiscreteResult:
+    tds: np.ndarray
+    pickup: np.ndarray
+    evaluation: CoordinationResult
+    sweeps: int
+    active: np.ndarray  # Pares que la búsqueda garantiza con MT = 0 (coordinables según el LP)
+
+
+# LP continuo de TDS con el margen de cada par ampliado en tds_step·u_m: redondear hacia arriba el TDS del principal
+# sube t_m menos que eso, así que ceil(TDS) del LP ya es un punto de la grilla que coordina todos los pares sin holgura
+def grid_lp(problem: OptimizationProblem, grid: SettingGrid, pickup: np.ndarray, tds: Optional[np.ndarray] = None,
+            free: Optional[np.ndarray] = None) -> lp_solver.LPResult:
+    compiled, curve = problem.compiled, problem.curve
+    c, A_ub, b_ub, bounds = lp_solver.build_lp(compiled, pickup, curve)
+    u_m, _ = lp_solver.unit_times(compiled, pickup, curve)
+    b_ub = b_ub - np.where(np.isfinite(u_m), grid.tds_step[compiled.main_idx] * u_m, 0.0)
+    if free is not None:
+        lp_solver.fix_tds(bounds, np.flatnonzero(~free), np.asarray(tds, dtype=float))
+    return lp_solver.solve_lp(compiled, pickup, curve, c, A_ub, b_ub, bounds)
+
+
+# TDS discretos con pickups fijos. Se parte de ceil(TDS) del LP con margen de grilla (factible para los pares activos)
+# y se baja cada relé a la cota de grilla que le imponen sus pares como respaldo, ceil((t_m + CTI)/u_b): como cada
+# pasada solo baja y las cotas dependen de forma monótona de los principales, todas las pasadas siguen coordinando los
+# pares activos, sin enumerar combinaciones. Los respaldos de pares sin coordinar (holgura en el LP) no bajan.
+def discrete_tds(problem: OptimizationProblem, grid: SettingGrid, pickup: np.ndarray, tds_start: np.ndarray,
+                 active: np.ndarray, free: Optional[np.ndarray] = None):
+    compiled, curve = problem.compiled, problem.curve
+    main, backup = compiled.main_idx[active], compiled.backup_idx[active]
+    u_m, u_b = lp_solver.unit_times(compiled, pickup, curve)
+    u_m, u_b = u_m[active], u_b[active]
+    movable = np.ones(compiled.n_relays, dtype=bool) if free is None else free
+    k = grid.tds_index(tds_start, up=True)
+    k_max = grid.tds_max_index()
+    # Cota inferior fija: respaldos de pares inactivos (no empeorar su margen) y pasos agregados por la verificación
+    k_floor = np.zeros_like(k)
+    inactive_backup = compiled.backup_idx[~active]
+    k_floor[inactive_backup] = k[inactive_backup]
+
+    def values(k):
+        return np.where(movable, grid.tds_value(k), tds_start)
+
+    sweeps = 0
+    for sweeps in range(1, MAX_SWEEPS + 1):
+        # Verificación con el motor sobre los valores exactos de la grilla: si el redondeo deja algún par activo
+        # con MT < 0, su respaldo sube un paso y no vuelve a bajar
+        delta_t = engine.evaluate(compiled, values(k), pickup, curve).delta_t[active]
+        short = (delta_t < 0) & movable[backup] & (k[backup] < k_max[backup])
+        k[backup[short]] += 1
+        k_floor[backup[short]] = k[backup[short]]
+
+        t_m = np.minimum(values(k)[main] * u_m, engine.MAX_TIME)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            required = np.where(np.isfinite(u_b) & (u_b > 0), (t_m + engine.CTI) / u_b, np.inf)
+        k_required = k_floor.copy()
+        np.maximum.at(k_required, backup, grid.tds_index(np.minimum(required, engine.MAX_TDS), backup, up=True))
+        k_new = np.where(movable, np.minimum(k, k_required), k)
+        if np.array_equal(k_new, k) and not short.any():
+            break
+        k = k_new
+    return values(k), sweeps
+
+
+# Optimización en la grilla: pickups al tap más cercano (tras el lazo de pickup del LP si se pide), LP con margen de
+# grilla y descenso discreto de TDS
+def optimize(problem: OptimizationProblem, grid: SettingGrid, pickup: np.ndarray, pickup_iterations: int = 0,
+             tds: Optional[np.ndarray] = None, free: Optional[np.ndarray] = None) -> DiscreteResult:
+    pickup = np.asarray(pickup, dtype=float)
+    if pickup_iterations:
+        pickup = lp_solver.optimize(problem, pickup, pickup_iterations, tds=tds, free=free).pickup
+    snapped = grid.snap_pickup(pickup, problem.pickup_max, free)
+    relaxed = grid_lp(problem, grid, snapped, tds, free)
+    active = relaxed.slack <= 1e-9
+    result_tds, sweeps = discrete_tds(problem, grid, snapped, relaxed.tds, active, free)
+    evaluation = engine.evaluate(problem.compiled, result_tds, snapped, problem.curve)
+    lost = int((active & (evaluation.delta_t < 0)).sum())
+    logger.info(f"Grilla discreta: T_total={evaluation.t_m.sum():.3f} (LP con margen de grilla "
+                f"{relaxed.evaluation.t_m.sum():.3f}), TMT={evaluation.tmt:.4f}, {sweeps} pasadas")
+    if lost:
+        logger.warning(f"{lost} pares coordinables quedaron con MT < 0 por el límite de TDS de la grilla")
+    return DiscreteResult(tds=result_tds, pickup=snapped, evaluation=evaluation, sweeps=sweeps, active=active)
@@ -0,0 +1,76 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Índice compilado de corrientes de cortocircuito: (línea, escenario, relé) -> I_shc = max(bus1, bus2),
+# conservando también (bus1, bus2) para el barrido de posiciones de falla
+@dataclass
+class ShortCircuitIndex:
+    scenario_id: str
+    currents: Dict[Tuple[str, str, str], float] = field(default_factory=dict)
+    bus_currents: Dict[Tuple[str, str, str], Tuple[float, float]] = field(default_factory=dict)
+    main_relays: Dict[Tuple[str, str], str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.currents)
+
+    def __contains__(self, key: Tuple[str, str, str]) -> bool:
+        return key in self.currents
+
+    def current(self, line: str, scenario: str, relay: str) -> float:
+        return self.currents[(line, scenario, relay)]
+
+    def bus_current(self, line: str, scenario: str, relay: str) -> Tuple[float, float]:
+        return self.bus_currents[(line, scenario, relay)]
+
+    def main_current(self, line: str, scenario: str) -> float:
+        return self.currents[(line, scenario, self.main_relays[(line, scenario)])]
+
+    # Entradas requeridas por relay_pairs que no existen en el índice
+    def missing_entries(self, relay_pairs: Dict) -> List[Tuple[str, str, str]]:
+        missing = []
+        for line, pair_data in relay_pairs.items():
+            for scenario, config in pair_data["scenarios"].items():
+                for relay in [config["main"]["relay"]] + [b["relay"] for b in config["backups"]]:
+                    if (line, scenario, relay) not in self.currents:
+                        missing.append((line, scenario, relay))
+        return missing
+
+    # Falla antes de evaluar si falta alguna corriente (en lugar de StopIteration a mitad del análisis)
+    def require(self, relay_pairs: Dict) -> None:
+        missing = self.missing_entries(relay_pairs)
+        if missing:
+            listing = ", ".join(f"{line}/{scenario}/{relay}" for line, scenario, relay in missing)
+            raise ValueError(f"Faltan {len(missing)} corrientes de cortocircuito en {self.scenario_id}: {listing}")
+
+
+def _add(index: ShortCircuitIndex, key: Tuple[str, str, str], currents: Dict) -> None:
+    index.bus_currents[key] = (currents["bus1"], currents["bus2"])
+    index.currents[key] = max(currents["bus1"], currents["bus2"])
+
+
+# Construir el índice en una sola pasada sobre data_short_circuit_scenario_*.json
+def build_index(short_circuit_data: Dict) -> ShortCircuitIndex:
+    index = ShortCircuitIndex(scenario_id=short_circuit_data.get("scenario_id"))
+    for line, line_data in short_circuit_data["lines"].items():
+        for scenario, sc in line_data["scenarios"].items():
+            main = sc["main"]
+            index.main_relays[(line, scenario)] = main["relay"]
+            _add(index, (line, scenario, main["relay"]), main["currents"])
+            for backup in sc["backups"]:
+                key = (line, scenario, backup["relay"])
+                if key in index.currents:
+                    logger.warning(f"Corriente duplicada para {line}/{scenario}/{backup['relay']}; se conserva la primera")
+                    continue
+                _add(index, key, backup["currents"])
+    return index
+
+
+# Cargar el archivo de cortocircuito y compilar su índice
+def load_index(file_path: str) -> ShortCircuitIndex:
+    with open(file_path, 'r') as file:
+        return build_index(json.load(file))
@@ -0,0 +1,92 @@
+import numpy as np
+from typing import Optional, Tuple, Union
+from coordination import engine
+from coordination.engine import CompiledPairs, CoordinationResult
+
+
+# Índice inverso relé -> pares (como principal o respaldo) en formato CSR: pares de r = pair_ids[ptr[r]:ptr[r + 1]].
+# Un par con el mismo relé como principal y respaldo aparece una sola vez en la fila de ese relé.
+def build_reverse_index(compiled: CompiledPairs) -> Tuple[np.ndarray, np.ndarray]:
+    pairs = np.arange(compiled.n_pairs)
+    distinct = compiled.backup_idx != compiled.main_idx
+    relay_of = np.concatenate([compiled.main_idx, compiled.backup_idx[distinct]])
+    pair_of = np.concatenate([pairs, pairs[distinct]])
+    order = np.lexsort((pair_of, relay_of))
+    ptr = np.zeros(compiled.n_relays + 1, dtype=np.intp)
+    np.cumsum(np.bincount(relay_of, minlength=compiled.n_relays), out=ptr[1:])
+    return ptr, pair_of[order]
+
+
+# Estado de coordinación que se actualiza en O(grado del relé) cuando cambia un ajuste
+class CoordinationState:
+    def __init__(self, compiled: CompiledPairs, tds: np.ndarray, pickup: np.ndarray,
+                 w_k: float = engine.W_K, w_pickup: float = engine.W_PICKUP, curve: Optional[np.ndarray] = None):
+        self.compiled = compiled
+        self.tds = np.array(tds, dtype=float)
+        self.pickup = np.array(pickup, dtype=float)
+        self.curve = None if curve is None else np.asarray(curve)
+        self.w_k = w_k
+        self.w_pickup = w_pickup
+        self.ptr, self.pair_ids = build_reverse_index(compiled)
+        self.refresh()
+
+    # Recalcular todos los pares (también corrige la deriva numérica de las sumas incrementales)
+    def refresh(self) -> None:
+        pairs = np.arange(self.compiled.n_pairs)
+        self.t_m, self.t_b, self.delta_t, self.MT, self.pickup_diffs = self._evaluate(pairs)
+        self.coordinated = np.isfinite(self.delta_t) & (self.delta_t >= 0)
+        self.tmt = float(self.MT.sum())
+        self.total_time = float(self.t_m.sum())
+        self.penalty = float(np.square(self.MT).sum())
+        self.pickup_diff = float(self.pickup_diffs.sum())
+        self.n_uncoordinated = int((~self.coordinated).sum())
+
+    def _evaluate(self, pairs: np.ndarray):
+        c = self.compiled
+        main, backup = c.main_idx[pairs], c.backup_idx[pairs]
+        # Principal y respaldo en una sola llamada: para grados pequeños domina el costo fijo por llamada
+        relays = np.concatenate([main, backup])
+        times = engine.operation_time(np.concatenate([c.I_shc_main[pairs], c.I_shc_backup[pairs]]), self.pickup[relays], self.tds[relays],
+                                      curve=None if self.curve is None else self.curve[relays])
+        t_m, t_b = times[:len(pairs)], times[len(pairs):]
+        delta_t = t_b - t_m - engine.CTI
+        MT = np.where(np.isfinite(delta_t), np.minimum(delta_t, 0.0), 0.0)
+        return t_m, t_b, delta_t, MT, np.abs(self.pickup[main] - self.pickup[backup])
+
+    def pairs_of(self, relay: Union[str, int]) -> np.ndarray:
+        r = self.compiled.relay_index[relay] if isinstance(relay, str) else relay
+        return self.pair_ids[self.ptr[r]:self.ptr[r + 1]]
+
+    # Cambiar TDS y/o pickup de un relé y recalcular solo sus pares; devuelve los pares afectados
+    def update(self, relay: Union[str, int], tds: Optional[float] = None, pickup: Optional[float] = None) -> np.ndarray:
+        r = self.compiled.relay_index[relay] if isinstance(relay, str) else relay
+        if tds is not None:
+            self.tds[r] = tds
+        if pickup is not None:
+            self.pickup[r] = pickup
+
+        pairs = self.pairs_of(r)
+        t_m, t_b, delta_t, MT, pickup_diffs = self._evaluate(pairs)
+        coordinated = np.isfinite(delta_t) & (delta_t >= 0)
+
+        self.tmt += float(MT.sum() - self.MT[pairs].sum())
+        self.total_time += float(t_m.sum() - self.t_m[pairs].sum())
+        self.penalty += float(np.square(MT).sum() - np.square(self.MT[pairs]).sum())
+        self.pickup_diff += float(pickup_diffs.sum() - self.pickup_diffs[pairs].sum())
+        self.n_uncoordinated += int(self.coordinated[pairs].sum() - coordinated.sum())
+
+        self.t_m[pairs], self.t_b[pairs], self.delta_t[pairs] = t_m, t_b, delta_t
+        self.MT[pairs], self.pickup_diffs[pairs] = MT, pickup_diffs
+        self.coordinated[pairs] = coordinated
+        return pairs
+
+    @property
+    def of(self) -> float:
+        return self.total_time + self.w_k * self.penalty + self.w_pickup * self.pickup_diff
+
+    def uncoordinated_pairs(self) -> np.ndarray:
+        return np.flatnonzero(~self.coordinated)
+
+    def result(self) -> CoordinationResult:
+        return CoordinationResult(t_m=self.t_m.copy(), t_b=self.t_b.copy(), delta_t=self.delta_t.copy(),
+                                  MT=self.MT.copy(), coordinated=self.coordinated.copy(), tmt=self.tmt)
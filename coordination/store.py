@@ -0,0 +1,567 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from coordination import engine, history
+from coordination.families import DEFAULT_CURVE, curve_code
+from coordination.history import HistoryRecord
+from coordination.scenario_data import ScenarioData, freeze, freeze_compiled, validate
+from coordination.short_circuit import ShortCircuitIndex
+
+logger = logging.getLogger(__name__)
+
+# Almacén local SQLite del conjunto de escenarios (reemplaza los JSON exportados de MongoDB). La topología de pares
+# (relay_pairs) es común a todos los escenarios; las corrientes, las versiones de ajustes y el historial de
+# coordinación se guardan por escenario (scenario_id de cada archivo).
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+STORE_PATH = os.path.join(DATA_DIR, "processed", "scenarios.db")
+SCHEMA_VERSION = 1
+BATCH_SIZE = 10000  # Filas por executemany en la importación del historial
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    oid TEXT,
+    timestamp TEXT
+);
+CREATE TABLE IF NOT EXISTS relays (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    position INTEGER,
+    node_from INTEGER,
+    node_to INTEGER,
+    relay_from INTEGER REFERENCES relays(id),
+    relay_to INTEGER REFERENCES relays(id)
+);
+CREATE TABLE IF NOT EXISTS fault_scenarios (
+    id INTEGER PRIMARY KEY,
+    line_id INTEGER NOT NULL REFERENCES lines(id),
+    name TEXT NOT NULL,
+    position INTEGER,
+    main_relay_id INTEGER REFERENCES relays(id),
+    UNIQUE (line_id, name)
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    id INTEGER PRIMARY KEY,
+    fault_id INTEGER NOT NULL REFERENCES fault_scenarios(id),
+    position INTEGER NOT NULL,
+    main_relay_id INTEGER NOT NULL REFERENCES relays(id),
+    backup_relay_id INTEGER NOT NULL REFERENCES relays(id),
+    backup_line_id INTEGER REFERENCES lines(id),
+    UNIQUE (fault_id, position)
+);
+CREATE INDEX IF NOT EXISTS pairs_main_relay ON pairs(main_relay_id);
+CREATE INDEX IF NOT EXISTS pairs_backup_relay ON pairs(backup_relay_id);
+CREATE INDEX IF NOT EXISTS pairs_backup_line ON pairs(backup_line_id);
+CREATE TABLE IF NOT EXISTS short_circuit (
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    fault_id INTEGER NOT NULL REFERENCES fault_scenarios(id),
+    relay_id INTEGER NOT NULL REFERENCES relays(id),
+    role TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    line_id INTEGER REFERENCES lines(id),
+    bus1 REAL NOT NULL,
+    bus2 REAL NOT NULL,
+    PRIMARY KEY (scenario_id, fault_id, relay_id)
+);
+CREATE INDEX IF NOT EXISTS short_circuit_relay ON short_circuit(relay_id, scenario_id);
+CREATE TABLE IF NOT EXISTS settings_versions (
+    id INTEGER PRIMARY KEY,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    oid TEXT,
+    timestamp TEXT,
+    source TEXT,
+    UNIQUE (scenario_id, name)
+);
+CREATE TABLE IF NOT EXISTS settings (
+    version_id INTEGER NOT NULL REFERENCES settings_versions(id) ON DELETE CASCADE,
+    relay_id INTEGER NOT NULL REFERENCES relays(id),
+    TDS REAL NOT NULL,
+    pickup REAL NOT NULL,
+    curve TEXT,
+    extra TEXT,
+    PRIMARY KEY (version_id, relay_id)
+);
+CREATE INDEX IF NOT EXISTS settings_relay ON settings(relay_id);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    scenario_id INTEGER REFERENCES scenarios(id) ON DELETE CASCADE,
+    fault_id INTEGER NOT NULL REFERENCES fault_scenarios(id),
+    relay_id INTEGER NOT NULL REFERENCES relays(id),
+    role TEXT NOT NULL,
+    mesh_id TEXT,
+    iteration INTEGER,
+    TDS REAL,
+    Time_out REAL,
+    pick_up REAL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS history_relay ON history(relay_id, scenario_id);
+CREATE INDEX IF NOT EXISTS history_scenario ON history(scenario_id, mesh_id);
+CREATE INDEX IF NOT EXISTS history_fault ON history(fault_id);
+"""
+
+# Pares de un relé (como principal o respaldo) en cada escenario con corrientes y en cada versión de ajustes de ese
+# escenario; sin versiones de ajustes la fila se conserva con TDS/pickup nulos
+PAIRS_INVOLVING = """
+SELECT s.name, l.name, f.name, m.name, b.name, bl.name,
+       MAX(scm.bus1, scm.bus2), MAX(scb.bus1, scb.bus2),
+       v.name, sm.TDS, sm.pickup, sm.curve, sb.TDS, sb.pickup, sb.curve
+FROM pairs p
+JOIN fault_scenarios f ON f.id = p.fault_id
+JOIN lines l ON l.id = f.line_id
+JOIN relays m ON m.id = p.main_relay_id
+JOIN relays b ON b.id = p.backup_relay_id
+LEFT JOIN lines bl ON bl.id = p.backup_line_id
+JOIN short_circuit scm ON scm.fault_id = p.fault_id AND scm.relay_id = p.main_relay_id
+JOIN short_circuit scb ON scb.fault_id = p.fault_id AND scb.relay_id = p.backup_relay_id
+                      AND scb.scenario_id = scm.scenario_id
+JOIN scenarios s ON s.id = scm.scenario_id
+LEFT JOIN settings_versions v ON v.scenario_id = s.id
+LEFT JOIN settings sm ON sm.version_id = v.id AND sm.relay_id = p.main_relay_id
+LEFT JOIN settings sb ON sb.version_id = v.id AND sb.relay_id = p.backup_relay_id
+WHERE (p.main_relay_id = :relay OR p.backup_relay_id = :relay) {filters}
+ORDER BY s.name, v.name, l.position, f.position, p.position
+"""
+PAIR_COLUMNS = ("scenario", "line", "fault", "main", "backup", "backup_line", "I_shc_main", "I_shc_backup",
+                "version", "TDS_main", "pickup_main", "curve_main", "TDS_backup", "pickup_backup", "curve_backup")
+
+
+# "_id": {"$oid": ...} y "timestamp" como texto o {"$date": ...} de los archivos exportados
+def _oid(data: Dict) -> Optional[str]:
+    value = data.get("_id")
+    return value.get("$oid") if isinstance(value, dict) else value
+
+
+def _timestamp(data: Dict) -> Optional[str]:
+    value = data.get("timestamp")
+    return value.get("$date") if isinstance(value, dict) else value
+
+
+# readonly abre la base en modo solo lectura (páginas y consultas): no toma el bloqueo de escritura, así que lee mientras
+# otra conexión importa (WAL). El esquema solo se crea desde una conexión de escritura sobre una base nueva.
+class Store:
+    def __init__(self, path: str = STORE_PATH, readonly: bool = False):
+        self.path = path
+        if readonly:
+            self.connection = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("PRAGMA journal_mode = WAL")  # Las páginas leen mientras se importa
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in ((SCHEMA_VERSION,) if readonly else (0, SCHEMA_VERSION)):
+            raise ValueError(f"{path}: versión de esquema {version} no soportada (se esperaba {SCHEMA_VERSION})")
+        if version == 0:
+            with self.connection:
+                self.connection.executescript(SCHEMA)
+                self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._ids: Dict[str, Dict] = {}
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Transacción de importación; incrementa la revisión que usan las cachés de lectura
+    @contextmanager
+    def _transaction(self):
+        try:
+            with self.connection:
+                yield self.connection
+                self.connection.execute("INSERT INTO meta (key, value) VALUES ('revision', 1) "
+                                        "ON CONFLICT (key) DO UPDATE SET value = value + 1")
+        except Exception:
+            self._ids.clear()  # Los ids insertados en la transacción revertida ya no existen
+            raise
+
+    def revision(self) -> int:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0] if row else 0
+
+    # Id de un nombre (relé, línea o escenario), creándolo si no existe
+    def _id(self, table: str, name: str) -> int:
+        ids = self._ids.get(table)
+        if ids is None:
+            ids = self._ids[table] = dict(self.connection.execute(f"SELECT name, id FROM {table}"))
+        if name not in ids:
+            ids[name] = self.connection.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,)).lastrowid
+        return ids[name]
+
+    def _fault(self, line: str, name: str) -> int:
+        ids = self._ids.get("fault_scenarios")
+        if ids is None:
+            ids = self._ids["fault_scenarios"] = {
+                (line_name, fault): fault_id for fault_id, line_name, fault in self.connection.execute(
+                    "SELECT f.id, l.name, f.name FROM fault_scenarios f JOIN lines l ON l.id = f.line_id")}
+        key = (line, name)
+        if key not in ids:
+            ids[key] = self.connection.execute("INSERT INTO fault_scenarios (line_id, name) VALUES (?, ?)",
+                                               (self._id("lines", line), name)).lastrowid
+        return ids[key]
+
+    def _scenario(self, data: Dict) -> int:
+        scenario_id = self._id("scenarios", data.get("scenario_id") or "scenario_1")
+        self.connection.execute("UPDATE scenarios SET oid = COALESCE(?, oid), timestamp = COALESCE(?, timestamp) "
+                                "WHERE id = ?", (_oid(data), _timestamp(data), scenario_id))
+        return scenario_id
+
+    # Topología de pares (relay_pairs.json); reemplaza la anterior conservando el orden del archivo
+    def import_pairs(self, relay_pairs: Dict) -> int:
+        validate(relay_pairs, "pairs", "relay_pairs")
+        count = 0
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM pairs")
+            connection.execute("UPDATE lines SET position = NULL")
+            connection.execute("UPDATE fault_scenarios SET position = NULL, main_relay_id = NULL")
+            for line_position, (line, pair_data) in enumerate(relay_pairs.items()):
+                nodes = list(pair_data.get("nodes") or []) + [None, None]
+                relays = [self._id("relays", relay) for relay in pair_data.get("relays") or []] + [None, None]
+                connection.execute("UPDATE lines SET position = ?, node_from = ?, node_to = ?, relay_from = ?, "
+                                   "relay_to = ? WHERE id = ?",
+                                   (line_position, nodes[0], nodes[1], relays[0], relays[1], self._id("lines", line)))
+                for fault_position, (scenario, config) in enumerate(pair_data["scenarios"].items()):
+                    fault_id = self._fault(line, scenario)
+                    main_id = self._id("relays", config["main"]["relay"])
+                    connection.execute("UPDATE fault_scenarios SET position = ?, main_relay_id = ? WHERE id = ?",
+                                       (fault_position, main_id, fault_id))
+                    connection.executemany(
+                        "INSERT INTO pairs (fault_id, position, main_relay_id, backup_relay_id, backup_line_id) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(fault_id, position, main_id, self._id("relays", backup["relay"]),
+                          self._id("lines", backup["line"]) if backup.get("line") else None)
+                         for position, backup in enumerate(config["backups"])])
+                    count += len(config["backups"])
+        logger.info(f"Importados {count} pares de {len(relay_pairs)} líneas")
+        return count
+
+    # Corrientes de un archivo data_short_circuit_scenario_*.json; reemplaza las del mismo escenario. Como en
+    # build_index, una corriente repetida para (línea, escenario de falla, relé) conserva la primera.
+    def import_short_circuit(self, short_circuit_data: Dict) -> int:
+        validate(short_circuit_data, "short_circuit", "short_circuit")
+        with self._transaction() as connection:
+            scenario_id = self._scenario(short_circuit_data)
+            connection.execute("DELETE FROM short_circuit WHERE scenario_id = ?", (scenario_id,))
+            rows = []
+            for line, line_data in short_circuit_data["lines"].items():
+                for scenario, sc in line_data["scenarios"].items():
+                    fault_id = self._fault(line, scenario)
+                    entries = [("main", sc["main"])] + [("backup", backup) for backup in sc["backups"]]
+                    for position, (role, entry) in enumerate(entries):
+                        rows.append((scenario_id, fault_id, self._id("relays", entry["relay"]), role, position,
+                                     self._id("lines", entry["line"]) if entry.get("line") else None,
+                                     entry["currents"]["bus1"], entry["currents"]["bus2"]))
+            connection.executemany("INSERT OR IGNORE INTO short_circuit VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        logger.info(f"Importadas {len(rows)} corrientes de {short_circuit_data.get('scenario_id')}")
+        return len(rows)
+
+    # Versión de ajustes con nombre (relay_values u optimized_relay_values) de un escenario; reemplaza la anterior
+    def import_settings(self, relay_data: Dict, name: str, source: Optional[str] = None) -> int:
+        validate(relay_data, "settings", source or name)
+        kind = "optimized_relay_values" if "optimized_relay_values" in relay_data else "relay_values"
+        with self._transaction() as connection:
+            scenario_id = self._scenario(relay_data)
+            connection.execute("DELETE FROM settings_versions WHERE scenario_id = ? AND name = ?", (scenario_id, name))
+            version_id = connection.execute(
+                "INSERT INTO settings_versions (scenario_id, name, kind, oid, timestamp, source) VALUES (?, ?, ?, ?, ?, ?)",
+                (scenario_id, name, kind, _oid(relay_data), _timestamp(relay_data), source)).lastrowid
+            rows = []
+            for relay, settings in relay_data[kind].items():
+                extra = {key: value for key, value in settings.items() if key not in ("TDS", "pickup", "curve")}
+                rows.append((version_id, self._id("relays", relay), settings["TDS"], settings["pickup"],
+                             settings.get("curve"), json.dumps(extra) if extra else None))
+            connection.executemany("INSERT INTO settings VALUES (?, ?, ?, ?, ?, ?)", rows)
+        logger.info(f"Importada la versión de ajustes {name} de {relay_data.get('scenario_id')} ({len(rows)} relés)")
+        return len(rows)
+
+    # Historial de un archivo data_coordination_scenario_*.json, leído por bloques. El scenario_id del archivo se
+    # conoce al terminar la lectura: las filas se insertan sin escenario y se asignan en la misma transacción.
+    def import_history(self, path: str) -> int:
+        metadata: Dict = {}
+        count = 0
+        with self._transaction() as connection:
+            records = history.iter_history(path, metadata=metadata)
+            while True:
+                batch = [(self._fault(record.line, record.scenario), self._id("relays", record.relay), record.role,
+                          record.mesh_id, record.iteration, record.TDS, record.Time_out, record.pick_up,
+                          record.timestamp) for record in itertools.islice(records, BATCH_SIZE)]
+                if not batch:
+                    break
+                connection.executemany(
+                    "INSERT INTO history (fault_id, relay_id, role, mesh_id, iteration, TDS, Time_out, pick_up, "
+                    "timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+            scenario_id = self._scenario(metadata)
+            connection.execute("DELETE FROM history WHERE scenario_id = ?", (scenario_id,))
+            connection.execute("UPDATE history SET scenario_id = ? WHERE scenario_id IS NULL", (scenario_id,))
+        logger.info(f"Importados {count} registros de historial de {metadata.get('scenario_id')}")
+        return count
+
+    def scenarios(self) -> List[str]:
+        return [name for name, in self.connection.execute("SELECT name FROM scenarios ORDER BY name")]
+
+    def settings_versions(self, scenario: Optional[str] = None) -> List[Dict]:
+        query = ("SELECT s.name, v.name, v.kind, v.timestamp, v.source FROM settings_versions v "
+                 "JOIN scenarios s ON s.id = v.scenario_id")
+        params: Tuple = ()
+        if scenario is not None:
+            query += " WHERE s.name = ?"
+            params = (scenario,)
+        return [dict(zip(("scenario", "name", "kind", "timestamp", "source"), row))
+                for row in self.connection.execute(query + " ORDER BY s.name, v.name", params)]
+
+    # Documento con la forma de relay_pairs.json (líneas -> escenarios de falla -> main/backups)
+    def relay_pairs(self) -> Dict:
+        relay_pairs: Dict = {}
+        rows = self.connection.execute("""
+            SELECT l.name, l.node_from, l.node_to, rf.name, rt.name, f.name, m.name, b.name, bl.name
+            FROM fault_scenarios f
+            JOIN lines l ON l.id = f.line_id
+            JOIN relays m ON m.id = f.main_relay_id
+            LEFT JOIN relays rf ON rf.id = l.relay_from
+            LEFT JOIN relays rt ON rt.id = l.relay_to
+            LEFT JOIN pairs p ON p.fault_id = f.id
+            LEFT JOIN relays b ON b.id = p.backup_relay_id
+            LEFT JOIN lines bl ON bl.id = p.backup_line_id
+            WHERE f.main_relay_id IS NOT NULL
+            ORDER BY l.position, f.position, p.position""")
+        for line, node_from, node_to, relay_from, relay_to, scenario, main, backup, backup_line in rows:
+            if line not in relay_pairs:
+                relay_pairs[line] = {"nodes": [node for node in (node_from, node_to) if node is not None],
+                                     "relays": [relay for relay in (relay_from, relay_to) if relay is not None],
+                                     "scenarios": {}}
+            scenarios = relay_pairs[line]["scenarios"]
+            if scenario not in scenarios:
+                scenarios[scenario] = {"main": {"relay": main}, "backups": []}
+            if backup is not None:
+                scenarios[scenario]["backups"].append({"relay": backup, "line": backup_line})
+        return relay_pairs
+
+    def _short_circuit_rows(self, scenario: str):
+        rows = self.connection.execute("""
+            SELECT l.name, f.name, r.name, sc.role, bl.name, sc.bus1, sc.bus2
+            FROM short_circuit sc
+            JOIN scenarios s ON s.id = sc.scenario_id
+            JOIN fault_scenarios f ON f.id = sc.fault_id
+            JOIN lines l ON l.id = f.line_id
+            JOIN relays r ON r.id = sc.relay_id
+            LEFT JOIN lines bl ON bl.id = sc.line_id
+            WHERE s.name = ?
+            ORDER BY l.id, f.id, sc.position""", (scenario,)).fetchall()
+        if not rows:
+            raise ValueError(f"No hay corrientes de cortocircuito para {scenario}")
+        return rows
+
+    # Índice de cortocircuito de un escenario directamente desde las filas (sin pasar por el documento)
+    def short_circuit_index(self, scenario: str) -> ShortCircuitIndex:
+        index = ShortCircuitIndex(scenario_id=scenario)
+        for line, fault, relay, role, _, bus1, bus2 in self._short_circuit_rows(scenario):
+            if role == "main":
+                index.main_relays[(line, fault)] = relay
+            index.bus_currents[(line, fault, relay)] = (bus1, bus2)
+            index.currents[(line, fault, relay)] = max(bus1, bus2)
+        return index
+
+    # Documento con la forma de data_short_circuit_scenario_*.json
+    def short_circuit_data(self, scenario: str) -> Dict:
+        oid, timestamp = self.connection.execute("SELECT oid, timestamp FROM scenarios WHERE name = ?",
+                                                 (scenario,)).fetchone()
+        lines: Dict = {}
+        for line, fault, relay, role, backup_line, bus1, bus2 in self._short_circuit_rows(scenario):
+            config = lines.setdefault(line, {"scenarios": {}})["scenarios"].setdefault(fault, {"backups": []})
+            entry = {"relay": relay, "currents": {"bus1": bus1, "bus2": bus2}}
+            if role == "main":
+                config["main"] = entry
+            else:
+                config["backups"].append({"line": backup_line, **entry})
+        return {"_id": {"$oid": oid}, "scenario_id": scenario, "timestamp": {"$date": timestamp}, "lines": lines}
+
+    # Documento de una versión de ajustes ({"scenario_id", "relay_values" u "optimized_relay_values"})
+    def relay_data(self, scenario: str, version: str) -> Dict:
+        row = self.connection.execute(
+            "SELECT v.id, v.kind, v.oid, v.timestamp FROM settings_versions v JOIN scenarios s ON s.id = v.scenario_id "
+            "WHERE s.name = ? AND v.name = ?", (scenario, version)).fetchone()
+        if row is None:
+            raise ValueError(f"No existe la versión de ajustes {version} de {scenario}")
+        version_id, kind, oid, timestamp = row
+        relay_values = {}
+        for relay, tds, pickup, curve, extra in self.connection.execute(
+                "SELECT r.name, st.TDS, st.pickup, st.curve, st.extra FROM settings st JOIN relays r ON r.id = st.relay_id "
+                "WHERE st.version_id = ? ORDER BY st.rowid", (version_id,)):
+            relay_values[relay] = {"TDS": tds, "pickup": pickup, **({"curve": curve} if curve is not None else {}),
+                                   **(json.loads(extra) if extra else {})}
+        data = {"scenario_id": scenario, "timestamp": timestamp, kind: relay_values}
+        if oid is not None:
+            data["_id"] = {"$oid": oid}
+        return data
+
+    # Pares compilados del motor para un escenario de cortocircuito
+    def compiled(self, scenario: str) -> engine.CompiledPairs:
+        return engine.compile_pairs(self.relay_pairs(), self.short_circuit_index(scenario))
+
+    # Todos los pares de un relé en cada escenario y versión de ajustes, con t_m, t_b, Δt y MT cuando hay ajustes
+    def pairs_involving(self, relay: str, scenario: Optional[str] = None, version: Optional[str] = None) -> List[Dict]:
+        row = self.connection.execute("SELECT id FROM relays WHERE name = ?", (relay,)).fetchone()
+        if row is None:
+            return []
+        filters, params = "", {"relay": row[0]}
+        if scenario is not None:
+            filters += " AND s.name = :scenario"
+            params["scenario"] = scenario
+        if version is not None:
+            filters += " AND v.name = :version"
+            params["version"] = version
+        rows = [dict(zip(PAIR_COLUMNS, row)) for row in self.connection.execute(PAIRS_INVOLVING.format(filters=filters), params)]
+        timed = [row for row in rows if row["TDS_main"] is not None and row["TDS_backup"] is not None]
+        if timed:
+            column = lambda name: np.array([row[name] for row in timed], dtype=float)
+            codes = lambda name: np.array([curve_code(row[name] or DEFAULT_CURVE) for row in timed], dtype=np.int8)
+            t_m = engine.operation_time(column("I_shc_main"), column("pickup_main"), column("TDS_main"), curve=codes("curve_main"))
+            t_b = engine.operation_time(column("I_shc_backup"), column("pickup_backup"), column("TDS_backup"), curve=codes("curve_backup"))
+            # Δt y MT como en engine.evaluate: MT = min(Δt, 0) y 0 si Δt no es finito
+            delta_t = t_b - t_m - engine.CTI
+            mt = np.where(np.isfinite(delta_t), np.minimum(delta_t, 0.0), 0.0)
+            for row, main_time, backup_time, delta, margin in zip(timed, t_m.tolist(), t_b.tolist(), delta_t.tolist(), mt.tolist()):
+                row.update(t_main=main_time, t_backup=backup_time, delta_t=delta, MT=margin)
+        return rows
+
+    # Historial de coordinación con filtros opcionales (usa los índices por relé y por escenario/malla)
+    def history(self, relay: Optional[str] = None, scenario: Optional[str] = None, mesh: Optional[str] = None,
+                line: Optional[str] = None) -> Iterator[HistoryRecord]:
+        conditions, params = [], []
+        for column, value in (("r.name", relay), ("s.name", scenario), ("h.mesh_id", mesh), ("l.name", line)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        query = ("SELECT l.name, f.name, r.name, h.mesh_id, h.iteration, h.TDS, h.Time_out, h.pick_up, h.timestamp, h.role "
+                 "FROM history h JOIN scenarios s ON s.id = h.scenario_id JOIN fault_scenarios f ON f.id = h.fault_id "
+                 "JOIN lines l ON l.id = f.line_id JOIN relays r ON r.id = h.relay_id")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        for row in self.connection.execute(query + " ORDER BY h.id", params):
+            yield HistoryRecord(*row)
+
+
+def _load_json(path: str) -> Dict:
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+# Importar los archivos JSON existentes; settings es una lista de (nombre de versión, ruta)
+def import_files(path: str, relay_pairs_path: Optional[str] = None, short_circuit_paths: Sequence[str] = (),
+                 settings: Sequence[Tuple[str, str]] = (), history_paths: Sequence[str] = ()) -> None:
+    with Store(path) as store:
+        if relay_pairs_path:
+            store.import_pairs(_load_json(relay_pairs_path))
+        for short_circuit_path in short_circuit_paths:
+            store.import_short_circuit(_load_json(short_circuit_path))
+        for name, settings_path in settings:
+            store.import_settings(_load_json(settings_path), name, source=settings_path)
+        for history_path in history_paths:
+            try:
+                store.import_history(history_path)
+            except ValueError as e:
+                logger.warning(f"Se omite el historial de {history_path}: {e}")
+
+
+_scenarios: Dict[Tuple, Tuple[int, ScenarioData]] = {}
+_readers: Dict[str, Store] = {}  # Una conexión de solo lectura por base y proceso, protegida por _lock
+_lock = threading.Lock()
+
+
+def _reader(path: str) -> Store:
+    store = _readers.get(path)
+    if store is None:
+        store = _readers[path] = Store(path, readonly=True)
+    return store
+
+
+# Conjunto de escenario desde el almacén para las páginas, con la misma forma que scenario_data.load_scenario;
+# settings asigna a cada nombre de la página una versión de ajustes. Se reconstruye solo si cambió la revisión.
+def load_scenario(path: str, scenario: str, settings: Optional[Dict[str, str]] = None) -> ScenarioData:
+    settings = settings or {}
+    key = (os.path.abspath(path), scenario, tuple(settings.items()))
+    with _lock:
+        store = _reader(key[0])
+        revision = store.revision()
+        cached = _scenarios.get(key)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        relay_pairs = store.relay_pairs()
+        index = store.short_circuit_index(scenario)
+        data = ScenarioData(
+            relay_pairs=freeze(relay_pairs),
+            short_circuit=freeze(store.short_circuit_data(scenario)),
+            index=index,
+            compiled=freeze_compiled(engine.compile_pairs(relay_pairs, index)),
+            settings=MappingProxyType({name: freeze(store.relay_data(scenario, version)) for name, version in settings.items()}),
+            digests=(f"{key[0]}#{revision}",),
+        )
+        _scenarios[key] = (revision, data)
+        logger.info(f"Cargado {scenario} desde {path} (revisión {revision})")
+        return data
+
+
+def main():
+    from coordination import optimizer
+
+    parser = argparse.ArgumentParser(description="Almacén SQLite de escenarios: importar los JSON y consultar pares")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    importer = subparsers.add_parser("import", help="Importar los archivos JSON existentes")
+    importer.add_argument("--db", default=STORE_PATH, help="Archivo SQLite")
+    importer.add_argument("--pairs", default=optimizer.RELAY_PAIRS_PATH, help="Archivo relay_pairs.json")
+    importer.add_argument("--short-circuit", nargs="*", default=[
+        os.path.join(DATA_DIR, "raw", "data_short_circuit_scenario_base.json"),
+        os.path.join(DATA_DIR, "raw", "data_short_circuit_scenario_20.json")], help="Archivos de cortocircuito")
+    importer.add_argument("--settings", nargs="*", default=[
+        f"base={os.path.join(DATA_DIR, 'raw', 'data_relays_scenario_base.json')}",
+        f"base={os.path.join(DATA_DIR, 'raw', 'data_relays_scenario_20.json')}",
+        f"optimized={optimizer.OPTIMIZED_RELAY_DATA_PATH}"],
+        help="Versiones de ajustes como nombre=ruta (el escenario se toma del scenario_id del archivo)")
+    importer.add_argument("--history", nargs="*", default=[os.path.join(DATA_DIR, "raw", "data_coordination_scenario_base.json")],
+                          help="Archivos de coordinación con coordination_history")
+    query = subparsers.add_parser("pairs", help="Pares de un relé en todos los escenarios y versiones de ajustes")
+    query.add_argument("--db", default=STORE_PATH, help="Archivo SQLite")
+    query.add_argument("--relay", required=True)
+    query.add_argument("--scenario", help="Solo este escenario")
+    query.add_argument("--version", help="Solo esta versión de ajustes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "import":
+        settings = [tuple(item.split("=", 1)) for item in args.settings]
+        import_files(args.db, args.pairs, args.short_circuit, settings, args.history)
+        return
+    with Store(args.db, readonly=True) as store:
+        rows = store.pairs_involving(args.relay, args.scenario, args.version)
+    for row in rows:
+        print(json.dumps(row))
+    logger.info(f"{len(rows)} filas para {args.relay}")
+
+
+if __name__ == "__main__":
+    main()
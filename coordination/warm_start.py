@@ -0,0 +1,125 @@
+import json
+import logging
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+from coordination import history
+from coordination.engine import CompiledPairs
+from coordination.short_circuit import ShortCircuitIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Ajustes {relé: {"TDS", "pickup"}} de un archivo optimizado previo (data_relays_*_optimized.json)
+def from_optimized(optimized_data: Dict) -> Dict[str, Dict[str, float]]:
+    return {relay: {"TDS": values["TDS"], "pickup": values["pickup"]}
+            for relay, values in optimized_data["optimized_relay_values"].items()}
+
+
+# Última entrada de coordination_history de cada relé (como principal o respaldo) en results_by_line
+def from_history(coordination_data: Dict) -> Dict[str, Dict[str, float]]:
+    return latest_settings(history.history_records(coordination_data))
+
+
+# Ajustes de la última entrada (por timestamp e iteración) de cada relé entre los registros de historial
+def latest_settings(records: Iterable[history.HistoryRecord]) -> Dict[str, Dict[str, float]]:
+    latest = {}
+    for record in records:
+        if record.TDS is None or record.pick_up is None:
+            continue
+        key = (record.timestamp, record.iteration or 0)
+        if record.relay not in latest or key > latest[record.relay][0]:
+            latest[record.relay] = (key, {"TDS": record.TDS, "pickup": record.pick_up})
+    return {relay: values for relay, (_, values) in latest.items()}
+
+
+# Ajustes previos desde un archivo optimizado o un archivo de coordinación con results_by_line
+def load_seed(data: Dict) -> Dict[str, Dict[str, float]]:
+    if "optimized_relay_values" in data:
+        return from_optimized(data)
+    if "results_by_line" in data:
+        return from_history(data)
+    raise ValueError("El archivo de arranque no contiene optimized_relay_values ni results_by_line")
+
+
+# Ajustes previos desde un archivo: los de coordinación se leen por bloques (coordination.history), sin cargar el
+# historial completo en memoria
+def load_seed_file(path: str) -> Dict[str, Dict[str, float]]:
+    try:
+        return latest_settings(history.iter_history(path))
+    except ValueError:
+        with open(path, 'r') as file:
+            return load_seed(json.load(file))
+
+
+# relay_values con TDS y pickup reemplazados por los del arranque; la curva y los relés sin valor previo no cambian
+def apply_seed(relay_values: Dict, seed: Dict[str, Dict[str, float]]) -> Dict:
+    seeded = {relay: dict(values) for relay, values in relay_values.items()}
+    missing = 0
+    for relay, values in seeded.items():
+        if relay in seed:
+            values["TDS"], values["pickup"] = seed[relay]["TDS"], seed[relay]["pickup"]
+        else:
+            missing += 1
+    logger.info(f"Arranque en caliente: {len(seeded) - missing} relés con ajustes previos, {missing} con los iniciales")
+    return seeded
+
+
+# Firma de una línea: relés y corrientes de cada escenario de falla
+def _line_signature(pair_data: Dict, line: str, index: Optional[ShortCircuitIndex]):
+    signature = []
+    for scenario, config in sorted(pair_data["scenarios"].items()):
+        relays = [config["main"]["relay"]] + [b["relay"] for b in config["backups"]]
+        backups = tuple(sorted((b.get("line"), b["relay"]) for b in config["backups"]))
+        currents = () if index is None else tuple(
+            index.current(line, scenario, relay) if (line, scenario, relay) in index else None for relay in relays)
+        signature.append((scenario, config["main"]["relay"], backups, currents))
+    return tuple(signature)
+
+
+# Líneas agregadas, eliminadas o con pares/corrientes distintos entre dos versiones de la red
+def changed_lines(previous_pairs: Dict, relay_pairs: Dict, previous_index: Optional[ShortCircuitIndex] = None,
+                  index: Optional[ShortCircuitIndex] = None) -> List[str]:
+    changed = []
+    for line in dict.fromkeys(list(relay_pairs) + list(previous_pairs)):
+        if line not in relay_pairs or line not in previous_pairs:
+            changed.append(line)
+        elif (_line_signature(previous_pairs[line], line, previous_index)
+              != _line_signature(relay_pairs[line], line, index)):
+            changed.append(line)
+    return changed
+
+
+# Relés de las líneas cambiadas (en cualquiera de las dos versiones de relay_pairs) y, si depth > 0, los respaldos
+# alcanzables siguiendo hasta depth pares principal -> respaldo
+def reachable_relays(compiled: CompiledPairs, lines: Iterable[str], *relay_pairs: Dict, depth: int = 0) -> np.ndarray:
+    lines = set(lines)
+    start = set()
+    for pairs in relay_pairs:
+        for line in lines & set(pairs):
+            for config in pairs[line]["scenarios"].values():
+                start.add(config["main"]["relay"])
+                start.update(b["relay"] for b in config["backups"])
+
+    reached = np.zeros(compiled.n_relays, dtype=bool)
+    reached[[compiled.relay_index[relay] for relay in start if relay in compiled.relay_index]] = True
+    for _ in range(depth):
+        backups = compiled.backup_idx[reached[compiled.main_idx]]
+        if reached[backups].all():
+            break
+        reached[backups] = True
+    return reached
+
+
+# Ampliar el conjunto libre con los relés fijos de pares que tocan un relé libre y quedaron descoordinados, o más
+# descoordinados que con los ajustes de arranque (baseline_mt), en más de tolerance: el cambio se propaga solo hasta
+# donde realmente altera un margen. Devuelve None si no hay nada que agregar.
+def expand_free(compiled: CompiledPairs, free: np.ndarray, mt: np.ndarray, baseline_mt: np.ndarray,
+                tolerance: float) -> Optional[np.ndarray]:
+    main_free, backup_free = free[compiled.main_idx], free[compiled.backup_idx]
+    blocked = (mt < np.minimum(baseline_mt, 0.0) - tolerance) & (main_free != backup_free)
+    if not blocked.any():
+        return None
+    expanded = free.copy()
+    expanded[compiled.main_idx[blocked]] = True
+    expanded[compiled.backup_idx[blocked]] = True
+    return expanded
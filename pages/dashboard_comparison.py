@@ -1,82 +1,31 @@
-import json
 import numpy as np
 import plotly.graph_objects as go
 from dash import dcc, html, dash_table
+from coordination import engine
+from pages.page_view import PageView
 
 # Rutas relativas
 RELAY_DATA_BASE_PATH = "data/raw/data_relays_scenario_base.json"
 RELAY_DATA_OPT_PATH = "data/processed/data_relays_scenario_base_optimized.json"
-RELAY_PAIRS_PATH = "data/config/relay_pairs.json"
-SHORT_CIRCUIT_PATH = "data/raw/data_short_circuit_scenario_base.json"
-
-# Constantes
-K = 0.14
-N = 0.02
-CTI = 0.2
-MAX_TIME = 10.0
-
-# Cargar datos
-def load_json_file(file_path):
-    try:
-        with open(file_path, 'r') as file:
-            return json.load(file)
-    except Exception as e:
-        print(f"Error cargando {file_path}: {e}")
-        return None
-
-relay_data_base = load_json_file(RELAY_DATA_BASE_PATH)
-relay_data_opt = load_json_file(RELAY_DATA_OPT_PATH)
-relay_pairs = load_json_file(RELAY_PAIRS_PATH)
-short_circuit_data = load_json_file(SHORT_CIRCUIT_PATH)
-
-if not all([relay_data_base, relay_data_opt, relay_pairs, short_circuit_data]):
-    layout = html.Div("Error: No se pudieron cargar los datos.")
-else:
-    # Función para calcular tiempo de operación
-    def calculate_operation_time(I_shc, I_pi, TDS, max_time=MAX_TIME):
-        if I_pi <= 0 or I_shc <= 0:
-            return max_time
-        M = I_shc / I_pi
-        if M <= 1:
-            return max_time
-        try:
-            time = (K / (M**N - 1)) * TDS
-            return min(time, max_time)
-        except:
-            return max_time
-
-    # Analizar coordinación para MT
-    def analyze_coordination(relay_data, relay_pairs, short_circuit_data, optimized=False):
-        mt_values = {}
-        for line, pair_data in relay_pairs.items():
-            for scenario in pair_data["scenarios"].keys():
-                config = pair_data["scenarios"][scenario]
-                main_relay = config["main"]["relay"]
-                backups = config["backups"]
-                
-                key = "optimized_relay_values" if optimized else "relay_values"
-                main_tds = relay_data[key][main_relay]["TDS"]
-                main_pickup = relay_data[key][main_relay]["pickup"]
-                main_currents = short_circuit_data["lines"][line]["scenarios"][scenario]["main"]["currents"]
-                I_shc_main = max(main_currents["bus1"], main_currents["bus2"])
-                t_m_ref = calculate_operation_time(I_shc_main, main_pickup, main_tds)
-                
-                for backup in backups:
-                    backup_relay = backup["relay"]
-                    backup_tds = relay_data[key][backup_relay]["TDS"]
-                    backup_pickup = relay_data[key][backup_relay]["pickup"]
-                    backup_currents = next(b["currents"] for b in short_circuit_data["lines"][line]["scenarios"][scenario]["backups"] if b["relay"] == backup_relay)
-                    I_shc_backup = max(backup_currents["bus1"], backup_currents["bus2"])
-                    t_b_ref = calculate_operation_time(I_shc_backup, backup_pickup, backup_tds)
-                    
-                    delta_t = t_b_ref - t_m_ref - CTI
-                    MT = (delta_t - abs(delta_t)) / 2 if np.isfinite(delta_t) else 0
-                    mt_values[(main_relay, backup_relay)] = MT
-        
-        return mt_values
 
-    mt_base = analyze_coordination(relay_data_base, relay_pairs, short_circuit_data, optimized=False)
-    mt_opt = analyze_coordination(relay_data_opt, relay_pairs, short_circuit_data, optimized=True)
+# Ajustes de la página: nombre -> (archivo JSON, versión del almacén SQLite)
+SETTINGS = {"optimized": (RELAY_DATA_OPT_PATH, "optimized"), "base": (RELAY_DATA_BASE_PATH, "base")}
+
+ERROR_MESSAGE = "Error: No se pudieron cargar los datos."
+
+
+def _build(data):
+    relay_data_base, relay_data_opt = data.settings["base"], data.settings["optimized"]
+    # Analizar coordinación para MT con el motor vectorizado (pares compilados por la capa de datos)
+    compiled_pairs = data.compiled
+
+    def analyze_coordination(relay_values):
+        tds, pickup = engine.settings_arrays(compiled_pairs, relay_values)
+        result = engine.evaluate(compiled_pairs, tds, pickup, engine.curve_codes(compiled_pairs, relay_values))
+        return engine.mt_by_relay_pair(compiled_pairs, result)
+
+    mt_base = analyze_coordination(relay_data_base["relay_values"])
+    mt_opt = analyze_coordination(relay_data_opt["optimized_relay_values"])
 
     # Datos de comparación
     comparison_data = []
@@ -159,4 +108,12 @@ else:
         mt_pairs_fig.add_trace(go.Scatter(x=pair_labels, y=mt_opt_pairs, mode="lines+markers", name="Optimizado", line=dict(color="green")))
         mt_pairs_fig.update_layout(title="Evolución de MT por Par", xaxis_title="Pares de Relés", yaxis_title="MT (s)", xaxis={'tickangle': 45}, height=400, showlegend=True)
 
-        return tds_fig, pickup_fig, mt_fig, mt_pairs_fig
\ No newline at end of file
+        return tds_fig, pickup_fig, mt_fig, mt_pairs_fig
+
+    return layout, update_dashboard
+
+
+view = PageView(SETTINGS, _build, ERROR_MESSAGE)
+load_data = view.load_data
+get_layout = view.get_layout
+update_dashboard = view.update_dashboard
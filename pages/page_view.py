@@ -0,0 +1,62 @@
+import logging
+import os
+from typing import Callable, Dict, Tuple
+from dash import html
+from dash.exceptions import PreventUpdate
+from coordination import scenario_data, store
+
+logger = logging.getLogger(__name__)
+
+# Rutas relativas comunes a los dashboards
+RELAY_PAIRS_PATH = "data/config/relay_pairs.json"
+SHORT_CIRCUIT_PATH = "data/raw/data_short_circuit_scenario_base.json"
+BUNDLE_PATH = "data/processed/bundle"
+SCENARIO_ID = "scenario_1"
+
+
+# Datos compartidos entre páginas: del almacén SQLite si existe (versión de ajustes por nombre) o de los JSON (ruta por
+# nombre) a través del paquete binario mapeado en memoria, compilado en el primer arranque. Si el paquete no se puede
+# compilar o leer, se parsean los JSON. settings: nombre en la página -> (archivo JSON, versión del almacén). Las cachés
+# devuelven el mismo objeto mientras no cambien los archivos (mtime/hash) o la revisión del almacén.
+def load_scenario(settings: Dict[str, Tuple[str, str]]) -> scenario_data.ScenarioData:
+    if os.path.exists(store.STORE_PATH):
+        return store.load_scenario(store.STORE_PATH, SCENARIO_ID, {name: version for name, (_, version) in settings.items()})
+    paths = {name: path for name, (path, _) in settings.items()}
+    directory = f"{BUNDLE_PATH}-{'-'.join(sorted(paths))}"  # Un paquete por juego de ajustes, compartido entre páginas
+    try:
+        return scenario_data.load_bundle_scenario(directory, RELAY_PAIRS_PATH, SHORT_CIRCUIT_PATH, paths)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"No se pudo usar el paquete {directory}; se leen los JSON: {e}")
+    return scenario_data.load_scenario(RELAY_PAIRS_PATH, SHORT_CIRCUIT_PATH, paths)
+
+
+# Layout y callback de una página; build(data) -> (layout, update_dashboard o None si los datos no sirven). La vista se
+# reconstruye solo cuando la caché compartida devuelve datos nuevos.
+class PageView:
+    def __init__(self, settings: Dict[str, Tuple[str, str]], build: Callable, error_message: str):
+        self.settings = settings
+        self.build = build
+        self.error_message = error_message
+        self._view = (None, None, None)  # (datos, layout, update_dashboard) de la última construcción
+
+    def load_data(self) -> scenario_data.ScenarioData:
+        return load_scenario(self.settings)
+
+    def current(self):
+        try:
+            data = self.load_data()
+        except Exception:
+            logger.exception("Error cargando datos")
+            return html.Div(self.error_message), None
+        if self._view[0] is not data:
+            self._view = (data, *self.build(data))
+        return self._view[1], self._view[2]
+
+    def get_layout(self):
+        return self.current()[0]
+
+    def update_dashboard(self, *args):
+        update = self.current()[1]
+        if update is None:
+            raise PreventUpdate
+        return update(*args)